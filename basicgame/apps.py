@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BasicGameConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "basicgame"
+
+    def ready(self):
+        from basicgame.hints import get_hints
+        from basicgame.sqlite import configure_connection
+
+        connection_created.connect(configure_connection)
+        get_hints()
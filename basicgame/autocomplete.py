@@ -0,0 +1,134 @@
+import bisect
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db.models import Count
+from basicgame.hints import HintCorpus, get_hints
+from basicgame.models import Submission
+
+"""
+Prefix search over categories and characters, for suggestions while a player
+types. Suggestions come from the hint corpus and from submissions made in
+past games, the most popular first. Entries are kept in a sorted array of
+casefolded keys per kind, so a lookup is a binary search plus a scan of the
+matching range. The index is rebuilt from the db every few minutes, so that
+new popular submissions appear.
+"""
+
+KINDS = ("category", "character")
+
+
+class PrefixIndex:
+
+    """
+    Immutable prefix index. Takes (text, kind, weight) entries; duplicates of
+    a text (ignoring case) within a kind are merged, adding their weights.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, int]]) -> None:
+        merged: Dict[str, Dict[str, Tuple[str, int]]] = {kind: {} for kind in KINDS}
+        for text, kind, weight in entries:
+            text = text.strip()
+            if not text or kind not in merged:
+                continue
+            key = text.casefold()
+            existing = merged[kind].get(key)
+            if existing:
+                # the spelling with the larger weight wins
+                best = existing[0] if existing[1] >= weight else text
+                merged[kind][key] = (best, existing[1] + weight)
+            else:
+                merged[kind][key] = (text, weight)
+        self._keys: Dict[str, List[str]] = {}
+        self._entries: Dict[str, List[Tuple[str, int]]] = {}
+        for kind, by_key in merged.items():
+            keys = sorted(by_key)
+            self._keys[kind] = keys
+            self._entries[kind] = [by_key[key] for key in keys]
+
+    def suggest(self, prefix: str, kind: str, limit: int = 8) -> List[str]:
+        """
+        Takes a prefix and a kind ('category' or 'character'), returns up to
+        limit texts starting with the prefix (ignoring case), highest weight
+        first, then alphabetically.
+        """
+        keys = self._keys.get(kind)
+        prefix = prefix.strip().casefold()
+        if not keys or not prefix or limit < 1:
+            return []
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\U0010ffff", lo=start)
+        matches = self._entries[kind][start:end]
+        best = heapq.nsmallest(
+            limit, enumerate(matches), key=lambda match: (-match[1][1], match[0])
+        )
+        return [text for _, (text, _) in best]
+
+
+def popular_submissions(limit: int = 500) -> List[Tuple[str, str, int]]:
+    """
+    Returns the texts submitted most often in past rounds, as
+    (text, kind, times submitted) entries. Texts submitted once are left out.
+    """
+    rows = (
+        Submission.objects.values("text", "is_category")
+        .annotate(times=Count("pk"))
+        .filter(times__gt=1)
+        .order_by("-times")[:limit]
+    )
+    return [
+        (row["text"], "category" if row["is_category"] else "character", row["times"])
+        for row in rows
+    ]
+
+
+class AutocompleteService:
+
+    """
+    Holds the current PrefixIndex. Hints weigh 1, and popular submissions
+    the number of times they were submitted. Lookups never touch the db;
+    refresh_if_stale reloads popular submissions every max_age seconds.
+    """
+
+    def __init__(self, hints: HintCorpus, max_age: float = 600) -> None:
+        self.hints = hints
+        self.max_age = max_age
+        self.index = PrefixIndex(self.hint_entries())
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def hint_entries(self) -> List[Tuple[str, str, int]]:
+        return [(text, "category", 1) for text in self.hints.categories] + [
+            (text, "character", 1) for text in self.hints.characters
+        ]
+
+    @property
+    def stale(self) -> bool:
+        return (
+            self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+        )
+
+    def refresh_if_stale(self) -> None:
+        """Rebuilds the index with popular submissions from the db if stale."""
+        if not self.stale or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.index = PrefixIndex(self.hint_entries() + popular_submissions())
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def suggest(self, prefix: str, kind: str, limit: int = 8) -> List[str]:
+        return self.index.suggest(prefix, kind, limit)
+
+
+_service: Optional[AutocompleteService] = None
+
+
+def get_autocomplete() -> AutocompleteService:
+    """Returns this process's autocomplete service."""
+    global _service
+    if _service is None:
+        _service = AutocompleteService(get_hints())
+    return _service
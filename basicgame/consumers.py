@@ -1,12 +1,16 @@
 import json
-import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import Dict, Optional
 from async_property import async_property  # type: ignore
+from channels.db import database_sync_to_async  # type: ignore
 from channels.generic.websocket import AsyncWebsocketConsumer  # type: ignore
 from basicgame import utils
-from basicgame.set_interval import setIntervalAsync
-import time
+from basicgame.autocomplete import KINDS, get_autocomplete
+from basicgame.models import Game
+from basicgame.game_registry import get_game_registry
+from basicgame.game_state import GameState, get_game_store
+from basicgame.round_payloads import get_round_payloads
+from basicgame.scheduler import get_round_scheduler
 
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,7 @@ class LobbyConsumer(AsyncWebsocketConsumer):
         self.group_name: str
         self.player_name: str
         self.starting: bool = False
+        self.registry = get_game_registry()
 
     async def broadcast_player_list_html(self) -> None:
         """Retrieves players in the game from db and sends html string to all in lobby."""
@@ -34,14 +39,15 @@ class LobbyConsumer(AsyncWebsocketConsumer):
     async def connect(self) -> None:
         """
         (1) Finds and assigns game_name via url.
-        (2) Retrieves and assigns matching game_id from db.
+        (2) Retrieves and assigns matching game_id from db, refreshing the
+            game registry, as the name may belong to a game since deleted.
         (3) Creates group "lobby_{game_id}" and adds current channel.
         (4) Retrieves player_name (e.g. nickname12345678) from cookie.
         (5) Ensures player with matching nickname is in the db.
         (6) Broadcasts a html string containing all players currently in the game.
         """
         self.game_name = self.scope["url_route"]["kwargs"]["game_name"]
-        self.game_id = await utils.get_game_id(self.game_name)
+        self.game_id = (await self.registry.get(self.game_name, refresh=True)).game_id
         self.group_name = f"lobby_{self.game_id}"
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
@@ -49,6 +55,7 @@ class LobbyConsumer(AsyncWebsocketConsumer):
         if player_name:
             self.player_name = player_name
             await utils.ensure_player_in_game_db(self.player_name, self.game_id)
+            self.registry.add_player(self.game_id, self.player_name)
             await self.broadcast_player_list_html()
         else:
             await self.disconnect("bad cookie")
@@ -60,6 +67,7 @@ class LobbyConsumer(AsyncWebsocketConsumer):
         """
         if not self.starting:
             await utils.remove_player_from_db(self.player_name)
+            self.registry.remove_player(self.game_id, self.player_name)
             await self.broadcast_player_list_html()
             logger.warning(close_code)
 
@@ -93,7 +101,12 @@ class LobbyConsumer(AsyncWebsocketConsumer):
 
 class GameConsumer(AsyncWebsocketConsumer):
 
-    """Handles websocket messages from the game page."""
+    """
+    Handles websocket messages from the game page.
+    Player input is recorded in the game store, and game events are forwarded
+    to the consumer elected as the game's owner, whose RoundScheduler is the
+    only task advancing the game and broadcasting to the channel group.
+    """
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(args, kwargs)
@@ -101,181 +114,165 @@ class GameConsumer(AsyncWebsocketConsumer):
         self.game_id: int
         self.group_name: str
         self.player_name: str
-        self.wait_time: int = 6
-        # functionless interval for type checking, never gets started
-        self.broadcast: setIntervalAsync = setIntervalAsync(lambda *args: None, 1, 2, 0)
-        self.sequence: List[str]
-        self.results_sequence: asyncio.Task
+        self.store = get_game_store()
+        self.registry = get_game_registry()
+        self.payloads = get_round_payloads()
+        self.last_progress: int = 0
 
     async def connect(self) -> None:
         """
         (1) Finds and assigns game_name via url.
-        (2) Retrieves and assigns matching game_id from db.
+        (2) Retrieves and assigns matching game_id from the game registry.
         (3) Creates group "game_{game_id}" and adds current channel.
         (4) Retrieves player_name (e.g. nickname12345678) from cookie.
-        (5) Ensures player with matching nickname is in the game db.
-        (6) Assigns game sequence.
-        (7) Sends game json depending on current game progress.
-        (8) If data cannot be processed, round is skipped.
+        (5) Ensures player with matching nickname is in the game db. If the
+            registry pointed at a deleted game, it is refreshed first.
+        (6) Ensures player is in the shared game state (includes game sequence).
+        (7) Stands for election as the game's owner.
+        (8) Registers channel for acknowledged delivery of broadcasts.
+        (9) Sends game json depending on current game progress. The json is
+            shared by all players, so it is served from the payload cache,
+            which is invalidated when a new player changes the round count.
+        (10) If data cannot be processed, round is skipped.
         """
         self.game_name = self.scope["url_route"]["kwargs"]["game_name"]
-        self.game_id = await utils.get_game_id(self.game_name)
+        self.game_id = (await self.registry.get(self.game_name)).game_id
         self.group_name = f"game_{self.game_id}"
 
         player_name = utils.get_player_name_from_cookie(self.scope, self.game_name)
         if player_name:
             self.player_name = player_name
-            await utils.ensure_player_in_game_db(self.player_name, self.game_id)
-            self.sequence = await utils.generate_game_sequence_async(self.game_name)
+            try:
+                await utils.ensure_player_in_game_db(self.player_name, self.game_id)
+            except Game.DoesNotExist:
+                info = await self.registry.get(self.game_name, refresh=True)
+                self.game_id = info.game_id
+                self.group_name = f"game_{self.game_id}"
+                await utils.ensure_player_in_game_db(self.player_name, self.game_id)
+            if self.registry.add_player(self.game_id, self.player_name):
+                self.payloads.invalidate(self.game_id)
+            await self.store.add_player(self.game_id, self.player_name)
 
             await self.channel_layer.group_add(self.group_name, self.channel_name)
             await self.accept()
+            await self.store.claim_owner(self.game_id, self.channel_name)
+            await self.store.record_ack(self.game_id, self.channel_name, -1)
             try:
-                view_type = await self.current_view
-                json_string: str = await utils.generate_round_json(
-                    view_type, self.game_id
+                state = await self.state
+                json_string: str = await self.payloads.get(
+                    self.game_id, state.progress, state.view
                 )
+                self.last_progress = state.progress
                 await self.send(text_data=json_string)
             except ValueError:
-                self.game_error()
+                await self.notify_owner("error")
         else:
             await self.disconnect("cannot find cookie")
 
     async def disconnect(self, close_code) -> None:
-        """Removes player from channel group upon disconnection."""
+        """
+        Removes player from channel group upon disconnection, and gives up
+        ownership of the game so that another consumer can be elected.
+        """
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
-        if getattr(self.broadcast, "has_started", False):
-            await self.broadcast.stop()
-            logger.warning(close_code)
+        if hasattr(self, "game_id"):
+            await self.store.release_owner(self.game_id, self.channel_name)
+            await self.store.remove_channel(self.game_id, self.channel_name)
 
     @async_property
-    async def game_progress(self) -> Optional[int]:
-        return await utils.get_game_progress(self.game_id)
+    async def state(self) -> GameState:
+        return await self.store.load(self.game_id)
 
     @async_property
-    async def current_view(self) -> str:
-        sequence: List[str] = self.sequence
-        progress = await self.game_progress
-        return sequence[progress]
-
-    async def game_error(self):
-        if hasattr(self, "results_sequence"):
-            self.results_sequence.cancel()
-        logger.warning("game data corrupted:")
-        logger.warning(f"players = {utils.get_players(self.game_name)}")
-        logger.warning(f"progress: {await self.game_progress}")
-        logger.warning(f"category: {await utils.get_category(self.game_id)}")
-        asyncio.create_task(self.begin_skip_round_sequence())
-
-    async def broadcast_data_for_all(self, message=False, next=None):
-        """
-        Broadcasts json and images to all members of channel group.
-        If passed no message, json is generated based on the current view type.
-        Json is sent periodically via the setIntervalAsync class.
-        The broadcast is assigned to self.broadcast and can be cancelled with self.broadcast.stop().
-        Broadcasting also times out after a given limit of broadcasts (default = 30).
-        """
-        if getattr(self.broadcast, "has_started", False):
-            await self.broadcast.stop()
-        if message:
-            progress = message["type"]
-            message = message
-        else:
-            view_type = await self.current_view
-            json_string: str = await utils.generate_round_json(
-                view_type, self.game_id, next
-            )
-            progress = await self.game_progress
-            message = {"type": "game_update", "json": json_string}
-        message["sender"] = self.player_name
-
-        async def send_json() -> None:
-            logger.info(f"{self.player_name} broadcasted: {message}")
-            await self.channel_layer.group_send(self.group_name, message)
+    async def game_progress(self) -> int:
+        return (await self.state).progress
 
-        self.broadcast = setIntervalAsync(send_json, progress)
-        await self.broadcast.start()
+    @async_property
+    async def current_view(self) -> str:
+        return (await self.state).view
 
-    async def begin_results_sequence(self):
-        """
-        Coordinates timed reel of winner view, results view, and leaderboard view.
-        Sends updated json for broadcast and mutates game data as neccessary.
-        """
-        # View 2 - Winner shown
-        await utils.advance_progress(self.game_id, "winner", self.sequence)
-        pause_time = self.wait_time * 1.5
-        next_view_time = time.time() + pause_time
-        await self.broadcast_data_for_all(next=next_view_time)
-        await asyncio.sleep(pause_time)
-        # View 3 - Results shown
-        await utils.advance_progress(self.game_id, "results", self.sequence)
-        scores: Dict[str, float] = await utils.create_average_score_dict(self.game_id)
-        await utils.update_player_points(scores, self.game_id)
-        pause_time = self.wait_time + (len(scores) / 2)
-        next_view_time = time.time() + pause_time
-        await self.broadcast_data_for_all(next=next_view_time)
-        await asyncio.sleep(pause_time)
-        # View 4 - Leaderboard shown
-        await utils.advance_progress(self.game_id, "leaderboard", self.sequence)
-        next_view_time = time.time() + pause_time
-        await self.broadcast_data_for_all(next=next_view_time)
-        await asyncio.sleep(pause_time)
-        # Go to next round or end
-        await utils.advance_progress(self.game_id, "submission", self.sequence)
-        await utils.reset_submissions_and_votes(self.game_id)
-        await self.broadcast_data_for_all()
-        finished = await utils.delete_game_if_finished(self.game_id)
-        if finished and getattr(self.broadcast, "has_started", None):
-            logger.info("closing final broadcast")
-            await asyncio.sleep(5)
-            await self.broadcast.stop()
-
-    async def begin_skip_round_sequence(self):
+    async def notify_owner(self, event: str) -> None:
         """
-        Coordinates timed reel of skip round view and the next round.
-        Sends updated json for broadcast and mutates game data as neccessary.
+        Forwards a game event to the game's owner, electing this consumer
+        if the game has no owner (e.g. the previous one disconnected).
         """
-        skip_message = {"type": "skip_round"}
-        await self.broadcast_data_for_all(skip_message)
-        await asyncio.sleep(3)
-        next_round: int = await utils.next_round(self.game_id, self.sequence)
-        await utils.change_game_progress(self.game_id, next_round)
-        await utils.reset_submissions_and_votes(self.game_id)
-        await self.broadcast_data_for_all()
-        finished = await utils.delete_game_if_finished(self.game_id)
-        if finished:
-            await asyncio.sleep(5)
-            await self.broadcast.stop()
+        progress = await self.game_progress
+        owner = await self.store.claim_owner(self.game_id, self.channel_name)
+        await self.channel_layer.send(
+            owner, {"type": "schedule", "event": event, "progress": progress}
+        )
+
+    async def schedule(self, event) -> None:
+        """Received by the owner only. Passes the game event to the scheduler."""
+        scheduler = get_round_scheduler(
+            self.game_id, self.store, self.channel_layer, self.channel_name
+        )
+        await scheduler.handle(event["event"], event["progress"])
 
     async def receive(self, text_data: str) -> None:
         """
-        Receives websocket communications from the game and handles game flow.
+        Receives websocket communications from the game and records player input
+        in the shared game state. Game flow is left to the owner's scheduler.
 
         Submission:
-            Upon a 'submission' message, this function collects all player submissions
-            (characters and one category), and adds them to the db. The final client to
-            add a submission advances the game progress, and broadcasts new game json to
-            all those in the channel group.
+            Upon a 'submission' message, this function adds the player's submission
+            (a character or the category) to the game state. The final client to
+            add a submission notifies the owner, which advances the game.
 
         Vote:
-            Same structure as submission (see above), but collects votes. Once all votes
-            are collected, the timed results sequence is initiated as a background asycio task.
-            This task is assigned to self.results_sequence so it can be cancelled if needed.
+            Same structure as submission (see above), but collects votes. Once all
+            votes are collected the owner starts the timed results sequence.
 
         Category:
-            Only used in boring mode. The category is added to the db, game progress is
-            advanced, and new game json is broadcasted.
+            Only used in boring mode. The category is added to the game state and
+            the owner advances the game.
 
         Force Next:
-            Upon a 'force_next' message, this function checks whether there are enough
-            submissions to continue as normal, and if so, advances the game progress and
-            calls the broadcasting function, or starts the results sequence if appropriate.
-            If there is not enough data, or if data processing fails during the results
-            sequence, or if the results sequence is in progress, the function begins the
-            skip-round sequence as a background asyncio task.
+            Upon a 'force_next' message, the owner continues the game if there is
+            enough data, otherwise it skips the round.
+
+        Ack:
+            Sent by the client once it has rendered the game json for a given
+            progress, so the owner stops re-sending it to this channel.
+
+        Autocomplete:
+            Sent as the player types a category or character. Answered straight
+            away with suggestions for the prefix (see AutocompleteService), and
+            neither logged nor acknowledged.
+
+        Client messages carry an 'id' (idempotency key) and are acknowledged
+        with {ack: id} once handled, so the client stops re-sending them.
+        Re-sent duplicates are acknowledged again but otherwise dropped. The id
+        is recorded before handling, so a resend arriving meanwhile is dropped,
+        and forgotten if handling fails, so the client's resend is handled.
         """
         text_data_json: dict = json.loads(text_data)
+        if "ack" in text_data_json:
+            progress = text_data_json["ack"]
+            # ignore malformed acks rather than letting them close the socket
+            if isinstance(progress, int) and not isinstance(progress, bool):
+                await self.store.record_ack(self.game_id, self.channel_name, progress)
+            return
+        if "autocomplete" in text_data_json:
+            await self.send_suggestions(text_data_json["autocomplete"])
+            return
+        message_id: Optional[str] = text_data_json.get("id")
+        if message_id:
+            if not await self.store.mark_message(self.game_id, message_id):
+                await self.send(text_data=json.dumps({"ack": message_id}))
+                return
         logger.info(f"received message: {text_data_json}")
+        try:
+            await self.handle_message(text_data_json, text_data)
+        except Exception:
+            if message_id:
+                await self.store.unmark_message(self.game_id, message_id)
+            raise
+        if message_id:
+            await self.send(text_data=json.dumps({"ack": message_id}))
+
+    async def handle_message(self, text_data_json: dict, text_data: str) -> None:
+        """Records a submission, vote or category, or forwards a force_next."""
         latter_views = ["vote", "winner", "results", "leaderboard"]
         view = await self.current_view
 
@@ -289,24 +286,11 @@ class GameConsumer(AsyncWebsocketConsumer):
             name: Optional[str] = submission_data["name"]
             if not submission or not name:
                 return
-            to_voting: bool = await utils.collected_and_added_all_input_data(
-                player_name=name,
-                field="submission",
-                data=submission,
-                game_id=self.game_id,
+            to_voting: bool = await self.store.add_input(
+                self.game_id, name, "submission", submission
             )
-            # broadcasting stops after successful submission
-            if getattr(self.broadcast, "has_started", None):
-                await self.broadcast.stop()
             if to_voting:
-                if not await utils.enough_submissions(self.game_id):
-                    self.game_error()
-                    return
-                await utils.advance_progress(self.game_id, "vote", self.sequence)
-                try:
-                    await self.broadcast_data_for_all()
-                except ValueError:
-                    self.game_error()
+                await self.notify_owner("submissions")
 
         elif text_data_json.get("vote"):
             if view != "vote":
@@ -319,23 +303,11 @@ class GameConsumer(AsyncWebsocketConsumer):
             player_name = vote_data["name"]
             if not player_name:
                 return
-            to_results_sequence: bool = await utils.collected_and_added_all_input_data(
-                player_name=player_name,
-                field="votes",
-                data=text_data,
-                game_id=self.game_id,
+            to_results_sequence: bool = await self.store.add_input(
+                self.game_id, player_name, "votes", text_data
             )
-            if getattr(self.broadcast, "has_started", None):
-                await self.broadcast.stop()
-            if to_results_sequence and view == "vote":
-                if not await utils.enough_votes(self.game_id):
-                    self.game_error()
-                try:
-                    self.results_sequence = asyncio.create_task(
-                        self.begin_results_sequence()
-                    )
-                except ValueError:
-                    self.game_error()
+            if to_results_sequence:
+                await self.notify_owner("votes")
 
         elif text_data_json.get("category"):
             wrong_views = latter_views.copy()
@@ -345,64 +317,37 @@ class GameConsumer(AsyncWebsocketConsumer):
             data: Optional[Dict[str, str]] = text_data_json.get("category")
             if not data:
                 return  # redundant but keeps mypy happy
-            await utils.add_category(self.game_id, data["name"], data["text"])
-            await utils.advance_progress(self.game_id, "character", self.sequence)
-            await self.broadcast_data_for_all()
+            await self.store.add_category(self.game_id, data["name"], data["text"])
+            await self.notify_owner("category")
 
         elif text_data_json.get("force_next"):
-            if view == "vote" and await utils.enough_votes(self.game_id):
-                try:
-                    self.results_sequence = asyncio.create_task(
-                        self.begin_results_sequence()
-                    )
-                except ValueError:
-                    self.game_error()
-            elif view not in latter_views and await utils.enough_submissions(
-                self.game_id
-            ):
-                await utils.advance_progress(self.game_id, "vote", self.sequence)
-                try:
-                    await self.broadcast_data_for_all()
-                except ValueError:
-                    self.game_error()
-            else:
-                asyncio.create_task(self.begin_skip_round_sequence())
+            await self.notify_owner("force_next")
+
+    async def send_suggestions(self, request: Dict[str, str]) -> None:
+        """Sends suggestions for a prefix of the given kind to the client."""
+        kind = request.get("kind")
+        if kind not in KINDS:
+            return
+        service = get_autocomplete()
+        if service.stale:
+            await database_sync_to_async(service.refresh_if_stale)()
+        prefix = str(request.get("prefix", ""))[:100]
+        suggestions = service.suggest(prefix, kind)
+        await self.send(
+            text_data=json.dumps({"suggestions": suggestions, "prefix": prefix})
+        )
 
     async def game_update(self, event) -> None:
         """
-        If the current player is broadcasting and receives another player's
-        broadcast, it checks if this broadcast represents a higher progress value,
-        and if so, cancels the lower-progress broadcast and results sequence task
-        if present. If both broadcasts represent the same information, the sender
-        with the 'biggest' name continues to broadcast (name are unique). If either
-        of these conditions succeed, game data is subsequently sent to the client.
-        If the broadcast is behind the current progress, no action is taken.
+        Sends game json broadcast by the owner to the client. Broadcasts that
+        are behind the progress already sent (e.g. from a previous owner that
+        has not yet stopped) are ignored.
         """
-        if getattr(self.broadcast, "has_started", None):
-            new_progress = json.loads(event["json"])["progress"]
-            logger.info(f"{self.player_name} received {new_progress}")
-            logger.info(f"{self.player_name} is {self.broadcast.progress}")
-            if self.broadcast.progress < new_progress:
-                await self.broadcast.stop()
-                if hasattr(self, "results_sequence"):
-                    self.results_sequence.cancel()
-            elif self.broadcast.progress > new_progress:
-                return
-            elif self.broadcast.progress == new_progress:
-                if event["sender"] > self.player_name:
-                    await self.broadcast.stop()
-                    if hasattr(self, "results_sequence"):
-                        self.results_sequence.cancel()
+        if event["progress"] < self.last_progress:
+            return
+        self.last_progress = event["progress"]
         await self.send(text_data=event["json"])
 
     async def skip_round(self, event) -> None:
-        """
-        Cancels any in-progress results sequence, and any broadcast that is
-        not 'skip_round'. Sends skip message to client.
-        """
-        if hasattr(self, "results_sequence"):
-            self.results_sequence.cancel()
-        if getattr(self.broadcast, "has_started", None):
-            if self.broadcast.progress != "skip_round":
-                await self.broadcast.stop()
+        """Sends skip message to client."""
         await self.send(text_data=json.dumps({"view": "skip"}))
@@ -0,0 +1,112 @@
+"""
+Hands out names for new games (e.g. panda_button). The word list is read
+once per process and shuffled into a pool that is walked round robin, so
+each name costs one indexed lookup of Game.name rather than a scan of every
+game. Names handed out are reserved for a while, so two hosts opening the
+host page at once are not offered the same name. Once too many candidates
+in a row are taken, names are compounded with a second word instead.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional
+from basicgame.models import Game
+
+WORD_IDS = Path(__file__).resolve().parent / "resources" / "word-ids.txt"
+
+
+def game_exists(name: str) -> bool:
+    return Game.objects.filter(name=name).exists()
+
+
+class NameAllocator:
+
+    """
+    Round robin pool of game names with expiring reservations.
+    is_taken is called with each candidate to check it is not in use by a
+    live game; reserved names are skipped until their reservation expires.
+    """
+
+    def __init__(
+        self,
+        words: List[str],
+        is_taken: Callable[[str], bool] = game_exists,
+        reservation: float = 600,
+        attempts: int = 8,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.rng = rng or random.Random()
+        self.words = list(dict.fromkeys(word for word in words if word))
+        self.rng.shuffle(self.words)
+        self.is_taken = is_taken
+        self.reservation = reservation
+        self.attempts = attempts
+        self._cursor = 0
+        self._reserved: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allocate(self) -> str:
+        """
+        Returns a free game name and reserves it. Tries the next names in
+        the pool, then compound names once the pool is running low. Raises
+        RuntimeError if no free name is found, or the pool is empty.
+        """
+        with self._lock:
+            self._expire()
+            for _ in range(min(self.attempts, len(self.words))):
+                name = self.words[self._cursor]
+                self._cursor = (self._cursor + 1) % len(self.words)
+                if self._available(name):
+                    return self._reserve(name)
+            for _ in range(self.attempts):
+                name = self.compound_name()
+                if self._available(name):
+                    return self._reserve(name)
+        raise RuntimeError("no free game names")
+
+    def compound_name(self) -> str:
+        """
+        Joins a name with the last word of another (panda_button_dance).
+        Raises RuntimeError if the pool is empty.
+        """
+        if not self.words:
+            raise RuntimeError("no game names to choose from")
+        first, second = self.rng.choice(self.words), self.rng.choice(self.words)
+        return f"{first}_{second.split('_')[-1]}"
+
+    def release(self, name: str) -> None:
+        """Drops the reservation of a name, once its game has been created."""
+        with self._lock:
+            self._reserved.pop(name, None)
+
+    def _available(self, name: str) -> bool:
+        return name not in self._reserved and not self.is_taken(name)
+
+    def _reserve(self, name: str) -> str:
+        self._reserved[name] = time.monotonic() + self.reservation
+        return name
+
+    def _expire(self) -> None:
+        """Drops expired reservations, which are in order of expiry."""
+        now = time.monotonic()
+        while self._reserved:
+            name, expiry = next(iter(self._reserved.items()))
+            if expiry > now:
+                break
+            del self._reserved[name]
+
+
+_allocator: Optional[NameAllocator] = None
+
+
+def get_name_allocator() -> NameAllocator:
+    """Returns this process's name allocator, loading the word list once."""
+    global _allocator
+    if _allocator is None:
+        with open(WORD_IDS) as fhand:
+            words = [line.strip() for line in fhand]
+        _allocator = NameAllocator(words)
+    return _allocator
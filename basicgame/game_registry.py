@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from channels.db import database_sync_to_async  # type: ignore
+from basicgame.models import Game, Player
+from basicgame.game_sequence import GameSequence, get_game_sequence
+
+"""
+Per-process registry of the data that does not change during a game
+(id, host, cycles, mode) plus its player roster. Consumers of a game on
+the same worker share one entry instead of querying the db on connect.
+Entries are evicted least recently used first, and invalidated when a
+game is deleted (see utils.delete_game_if_finished).
+"""
+
+
+class GameInfo:
+
+    """Immutable details of a game, and its current roster of players."""
+
+    def __init__(
+        self,
+        game_id: int,
+        name: str,
+        host: str,
+        cycles: int,
+        boring: bool,
+        players: Tuple[str, ...],
+    ) -> None:
+        self.game_id = game_id
+        self.name = name
+        self.host = host
+        self.cycles = cycles
+        self.boring = boring
+        self.players = players
+
+    @property
+    def sequence(self) -> GameSequence:
+        return get_game_sequence(self.players, self.cycles, self.boring)
+
+
+class GameRegistry:
+
+    """
+    LRU cache of GameInfo, keyed by game name. Game names are reused once
+    a game is deleted, so callers that find an entry pointing at a deleted
+    game should call get with refresh=True.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self._games: "OrderedDict[str, GameInfo]" = OrderedDict()
+        self._names: Dict[int, str] = {}
+
+    async def get(self, game_name: str, refresh: bool = False) -> GameInfo:
+        """
+        Returns the details of the named game, reading them from the db if
+        they are not cached (or refresh is True).
+        Raises Game.DoesNotExist if there is no such game.
+        """
+        info = self._games.get(game_name)
+        if info is None or refresh:
+            info = await self._load(game_name)
+            self.invalidate(game_name=game_name)
+            self._games[game_name] = info
+            self._names[info.game_id] = game_name
+            while len(self._games) > self.maxsize:
+                _, evicted = self._games.popitem(last=False)
+                self._names.pop(evicted.game_id, None)
+        self._games.move_to_end(game_name)
+        return info
+
+    def get_cached(self, game_id: int) -> Optional[GameInfo]:
+        """Returns the cached details of a game by id, without touching the db."""
+        game_name = self._names.get(game_id)
+        return self._games.get(game_name) if game_name else None
+
+    @database_sync_to_async
+    def _load(self, game_name: str) -> GameInfo:
+        game = Game.objects.get(name=game_name)
+        players = Player.objects.filter(game_id=game.pk).values_list("name", flat=True)
+        return GameInfo(
+            game_id=game.pk,
+            name=game.name,
+            host=game.host,
+            cycles=game.cycles,
+            boring=game.boring,
+            players=tuple(players),
+        )
+
+    def add_player(self, game_id: int, player_name: str) -> bool:
+        """
+        Adds a player to the cached roster of a game, if cached.
+        Returns True if the player was not already in the roster.
+        """
+        info = self.get_cached(game_id)
+        if info and player_name not in info.players:
+            info.players = info.players + (player_name,)
+            return True
+        return False
+
+    def remove_player(self, game_id: int, player_name: str) -> None:
+        """Removes a player from the cached roster of a game, if cached."""
+        info = self.get_cached(game_id)
+        if info:
+            info.players = tuple(name for name in info.players if name != player_name)
+
+    def invalidate(
+        self, game_id: Optional[int] = None, game_name: Optional[str] = None
+    ) -> None:
+        """Drops a game's entry, by id or by name."""
+        if game_id is not None:
+            game_name = self._names.get(game_id, game_name)
+        if game_name is None:
+            return
+        info = self._games.pop(game_name, None)
+        if info:
+            self._names.pop(info.game_id, None)
+
+
+_registry: Optional[GameRegistry] = None
+
+
+def get_game_registry() -> GameRegistry:
+    """Returns this process's game registry."""
+    global _registry
+    if _registry is None:
+        _registry = GameRegistry()
+    return _registry
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+"""
+The structure of a game: a lobby, then a round of views for each player
+in turn, repeated for the number of cycles, then a finishing view. Views
+are computed from the progress index rather than stored, so a sequence
+costs the same to hold whatever the length of the game.
+"""
+
+
+class GameSequence:
+
+    """
+    Computes the view at any point of a game from its players, cycles and
+    mode. Behaves like the list built by utils.build_game_sequence
+    (supports len() and indexing), without materializing it.
+
+    Normal rounds are: player, vote, winner, results, leaderboard.
+    Boring rounds are: boring_<player>, character, vote, winner, results,
+    leaderboard.
+    """
+
+    round_views = ["vote", "winner", "results", "leaderboard"]
+    latter_views = ["character", "vote", "winner", "results", "leaderboard"]
+
+    def __init__(self, players: Tuple[str, ...], cycles: int, boring: bool) -> None:
+        self.players = tuple(players)
+        self.cycles = cycles
+        self.boring = boring
+        self.views_per_round: int = 6 if boring else 5
+        # includes the lobby, but not the finishing view
+        self.total_views: int = 1 + cycles * len(self.players) * self.views_per_round
+
+    def __len__(self) -> int:
+        return self.total_views + 1
+
+    def __getitem__(self, progress: int) -> str:
+        return self.view_at(progress)
+
+    def view_at(self, progress: int) -> str:
+        """
+        Takes a progress index, returns the name of the view at that point.
+        Raises IndexError beyond the finishing view.
+        """
+        if progress < 0 or progress > self.total_views:
+            raise IndexError("game sequence index out of range")
+        if progress == 0:
+            return "lobby"
+        if progress == self.total_views:
+            return "finish"
+        round_index, offset = divmod(progress - 1, self.views_per_round)
+        player = self.players[round_index % len(self.players)]
+        if self.boring:
+            if offset == 0:
+                return f"boring_{player}"
+            if offset == 1:
+                return "character"
+            return self.round_views[offset - 2]
+        if offset == 0:
+            return player
+        return self.round_views[offset - 1]
+
+    def next_round_index(self, progress: int) -> Optional[int]:
+        """
+        Takes a progress index, returns the index of the next submission
+        view, or of the finishing view. Returns None once the game is over.
+        """
+        if progress >= self.total_views:
+            return None
+        if progress < 1:
+            next_start = 1
+        else:
+            next_start = 1 + ((progress - 1) // self.views_per_round + 1) * (
+                self.views_per_round
+            )
+        return min(next_start, self.total_views)
+
+    def to_list(self) -> List[str]:
+        """Returns every view of the game as a list."""
+        return [self.view_at(progress) for progress in range(len(self))]
+
+
+@lru_cache(maxsize=1024)
+def get_game_sequence(
+    players: Tuple[str, ...], cycles: int, boring: bool
+) -> GameSequence:
+    """
+    Returns the sequence for the given players, cycles and mode. Sequences
+    are immutable, so one instance is shared by every consumer of a game.
+    """
+    return GameSequence(players, cycles, boring)
@@ -0,0 +1,727 @@
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Set
+from channels.db import database_sync_to_async  # type: ignore
+from django.conf import settings
+from django.db import transaction
+from basicgame.models import Game, Player, normalize_submission
+from basicgame import utils
+from basicgame.game_sequence import GameSequence, get_game_sequence
+
+"""
+State engine for live games. Consumers read and mutate games through a
+game store without touching the db, and changes are written through to
+the db at round boundaries via GameState.flush, each input once.
+LocalGameStore keeps games in process memory, RedisGameStore shares them
+between worker processes.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class GameState:
+
+    """
+    Authoritative in-process record of a single live game.
+
+    Holds progress, sequence, players, submissions, votes and points.
+    All mutating methods are synchronous, so they run atomically on
+    the event loop and can be shared by every consumer of the game.
+
+    This round's inputs are indexed as they arrive: the number of players
+    per normalized submission (see models.normalize_submission), and the
+    players yet to submit or vote. add_input then finds duplicates and
+    whether the round is complete without scanning every player.
+    """
+
+    def __init__(
+        self,
+        game_id: int,
+        name: str,
+        cycles: int,
+        boring: bool,
+        progress: int,
+        players: List[str],
+        points: Optional[Dict[str, int]] = None,
+        submissions: Optional[Dict[str, Optional[str]]] = None,
+        votes: Optional[Dict[str, Optional[str]]] = None,
+    ) -> None:
+        self.game_id = game_id
+        self.name = name
+        self.cycles = cycles
+        self.boring = boring
+        self.progress = progress
+        self.players: List[str] = list(players)
+        self.points: Dict[str, int] = {player: 0 for player in self.players}
+        self.points.update(points or {})
+        self.submissions: Dict[str, Optional[str]] = {
+            player: None for player in self.players
+        }
+        self.submissions.update(submissions or {})
+        self.votes: Dict[str, Optional[str]] = {player: None for player in self.players}
+        self.votes.update(votes or {})
+        # this round's index of inputs (see above)
+        self.submission_counts: Dict[str, int] = {}
+        self.missing: Dict[str, Set[str]] = {"submission": set(), "votes": set()}
+        for player in self.players:
+            self._count_submission(self.submissions[player], 1)
+            if self.submissions[player] is None:
+                self.missing["submission"].add(player)
+            if self.votes[player] is None:
+                self.missing["votes"].add(player)
+        self.sequence: GameSequence = get_game_sequence(
+            tuple(self.players), self.cycles, self.boring
+        )
+
+    @property
+    def view(self) -> str:
+        return self.sequence.view_at(self.progress)
+
+    def add_player(self, player_name: str) -> None:
+        """
+        Adds a player to the game if not already present.
+        The game sequence is rebuilt to include the new player.
+        """
+        if player_name in self.players:
+            return
+        self.players.append(player_name)
+        self.points[player_name] = 0
+        self.submissions[player_name] = None
+        self.votes[player_name] = None
+        self.missing["submission"].add(player_name)
+        self.missing["votes"].add(player_name)
+        self.sequence = get_game_sequence(tuple(self.players), self.cycles, self.boring)
+
+    def add_input(self, player_name: str, field: str, data: str) -> bool:
+        """
+        Takes a players name, the field to be populated ('submission' or 'votes')
+        and data. Stores data against the player, adding a * for each other
+        player who submitted the same normalized text. Returns True once all
+        players have submitted data.
+        """
+        if field == "submission":
+            # the player's previous submission is not a duplicate of this one
+            self._count_submission(self.submissions.get(player_name), -1)
+            data += "*" * self.submission_counts.get(normalize_submission(data), 0)
+            self._count_submission(data, 1)
+        inputs = self.submissions if field == "submission" else self.votes
+        inputs[player_name] = data
+        self.missing[field].discard(player_name)
+        return not self.missing[field]
+
+    def add_category(self, player_name: str, category: str) -> None:
+        """Adds category as the given player's submission (boring mode)."""
+        self._count_submission(self.submissions.get(player_name), -1)
+        self.submissions[player_name] = category
+        self._count_submission(category, 1)
+        self.missing["submission"].discard(player_name)
+
+    def _count_submission(self, submission: Optional[str], step: int) -> None:
+        """Adds step to the count of players with this normalized submission."""
+        if not submission:
+            return
+        normalized = normalize_submission(submission)
+        count = self.submission_counts.get(normalized, 0) + step
+        if count:
+            self.submission_counts[normalized] = count
+        else:
+            del self.submission_counts[normalized]
+
+    @property
+    def category(self) -> Optional[str]:
+        """Returns the category for this round without its underscore prefix."""
+        for submission in self.submissions.values():
+            if submission and submission.startswith("_"):
+                return submission[1:]
+        return None
+
+    @property
+    def character_list(self) -> List[str]:
+        """Returns a list of characters submitted in the submission round."""
+        return [
+            submission
+            for submission in self.submissions.values()
+            if submission and not submission.startswith("_")
+        ]
+
+    @property
+    def enough_submissions(self) -> bool:
+        """True if both the category and at least one character are present."""
+        return self.category is not None and len(self.character_list) > 0
+
+    @property
+    def enough_votes(self) -> bool:
+        """True if any votes have been submitted."""
+        return any(self.votes.values())
+
+    def average_scores(self) -> Dict[str, int]:
+        """Returns a dictionary of characters and their average integer score."""
+        return utils.average_scores_from_votes(
+            [votes for votes in self.votes.values() if votes]
+        )
+
+    def apply_points(self, points: Dict[str, int]) -> None:
+        """
+        Takes the points earned this round by player name (see
+        RoundResult.points), and adds them to the players' points.
+        """
+        for player, earned in points.items():
+            if player in self.points:
+                self.points[player] += earned
+
+    def reset_round(self) -> None:
+        """Sets submissions and votes of all players to None."""
+        for player in self.players:
+            self.submissions[player] = None
+            self.votes[player] = None
+        self.submission_counts.clear()
+        self.missing = {"submission": set(self.players), "votes": set(self.players)}
+
+    def advance(self, view: str) -> int:
+        """
+        Increments progress if the given view is next in the game sequence.
+        'submission' matches any view that starts a new round. If this view
+        is already reached, or is not next in line, nothing changes.
+        Returns the (possibly unchanged) progress.
+        """
+        if self.progress + 1 >= len(self.sequence):
+            return self.progress
+        next_view = self.sequence.view_at(self.progress + 1)
+        if view == "submission":
+            if not next_view in GameSequence.latter_views:
+                self.progress += 1
+        elif view == next_view:
+            self.progress += 1
+        return self.progress
+
+    def next_round(self) -> Optional[int]:
+        """Returns the index of the next submission or finishing view."""
+        return self.sequence.next_round_index(self.progress)
+
+    async def flush(self, points: Optional[Dict[str, int]] = None) -> None:
+        """Runs write_through in a thread."""
+        await database_sync_to_async(self.write_through)(points)
+
+    def write_through(self, points: Optional[Dict[str, int]] = None) -> None:
+        """
+        Writes the game through to the db at a round boundary, in a single
+        transaction. Progress is always written; the round's inputs are
+        written once, as the view that closes them is reached:
+        1. character / vote: submissions, and this round's Submission rows.
+        2. winner: votes, and this round's Vote rows.
+        3. results: points, the points earned this round by player name.
+        4. submission (a new round) and finish: submissions and votes are
+        cleared with a single UPDATE.
+        The leaderboard only writes progress.
+        """
+        view = self.view
+        with transaction.atomic():
+            # progress only moves forward, so a stale writer cannot undo it
+            Game.objects.filter(pk=self.game_id, progress__lte=self.progress).update(
+                progress=self.progress
+            )
+            if view in ("character", "vote"):
+                self.save_inputs("submission")
+            elif view == "winner":
+                self.save_inputs("votes")
+            elif view == "results":
+                utils.add_player_points(self.game_id, points or {})
+            elif view not in GameSequence.latter_views:
+                utils.reset_submissions_and_votes(self.game_id)
+
+    def save_inputs(self, field: str) -> None:
+        """
+        Takes the field closed this round ('submission' or 'votes'), writes it
+        to the Player table with one UPDATE, then mirrors it into the
+        Submission or Vote table.
+        """
+        inputs = self.submissions if field == "submission" else self.votes
+        players = [
+            player
+            for player in Player.objects.filter(game_id=self.game_id)
+            if player.name in inputs
+        ]
+        for player in players:
+            setattr(player, field, inputs[player.name])
+        Player.objects.bulk_update(players, [field])
+        game = Game(
+            pk=self.game_id,
+            name=self.name,
+            cycles=self.cycles,
+            boring=self.boring,
+            progress=self.progress,
+        )
+        if field == "submission":
+            utils.save_round_submissions(game, players)
+        else:
+            utils.save_round_votes(game, players)
+
+    @classmethod
+    def from_db(cls, game_id: int) -> "GameState":
+        """Builds a GameState from the Game and Player tables."""
+        game = Game.objects.get(pk=game_id)
+        players = list(Player.objects.filter(game_id=game_id))
+        return cls(
+            game_id=game.pk,
+            name=game.name,
+            cycles=game.cycles,
+            boring=game.boring,
+            progress=game.progress,
+            players=[player.name for player in players],
+            points={player.name: player.points for player in players},
+            submissions={player.name: player.submission for player in players},
+            votes={player.name: player.votes for player in players},
+        )
+
+
+class LocalGameStore:
+
+    """
+    Keeps one live GameState per game in process memory. Fastest option,
+    but only correct when every consumer of a game runs in the same
+    worker process. Only the latest max_message_ids idempotency keys of
+    each game are kept, as resends follow their message within seconds.
+
+    Transitions need no locking: after loading the GameState, each method
+    reads and writes it without awaiting, so it cannot interleave with
+    another consumer's call. advance and change_progress(expected=...) are
+    therefore compare-and-set, reporting True to exactly one caller. This
+    assumes every consumer of the game runs on the same event loop, as they
+    do within one daphne worker; it does not hold across threads.
+    """
+
+    def __init__(self, max_message_ids: int = 1000) -> None:
+        self.max_message_ids = max_message_ids
+        self._states: Dict[int, GameState] = {}
+        self._owners: Dict[int, str] = {}
+        self._acks: Dict[int, Dict[str, int]] = {}
+        # game id -> idempotency keys, oldest first
+        self._message_ids: Dict[int, OrderedDict[str, None]] = {}
+
+    async def load(self, game_id: int) -> GameState:
+        """
+        Returns the live GameState for the given game, loading it from
+        the db the first time any consumer in this process asks for it.
+        """
+        state = self._states.get(game_id)
+        if state is None:
+            loaded = await database_sync_to_async(GameState.from_db)(game_id)
+            # another consumer may have loaded the game while we awaited
+            state = self._states.setdefault(game_id, loaded)
+        return state
+
+    async def add_player(self, game_id: int, player_name: str) -> None:
+        (await self.load(game_id)).add_player(player_name)
+
+    async def add_input(
+        self, game_id: int, player_name: str, field: str, data: str
+    ) -> bool:
+        return (await self.load(game_id)).add_input(player_name, field, data)
+
+    async def add_category(self, game_id: int, player_name: str, category: str) -> None:
+        (await self.load(game_id)).add_category(player_name, category)
+
+    async def advance(self, game_id: int, view: str) -> bool:
+        state = await self.load(game_id)
+        current = state.progress
+        return state.advance(view) != current
+
+    async def change_progress(
+        self, game_id: int, progress: int, expected: Optional[int] = None
+    ) -> bool:
+        state = await self.load(game_id)
+        if expected is not None and state.progress != expected:
+            return False
+        state.progress = progress
+        return True
+
+    async def apply_points(self, game_id: int, points: Dict[str, int]) -> None:
+        (await self.load(game_id)).apply_points(points)
+
+    async def reset_round(self, game_id: int) -> None:
+        (await self.load(game_id)).reset_round()
+
+    async def flush(
+        self, game_id: int, points: Optional[Dict[str, int]] = None
+    ) -> None:
+        await (await self.load(game_id)).flush(points)
+
+    async def claim_owner(self, game_id: int, candidate: str, ttl: int = 60) -> str:
+        """
+        Elects the candidate (a consumer's channel name) as the game's owner
+        if it has none. Returns the channel name of the current owner.
+        """
+        return self._owners.setdefault(game_id, candidate)
+
+    async def release_owner(self, game_id: int, candidate: str) -> None:
+        """Gives up ownership of the game if held by the candidate."""
+        if self._owners.get(game_id) == candidate:
+            del self._owners[game_id]
+
+    async def record_ack(self, game_id: int, channel: str, progress: int) -> None:
+        """Records that the client on the given channel has rendered progress."""
+        acks = self._acks.setdefault(game_id, {})
+        acks[channel] = max(progress, acks.get(channel, -1))
+
+    async def remove_channel(self, game_id: int, channel: str) -> None:
+        self._acks.get(game_id, {}).pop(channel, None)
+
+    async def unacked_channels(self, game_id: int, progress: int) -> List[str]:
+        """Returns the channels that have not yet acknowledged progress."""
+        return [
+            channel
+            for channel, acked in self._acks.get(game_id, {}).items()
+            if acked < progress
+        ]
+
+    async def mark_message(self, game_id: int, message_id: str) -> bool:
+        """
+        Records a client message's idempotency key. Returns False if the
+        message has been seen before, i.e. it is a resend.
+        """
+        seen = self._message_ids.setdefault(game_id, OrderedDict())
+        if message_id in seen:
+            return False
+        seen[message_id] = None
+        if len(seen) > self.max_message_ids:
+            seen.popitem(last=False)
+        return True
+
+    async def unmark_message(self, game_id: int, message_id: str) -> None:
+        """Forgets an idempotency key, so that a resend is handled again."""
+        self._message_ids.get(game_id, {}).pop(message_id, None)
+
+    async def discard(self, game_id: int) -> None:
+        """Forgets the GameState of a finished or deleted game."""
+        self._states.pop(game_id, None)
+        self._owners.pop(game_id, None)
+        self._acks.pop(game_id, None)
+        self._message_ids.pop(game_id, None)
+
+
+# Lua scripts run atomically on the redis server, so concurrent
+# consumers on different workers cannot interleave their updates.
+
+SEED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], 'name', ARGV[2], 'cycles', ARGV[3],
+           'boring', ARGV[4], 'progress', ARGV[5])
+for i = 6, #ARGV, 4 do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+    redis.call('HSET', KEYS[3], ARGV[i], ARGV[i + 1])
+    if ARGV[i + 2] ~= '' then redis.call('HSET', KEYS[4], ARGV[i], ARGV[i + 2]) end
+    if ARGV[i + 3] ~= '' then redis.call('HSET', KEYS[5], ARGV[i], ARGV[i + 3]) end
+end
+for i = 1, #KEYS do redis.call('EXPIRE', KEYS[i], ARGV[1]) end
+return 1
+"""
+
+ADD_PLAYER_SCRIPT = """
+local players = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, player in ipairs(players) do
+    if player == ARGV[1] then return 0 end
+end
+redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('HSETNX', KEYS[2], ARGV[1], 0)
+for i = 1, #KEYS do redis.call('EXPIRE', KEYS[i], ARGV[2]) end
+return 1
+"""
+
+ADD_INPUT_SCRIPT = """
+local data = ARGV[2]
+if ARGV[3] == '1' then
+    local normalized = string.gsub(data, '%*+$', '')
+    local submissions = redis.call('HGETALL', KEYS[3])
+    for i = 1, #submissions, 2 do
+        local submission = string.gsub(submissions[i + 1], '%*+$', '')
+        if submissions[i] ~= ARGV[1] and submission == normalized then
+            data = data .. '*'
+        end
+    end
+end
+redis.call('HSET', KEYS[2], ARGV[1], data)
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+local players = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, player in ipairs(players) do
+    if redis.call('HEXISTS', KEYS[2], player) == 0 then return 0 end
+end
+return 1
+"""
+
+COMPARE_AND_SET_PROGRESS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'progress') == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'progress', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+CLAIM_OWNER_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return ARGV[1]
+end
+if owner == ARGV[1] then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+return owner
+"""
+
+RELEASE_OWNER_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+RECORD_ACK_SCRIPT = """
+local acked = redis.call('HGET', KEYS[1], ARGV[1])
+if not acked or tonumber(ARGV[2]) > tonumber(acked) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisGameStore:
+
+    """
+    Keeps each live game in redis hashes so that any daphne worker can
+    serve any player. Keys (prefixed by 'game:{game_id}:'):
+
+    meta: hash of name, cycles, boring and progress.
+    players: list of player names in joining order.
+    points / submissions / votes: hashes keyed by player name.
+    owner: channel name of the consumer elected to run the game, which
+    expires unless the owner keeps claiming it.
+    acks: hash of channel name to the last progress its client acknowledged.
+    messages: set of idempotency keys of client messages already handled.
+
+    Reads are pipelined into a single round trip, and every transition
+    is a Lua script or MULTI block so it applies atomically. Every write
+    re-applies the game's ttl to the keys it touches, so the keys of an
+    abandoned game expire together, including those recreated after
+    reset_round deletes them.
+    """
+
+    fields = ["meta", "players", "points", "submissions", "votes"]
+
+    def __init__(self, client, ttl: int = 60 * 60 * 24) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._seed = client.register_script(SEED_SCRIPT)
+        self._add_player = client.register_script(ADD_PLAYER_SCRIPT)
+        self._add_input = client.register_script(ADD_INPUT_SCRIPT)
+        self._compare_and_set = client.register_script(COMPARE_AND_SET_PROGRESS_SCRIPT)
+        self._claim_owner = client.register_script(CLAIM_OWNER_SCRIPT)
+        self._release_owner = client.register_script(RELEASE_OWNER_SCRIPT)
+        self._record_ack = client.register_script(RECORD_ACK_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisGameStore":
+        from redis import asyncio as aioredis  # type: ignore
+
+        return cls(aioredis.from_url(url, decode_responses=True))
+
+    def keys(self, game_id: int) -> Dict[str, str]:
+        keys = {field: f"game:{game_id}:{field}" for field in self.fields}
+        keys["owner"] = f"game:{game_id}:owner"
+        keys["acks"] = f"game:{game_id}:acks"
+        keys["messages"] = f"game:{game_id}:messages"
+        return keys
+
+    async def _read(self, game_id: int) -> Optional[GameState]:
+        keys = self.keys(game_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(keys["meta"])
+        pipe.lrange(keys["players"], 0, -1)
+        pipe.hgetall(keys["points"])
+        pipe.hgetall(keys["submissions"])
+        pipe.hgetall(keys["votes"])
+        meta, players, points, submissions, votes = await pipe.execute()
+        if not meta:
+            return None
+        return GameState(
+            game_id=game_id,
+            name=meta["name"],
+            cycles=int(meta["cycles"]),
+            boring=meta["boring"] == "1",
+            progress=int(meta["progress"]),
+            players=players,
+            points={player: int(value) for player, value in points.items()},
+            submissions=submissions,
+            votes=votes,
+        )
+
+    async def _seed_from_db(self, game_id: int) -> None:
+        state = await database_sync_to_async(GameState.from_db)(game_id)
+        args: List = [
+            self.ttl,
+            state.name,
+            state.cycles,
+            int(state.boring),
+            state.progress,
+        ]
+        for player in state.players:
+            args.extend(
+                [
+                    player,
+                    state.points[player],
+                    state.submissions[player] or "",
+                    state.votes[player] or "",
+                ]
+            )
+        keys = self.keys(game_id)
+        await self._seed(keys=[keys[field] for field in self.fields], args=args)
+
+    async def load(self, game_id: int) -> GameState:
+        """
+        Returns a snapshot of the game read in one pipelined round trip.
+        The game is seeded from the db if it is not yet in redis.
+        """
+        state = await self._read(game_id)
+        if state is None:
+            await self._seed_from_db(game_id)
+            state = await self._read(game_id)
+        return state
+
+    async def add_player(self, game_id: int, player_name: str) -> None:
+        await self.load(game_id)
+        keys = self.keys(game_id)
+        # the script writes the first two keys and re-applies the ttl to all
+        order = ["players", "points", "meta", "submissions", "votes"]
+        await self._add_player(
+            keys=[keys[field] for field in order], args=[player_name, self.ttl]
+        )
+
+    async def add_input(
+        self, game_id: int, player_name: str, field: str, data: str
+    ) -> bool:
+        await self.load(game_id)
+        keys = self.keys(game_id)
+        target = "submissions" if field == "submission" else "votes"
+        completed = await self._add_input(
+            keys=[keys["players"], keys[target], keys["submissions"]],
+            args=[player_name, data, int(field == "submission"), self.ttl],
+        )
+        return bool(completed)
+
+    async def add_category(self, game_id: int, player_name: str, category: str) -> None:
+        key = self.keys(game_id)["submissions"]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(key, player_name, category)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def advance(self, game_id: int, view: str) -> bool:
+        """
+        Advances progress as GameState.advance does, but only commits if
+        progress has not been changed by another worker in the meantime.
+        Returns True only if this call moved the progress.
+        """
+        while True:
+            state = await self.load(game_id)
+            current = state.progress
+            progress = state.advance(view)
+            if progress == current:
+                return False
+            if await self._compare_and_set(
+                keys=[self.keys(game_id)["meta"]], args=[current, progress, self.ttl]
+            ):
+                return True
+
+    async def change_progress(
+        self, game_id: int, progress: int, expected: Optional[int] = None
+    ) -> bool:
+        # seeds the game from the db if it is not in redis yet
+        await self.load(game_id)
+        meta = self.keys(game_id)["meta"]
+        if expected is None:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(meta, "progress", progress)
+            pipe.expire(meta, self.ttl)
+            await pipe.execute()
+            return True
+        return bool(
+            await self._compare_and_set(
+                keys=[meta], args=[expected, progress, self.ttl]
+            )
+        )
+
+    async def apply_points(self, game_id: int, points: Dict[str, int]) -> None:
+        state = await self.load(game_id)
+        key = self.keys(game_id)["points"]
+        pipe = self.client.pipeline(transaction=True)
+        for player, earned in points.items():
+            if player in state.points:
+                pipe.hincrby(key, player, earned)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def reset_round(self, game_id: int) -> None:
+        keys = self.keys(game_id)
+        await self.client.delete(keys["submissions"], keys["votes"])
+
+    async def flush(
+        self, game_id: int, points: Optional[Dict[str, int]] = None
+    ) -> None:
+        await (await self.load(game_id)).flush(points)
+
+    async def claim_owner(self, game_id: int, candidate: str, ttl: int = 60) -> str:
+        return await self._claim_owner(
+            keys=[self.keys(game_id)["owner"]], args=[candidate, ttl]
+        )
+
+    async def release_owner(self, game_id: int, candidate: str) -> None:
+        await self._release_owner(keys=[self.keys(game_id)["owner"]], args=[candidate])
+
+    async def record_ack(self, game_id: int, channel: str, progress: int) -> None:
+        await self._record_ack(
+            keys=[self.keys(game_id)["acks"]], args=[channel, progress, self.ttl]
+        )
+
+    async def remove_channel(self, game_id: int, channel: str) -> None:
+        key = self.keys(game_id)["acks"]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hdel(key, channel)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def unacked_channels(self, game_id: int, progress: int) -> List[str]:
+        acks = await self.client.hgetall(self.keys(game_id)["acks"])
+        return [channel for channel, acked in acks.items() if int(acked) < progress]
+
+    async def mark_message(self, game_id: int, message_id: str) -> bool:
+        key = self.keys(game_id)["messages"]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.sadd(key, message_id)
+        pipe.expire(key, self.ttl)
+        added, _ = await pipe.execute()
+        return bool(added)
+
+    async def unmark_message(self, game_id: int, message_id: str) -> None:
+        key = self.keys(game_id)["messages"]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.srem(key, message_id)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def discard(self, game_id: int) -> None:
+        await self.client.delete(*self.keys(game_id).values())
+
+
+_game_store = None
+
+
+def get_game_store():
+    """
+    Returns the process-wide game store configured by the
+    GAME_STATE_STORE setting ('local' or 'redis').
+    """
+    global _game_store
+    if _game_store is None:
+        config = getattr(settings, "GAME_STATE_STORE", {"BACKEND": "local"})
+        if config["BACKEND"] == "redis":
+            _game_store = RedisGameStore.from_url(config["LOCATION"])
+        else:
+            _game_store = LocalGameStore()
+    return _game_store
@@ -0,0 +1,54 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional, Tuple
+
+"""
+Category and character hints shown to players while they think. The hint
+files are read once per process (at app ready) into immutable tuples, and
+served as one JSON document whose url contains a fingerprint of its content.
+The url changes whenever the hints do, so browsers can cache it for good.
+"""
+
+RESOURCES = Path(__file__).resolve().parent / "resources"
+
+
+class HintCorpus:
+
+    """
+    Hints with newlines stripped, and the JSON payload served to clients.
+    version is the first 12 hex digits of the sha256 of the payload.
+    """
+
+    def __init__(self, categories: Tuple[str, ...], characters: Tuple[str, ...]):
+        self.categories = categories
+        self.characters = characters
+        self.payload = json.dumps(
+            {"categories": categories, "characters": characters},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.version = hashlib.sha256(self.payload).hexdigest()[:12]
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> "HintCorpus":
+        return cls(
+            read_hints(directory / "categories.txt"),
+            read_hints(directory / "characters.txt"),
+        )
+
+
+def read_hints(path: Path) -> Tuple[str, ...]:
+    """Returns the non-empty lines of a hints file, stripped of whitespace."""
+    with open(path) as fhand:
+        return tuple(line.strip() for line in fhand if line.strip())
+
+
+_corpus: Optional[HintCorpus] = None
+
+
+def get_hints() -> HintCorpus:
+    """Returns this process's hint corpus, loading it on first use."""
+    global _corpus
+    if _corpus is None:
+        _corpus = HintCorpus.from_directory(RESOURCES)
+    return _corpus
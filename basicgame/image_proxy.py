@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import requests
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+
+"""
+Server side copies of winner images. Image urls found by the image service
+are registered under an opaque key, and the image endpoint serves them as
+fixed size thumbnails. Thumbnails are stored on disk under the sha256 of
+their content, which doubles as their ETag, and the least recently used
+are evicted once the cache outgrows its size limit, along with the keys
+pointing at them. Only registered urls are ever fetched, so the endpoint
+cannot be used as an open proxy.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class ImageProxy:
+
+    """
+    Disk cache of resized images:
+        refs/<key>.url   the source url of a registered image
+        refs/<key>.ref   the digest of its thumbnail, once fetched
+        blobs/<digest>   the thumbnail itself (jpeg)
+    Keys are the sha256 of the source url. Eviction deletes the refs of
+    evicted thumbnails, and registrations never fetched within
+    max_unfetched_age seconds.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = 50 * 1024 * 1024,
+        size: int = 300,
+        timeout: float = 5.0,
+        max_source_bytes: int = 10 * 1024 * 1024,
+        max_unfetched_age: float = 24 * 60 * 60,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.size = size
+        self.timeout = timeout
+        self.max_source_bytes = max_source_bytes
+        self.max_unfetched_age = max_unfetched_age
+        # key -> [lock, number of threads holding or waiting for it]
+        self._locks: Dict[str, List] = {}
+        self._locks_lock = threading.Lock()
+        (self.directory / "refs").mkdir(parents=True, exist_ok=True)
+        (self.directory / "blobs").mkdir(parents=True, exist_ok=True)
+
+    def _ref_path(self, key: str, suffix: str) -> Path:
+        return self.directory / "refs" / f"{key}.{suffix}"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest
+
+    def register(self, url: str) -> str:
+        """Takes an image url, returns the key it can be requested by."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        path = self._ref_path(key, "url")
+        try:
+            # keeps the registration from being evicted as never fetched
+            os.utime(path)
+        except FileNotFoundError:
+            self._write(path, url.encode("utf-8"))
+        return key
+
+    async def aregister(self, url: str) -> str:
+        """register(), run in the default executor to keep disk I/O off the loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.register, url)
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Takes a key, returns the (digest, jpeg bytes) of its thumbnail,
+        fetching and resizing the source image on first use. Concurrent
+        requests for the same key share one fetch. Returns None for unknown
+        keys and images that cannot be fetched.
+        """
+        if len(key) != 64 or not all(char in "0123456789abcdef" for char in key):
+            return None
+        cached = self._read_cached(key)
+        if cached:
+            return cached
+        with self._locked(key):
+            cached = self._read_cached(key)
+            if cached:
+                return cached
+            try:
+                url = self._ref_path(key, "url").read_text()
+            except FileNotFoundError:
+                return None
+            thumbnail = self.fetch_thumbnail(url)
+            if thumbnail is not None:
+                digest = hashlib.sha256(thumbnail).hexdigest()
+                self._write(self._blob_path(digest), thumbnail)
+                self._write(self._ref_path(key, "ref"), digest.encode("utf-8"))
+        self.evict()
+        if thumbnail is None:
+            return None
+        return digest, thumbnail
+
+    def fetch_thumbnail(self, url: str) -> Optional[bytes]:
+        """Downloads the image at url, returns it as a resized jpeg."""
+        if not url.startswith(("http://", "https://")):
+            return None
+        try:
+            response = requests.get(url, timeout=self.timeout, stream=True)
+            response.raise_for_status()
+            data = response.raw.read(self.max_source_bytes + 1, decode_content=True)
+            if len(data) > self.max_source_bytes:
+                logger.warning(f"image at {url} is too large to proxy")
+                return None
+            return self.resize(data)
+        except (requests.RequestException, UnidentifiedImageError, OSError) as err:
+            logger.warning(f"could not proxy image at {url}: {err}")
+            return None
+
+    def resize(self, data: bytes) -> bytes:
+        """Takes image bytes, returns a jpeg no larger than size x size."""
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((self.size, self.size))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=85)
+        return output.getvalue()
+
+    def evict(self) -> None:
+        """
+        Deletes least recently used thumbnails until under max_bytes, then
+        the refs left without a thumbnail (see evict_refs).
+        """
+        blobs = []
+        for entry in (self.directory / "blobs").iterdir():
+            if entry.suffix == ".tmp":
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, entry in sorted(blobs, key=lambda blob: blob[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+        self.evict_refs()
+
+    def evict_refs(self) -> None:
+        """
+        Deletes the refs of keys whose thumbnail has been evicted, and of
+        keys registered over max_unfetched_age seconds ago but never fetched
+        (e.g. because the source image could not be).
+        """
+        oldest = time.time() - self.max_unfetched_age
+        keys = {entry.stem for entry in (self.directory / "refs").iterdir()}
+        for key in keys:
+            if len(key) != 64:
+                continue  # temporary files
+            url_path, ref_path = self._ref_path(key, "url"), self._ref_path(key, "ref")
+            try:
+                digest = ref_path.read_text()
+                evicted = not self._blob_path(digest).exists()
+            except FileNotFoundError:
+                try:
+                    evicted = url_path.stat().st_mtime < oldest
+                except FileNotFoundError:
+                    continue
+            if evicted:
+                ref_path.unlink(missing_ok=True)
+                url_path.unlink(missing_ok=True)
+
+    def _read_cached(self, key: str) -> Optional[Tuple[str, bytes]]:
+        try:
+            digest = self._ref_path(key, "ref").read_text()
+            blob = self._blob_path(digest)
+            data = blob.read_bytes()
+            # marks the thumbnail as recently used for eviction
+            os.utime(blob)
+        except FileNotFoundError:
+            return None
+        return digest, data
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[None]:
+        """
+        Holds the lock for key. Locks are created on first use and dropped
+        once no thread holds or waits for them, so they do not accumulate.
+        """
+        with self._locks_lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def _write(self, path: Path, data: bytes) -> None:
+        """Writes atomically, so readers never see a partial file."""
+        temp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
+
+
+_proxy: Optional[ImageProxy] = None
+
+
+def get_image_proxy() -> ImageProxy:
+    """Returns this process's image proxy, configured by settings.IMAGE_CACHE."""
+    global _proxy
+    if _proxy is None:
+        config = settings.IMAGE_CACHE
+        _proxy = ImageProxy(
+            config["LOCATION"],
+            max_bytes=config.get("MAX_BYTES", 50 * 1024 * 1024),
+            size=config.get("SIZE", 300),
+        )
+    return _proxy
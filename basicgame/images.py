@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from html import escape
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import quote
+from django.conf import settings
+from google_images_search import GoogleImagesSearch  # type: ignore
+
+"""
+Image lookup for the winner view. Providers perform the (blocking) search,
+and the ImageService runs them off the event loop with a timeout, merges
+concurrent lookups of the same query and caches results, so a slow image
+api never stalls the consumers sharing a worker. A circuit breaker and a
+daily quota stop it calling a provider that is failing or out of allowance.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class ImageProvider(ABC):
+
+    """Interface for image providers. search is blocking and run in a thread."""
+
+    @abstractmethod
+    def search(self, query: str) -> Optional[str]:
+        """Takes a search query, returns the url of a matching image or None."""
+
+
+class GoogleImageProvider(ImageProvider):
+
+    """Finds images with the Google custom search api (GCS_CX/GCS_DEVELOPER_KEY)."""
+
+    def search(self, query: str) -> Optional[str]:
+        search_params = {
+            "q": query,
+            "num": 1,
+            "safe": "active",
+            "imgSize": "medium",
+        }
+        gis = GoogleImagesSearch(os.getenv("GCS_CX"), os.getenv("GCS_DEVELOPER_KEY"))
+        gis.search(search_params=search_params)
+        for image in gis.results():
+            return image.url
+        return None
+
+
+class OfflineImageProvider(ImageProvider):
+
+    """
+    Stand-in provider for tests, benchmarks and development without api
+    keys. Returns an svg placeholder showing the query, without any network.
+    """
+
+    def search(self, query: str) -> Optional[str]:
+        svg = (
+            '<svg xmlns="http://www.w3.org/2000/svg" width="300" height="300">'
+            '<rect width="100%" height="100%" fill="#ddd"/>'
+            '<text x="50%" y="50%" text-anchor="middle" font-size="24">'
+            f"{escape(query)}</text></svg>"
+        )
+        return f"data:image/svg+xml,{quote(svg)}"
+
+
+class CircuitBreaker:
+
+    """
+    Tracks the outcome of the last `window` provider calls. Once at least
+    min_calls are recorded and the share of failures reaches failure_rate,
+    the circuit opens (trips) and calls are refused for reset_timeout
+    seconds. A single trial call is then let through: success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 4,
+        window: int = 20,
+        reset_timeout: float = 300,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.trips = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        """Returns True if a call may be made to the provider."""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial_running:
+                return False
+            self._trial_running = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state == "half_open":
+            logger.info("image provider recovered, circuit closed")
+            self.state = "closed"
+            self._outcomes.clear()
+        self._trial_running = False
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        self._trial_running = False
+        if self.state == "half_open":
+            self.trip()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self.trip()
+
+    def trip(self) -> None:
+        """Opens the circuit."""
+        logger.warning(
+            f"image provider failing, skipping searches for {self.reset_timeout}s"
+        )
+        self.state = "open"
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+class DailyQuota:
+
+    """
+    Counts provider calls per (UTC) day, refusing calls over limit.
+    A limit of None means unlimited. Counts are per process.
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        self.limit = limit
+        self.used = 0
+        self._day = datetime.now(timezone.utc).date()
+
+    def available(self) -> bool:
+        """Returns True if another call can be made today."""
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+        return self.limit is None or self.used < self.limit
+
+    def consume(self) -> None:
+        """Counts a call."""
+        self.used += 1
+
+
+class ImageMetrics:
+
+    """Counters describing how image lookups were served."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.short_circuits = 0
+        self.over_quota = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_latency(self, seconds: float) -> None:
+        self.searches += 1
+        self.total_latency += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        metrics = dict(vars(self))
+        metrics["mean_latency"] = (
+            self.total_latency / self.searches if self.searches else 0.0
+        )
+        return metrics
+
+
+class ImageService:
+
+    """
+    Resolves queries to image urls through a provider.
+    Lookups run in the default executor and give up after timeout seconds.
+    Concurrent lookups of the same query share one provider call.
+    Results are kept in an LRU cache for ttl seconds, failures for
+    failure_ttl seconds so that a failing api is not hit on every request.
+    Candidates can be prefetched before they are needed (see prefetch).
+    While the circuit breaker is open, or the daily quota is used up,
+    lookups return None straight away without calling the provider.
+    """
+
+    def __init__(
+        self,
+        provider: ImageProvider,
+        timeout: float = 3.0,
+        maxsize: int = 1024,
+        ttl: float = 60 * 60 * 24,
+        failure_ttl: float = 60,
+        prefetch: bool = True,
+        breaker: Optional[CircuitBreaker] = None,
+        quota: Optional[DailyQuota] = None,
+    ) -> None:
+        self.provider = provider
+        self.breaker = breaker or CircuitBreaker()
+        self.quota = quota or DailyQuota()
+        self.metrics = ImageMetrics()
+        self.prefetch_enabled = prefetch
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._cache: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._prefetches: Set[asyncio.Task] = set()
+
+    def cached(self, query: str) -> Tuple[bool, Optional[str]]:
+        """Returns (True, url) if the query has an unexpired result cached."""
+        entry = self._cache.get(query)
+        if entry is None:
+            return False, None
+        expires, url = entry
+        if expires < time.monotonic():
+            del self._cache[query]
+            return False, None
+        self._cache.move_to_end(query)
+        return True, url
+
+    def store(self, query: str, url: Optional[str]) -> None:
+        """Caches the result of a query, evicting the least recently used."""
+        ttl = self.ttl if url else self.failure_ttl
+        self._cache[query] = (time.monotonic() + ttl, url)
+        self._cache.move_to_end(query)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, query: str) -> Optional[str]:
+        """
+        Returns the url of an image for the query, or None if none was found
+        in time. Never raises on provider errors.
+        """
+        hit, url = self.cached(query)
+        if hit:
+            self.metrics.hits += 1
+            return url
+        self.metrics.misses += 1
+        pending = self._pending.get(query)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[query] = future
+        try:
+            url = await self.lookup(query)
+            self.store(query, url)
+            future.set_result(url)
+        finally:
+            del self._pending[query]
+            if not future.done():
+                future.set_result(None)
+        return url
+
+    def prefetch(self, queries: Iterable[str]) -> None:
+        """
+        Starts resolving each query in the background, so that a later
+        resolve finds the result cached (or joins the pending lookup).
+        """
+        if not self.prefetch_enabled:
+            return
+        for query in queries:
+            hit, _ = self.cached(query)
+            if hit or query in self._pending:
+                continue
+            task = asyncio.create_task(self.resolve(query))
+            self._prefetches.add(task)
+            task.add_done_callback(self._prefetches.discard)
+
+    async def lookup(self, query: str) -> Optional[str]:
+        """
+        Runs the provider search off the event loop, with a timeout,
+        unless the circuit is open or the daily quota is used up.
+        """
+        if not self.quota.available():
+            self.metrics.over_quota += 1
+            return None
+        if not self.breaker.allow():
+            self.metrics.short_circuits += 1
+            return None
+        self.quota.consume()
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            url = await asyncio.wait_for(
+                loop.run_in_executor(None, self.provider.search, query), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            self.breaker.record_failure()
+            logger.warning(f"image search for {query} timed out")
+        # if we use up API image allowance for a day
+        # an error will presumably be thrown
+        except Exception as err:
+            self.metrics.failures += 1
+            self.breaker.record_failure()
+            logger.warning(f"image search may have failed - check api quota: {err}")
+        else:
+            self.breaker.record_success()
+            return url
+        finally:
+            self.metrics.record_latency(time.monotonic() - started)
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the service's metrics, with circuit and quota state."""
+        stats = self.metrics.as_dict()
+        stats["trips"] = self.breaker.trips
+        stats["circuit_open"] = self.breaker.state != "closed"
+        stats["quota_used"] = self.quota.used
+        return stats
+
+
+def create_image_provider(config: dict) -> ImageProvider:
+    """
+    Returns the provider named by the "BACKEND" key of config. The google
+    provider falls back to the offline one if no api key is set.
+    """
+    if config.get("BACKEND") == "offline":
+        return OfflineImageProvider()
+    if not os.getenv("GCS_DEVELOPER_KEY"):
+        logger.warning("GCS_DEVELOPER_KEY not set, using offline image provider")
+        return OfflineImageProvider()
+    return GoogleImageProvider()
+
+
+_service: Optional[ImageService] = None
+
+
+def get_image_service() -> ImageService:
+    """
+    Returns this process's image service, configured by
+    settings.IMAGE_PROVIDER (defaults to the google provider).
+    """
+    global _service
+    if _service is None:
+        config = getattr(settings, "IMAGE_PROVIDER", {"BACKEND": "google"})
+        _service = ImageService(
+            create_image_provider(config),
+            timeout=config.get("TIMEOUT", 3.0),
+            prefetch=config.get("PREFETCH", True),
+            quota=DailyQuota(config.get("DAILY_QUOTA")),
+        )
+    return _service
@@ -0,0 +1,118 @@
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+from channels.db import database_sync_to_async  # type: ignore
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from basicgame.models import Game, Player
+from basicgame import utils
+
+"""
+Compares the per-call latency of the async-native helpers in utils with the
+same queries wrapped in database_sync_to_async, as every helper used to be.
+Runs against a benchmark game created in the default database, which is
+deleted afterwards.
+"""
+
+
+def wrapped_helpers() -> Dict[str, Callable[..., Awaitable]]:
+    """The hot helpers as they were: sync queries run in the thread pool."""
+
+    def enough_submissions(game_id):
+        categories = Q(submission__startswith="_")
+        counts = Player.objects.filter(game_id=game_id, submission__gt="").aggregate(
+            categories=Count("pk", filter=categories),
+            characters=Count("pk", filter=~categories),
+        )
+        return counts["categories"] > 0 and counts["characters"] > 0
+
+    def get_category(game_id):
+        category = (
+            Player.objects.filter(game_id=game_id, submission__startswith="_")
+            .order_by("pk")
+            .values_list("submission", flat=True)
+            .first()
+        )
+        return category[1:] if category else None
+
+    sync = {
+        "get_game_id": lambda name, game_id: Game.objects.get(name=name).pk,
+        "get_game_progress": lambda name, game_id: Game.objects.get(
+            pk=game_id
+        ).progress,
+        "enough_votes": lambda name, game_id: Player.objects.filter(
+            game_id=game_id, votes__gt=""
+        ).exists(),
+        "enough_submissions": lambda name, game_id: enough_submissions(game_id),
+        "get_category": lambda name, game_id: get_category(game_id),
+    }
+    return {helper: database_sync_to_async(func) for helper, func in sync.items()}
+
+
+def native_helpers() -> Dict[str, Callable[..., Awaitable]]:
+    """The async-native helpers, called with the same arguments."""
+    return {
+        "get_game_id": lambda name, game_id: utils.get_game_id(name),
+        "get_game_progress": lambda name, game_id: utils.get_game_progress(game_id),
+        "enough_votes": lambda name, game_id: utils.enough_votes(game_id),
+        "enough_submissions": lambda name, game_id: utils.enough_submissions(game_id),
+        "get_category": lambda name, game_id: utils.get_category(game_id),
+    }
+
+
+class Command(BaseCommand):
+
+    help = "Benchmarks async-native helpers against database_sync_to_async."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=500)
+
+    def handle(self, *args, **options):
+        name = f"benchmark-{uuid.uuid4().hex[:8]}"
+        game = Game.objects.create(
+            name=name, cycles=1, boring=False, host=f"{name}-0", progress=1
+        )
+        Player.objects.bulk_create(
+            Player(
+                name=f"{name}-{i}",
+                game_id=game,
+                points=0,
+                submission=submission,
+                votes='{"vote": {}}' if i else None,
+            )
+            for i, submission in enumerate(["_pets", "dog", "cat"])
+        )
+        try:
+            results = asyncio.run(self.compare(name, game.pk, options["calls"]))
+        finally:
+            game.delete()
+        self.stdout.write(
+            f"{'helper':<20}{'wrapped (us)':>14}{'native (us)':>14}{'speedup':>10}"
+        )
+        for helper, (wrapped, native) in results.items():
+            self.stdout.write(
+                f"{helper:<20}{wrapped:>14.0f}{native:>14.0f}{wrapped / native:>9.2f}x"
+            )
+
+    async def compare(self, name: str, game_id: int, calls: int):
+        """Returns the median latency of each helper, wrapped and native."""
+        wrapped, native = wrapped_helpers(), native_helpers()
+        results = {}
+        for helper in native:
+            results[helper] = (
+                await self.median_latency(wrapped[helper], name, game_id, calls),
+                await self.median_latency(native[helper], name, game_id, calls),
+            )
+        return results
+
+    async def median_latency(self, func, name: str, game_id: int, calls: int):
+        """Awaits func calls times in a row, returns the median in microseconds."""
+        await func(name, game_id)
+        latencies: List[float] = []
+        for _ in range(calls):
+            began = time.perf_counter()
+            await func(name, game_id)
+            latencies.append((time.perf_counter() - began) * 1_000_000)
+        return statistics.median(latencies)
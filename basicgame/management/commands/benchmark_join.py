@@ -0,0 +1,67 @@
+import statistics
+import time
+import uuid
+from typing import List
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from basicgame.models import Game, Player
+from basicgame.views import Join
+
+"""
+Measures the latency of joining a game as the Player table grows. Filler
+players are added in steps up to --rows, and after each step a batch of
+players joins a lobby through Join.post. Latency should stay flat. Runs
+against the default database; the benchmark games and their players are
+deleted afterwards.
+"""
+
+
+class Command(BaseCommand):
+
+    help = "Benchmarks Join.post latency against the size of the Player table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--steps", type=int, default=4)
+        parser.add_argument("--joins", type=int, default=200)
+
+    def handle(self, *args, **options):
+        prefix = f"benchmark_{uuid.uuid4().hex[:8]}"
+        lobby = Game.objects.create(
+            name=prefix, cycles=1, boring=False, host=f"{prefix}-host", progress=0
+        )
+        filler = Game.objects.create(
+            name=f"{prefix}-filler", cycles=1, boring=False, host="", progress=0
+        )
+        join = Join.as_view()
+        factory = RequestFactory()
+        self.stdout.write(f"{'players':>10}{'median (us)':>14}{'p95 (us)':>12}")
+        try:
+            added = 0
+            for step in range(options["steps"] + 1):
+                target = options["rows"] * step // options["steps"]
+                Player.objects.bulk_create(
+                    (
+                        Player(name=f"{prefix}{i}fill", game_id=filler, points=0)
+                        for i in range(added, target)
+                    ),
+                    batch_size=1000,
+                )
+                added = target
+                latencies: List[float] = []
+                for i in range(options["joins"]):
+                    player_name = f"s{step}p{i}{uuid.uuid4().hex[:8]}"
+                    request = factory.post(
+                        "/join", {"player-name": player_name, "game-name": prefix}
+                    )
+                    began = time.perf_counter()
+                    response = join(request)
+                    latencies.append((time.perf_counter() - began) * 1_000_000)
+                    if response.status_code != 302:
+                        raise CommandError(f"{player_name} could not join")
+                rows = Player.objects.count()
+                median = statistics.median(latencies)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                self.stdout.write(f"{rows:>10}{median:>14.0f}{p95:>12.0f}")
+        finally:
+            Game.objects.filter(pk__in=[lobby.pk, filler.pk]).delete()
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+import uuid
+from typing import List
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from basicgame.game_state import GameState
+from basicgame.models import Game, Player
+
+"""
+Measures write throughput of the database with many games being played at
+once. Each game runs in its own thread, with its own connection, playing
+rounds through GameState and writing through to the db at every round
+boundary, as the round scheduler does (see GameState.write_through). Run it
+twice, with and without SQLITE_TUNING=1, to compare profiles.
+Games are created with a "benchmark-" prefix and deleted afterwards, but as
+it writes to the default database it is best pointed at a copy.
+"""
+
+
+class Command(BaseCommand):
+
+    help = "Benchmarks concurrent game writes against the default database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--games", type=int, default=8)
+        parser.add_argument("--players", type=int, default=3)
+        parser.add_argument("--rounds", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["games"] < 1 or options["players"] < 2:
+            raise CommandError("needs at least one game of two players")
+        games = [
+            self.create_game(options["players"], options["rounds"])
+            for _ in range(options["games"])
+        ]
+        start = threading.Barrier(len(games))
+        writes: List[int] = []
+        errors: List[int] = []
+        lock = threading.Lock()
+
+        def play(game: Game) -> None:
+            done, failed = self.play_rounds(game, options["rounds"], start)
+            with lock:
+                writes.append(done)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=play, args=(game,)) for game in games]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        Game.objects.filter(pk__in=[game.pk for game in games]).delete()
+        self.report(len(games), sum(writes), sum(errors), elapsed)
+
+    def create_game(self, num_of_players: int, rounds: int) -> Game:
+        """Creates a benchmark game, long enough for the rounds, and its players."""
+        prefix = f"benchmark-{uuid.uuid4().hex[:8]}"
+        game = Game.objects.create(
+            name=prefix, cycles=rounds, boring=False, host=f"{prefix}-0", progress=1
+        )
+        Player.objects.bulk_create(
+            Player(name=f"{prefix}-{i}", game_id=game, points=0)
+            for i in range(num_of_players)
+        )
+        return game
+
+    def play_rounds(self, game: Game, rounds: int, start: threading.Barrier):
+        """
+        Plays rounds of a game, returns the number of write transactions
+        made and the number that failed because the database was locked.
+        """
+        state = GameState.from_db(game.pk)
+        scores = {f"character{i}": i for i in range(1, len(state.players))}
+        vote = json.dumps({"vote": {"voteData": {"characterScores": scores}}})
+        points = {state.players[-1]: 1}
+        writes = failed = 0
+        start.wait()
+        try:
+            for _ in range(rounds):
+                for i, name in enumerate(state.players):
+                    submission = f"character{i}" if i else "_category"
+                    state.add_input(name, "submission", submission)
+                for view in ["vote", "winner", "results", "leaderboard", "submission"]:
+                    if view == "winner":
+                        for name in state.players:
+                            state.add_input(name, "votes", vote)
+                    elif view == "submission":
+                        state.reset_round()
+                    state.advance(view)
+                    try:
+                        state.write_through(points if view == "results" else None)
+                        writes += 1
+                    except OperationalError as err:
+                        if "locked" not in str(err):
+                            raise
+                        failed += 1
+        finally:
+            connection.close()
+        return writes, failed
+
+    def report(self, games: int, writes: int, errors: int, elapsed: float) -> None:
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("PRAGMA journal_mode")
+                mode = cursor.fetchone()[0]
+            else:
+                mode = connection.vendor
+        self.stdout.write(f"journal mode:    {mode}")
+        self.stdout.write(f"games:           {games}")
+        self.stdout.write(f"writes:          {writes}")
+        self.stdout.write(f"locked errors:   {errors}")
+        self.stdout.write(f"elapsed:         {elapsed:.2f}s")
+        self.stdout.write(f"writes/sec:      {writes / elapsed:.1f}")
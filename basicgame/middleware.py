@@ -1,11 +1,60 @@
-class NoCachingMiddleware:
+import re
+from django.conf import settings
+from django.utils.cache import get_conditional_response, set_response_etag
+
+"""
+HTTP caching policy by route. GET and HEAD requests whose path matches one of
+settings.CACHE_POLICIES are given its Cache-Control; everything else, such as
+the host, lobby and play pages which carry live game state, is no-store.
+Responses from views that choose their own Cache-Control (images, hints) keep
+it. Static files always follow the policy, so this middleware must come
+before WhiteNoise, which serves them.
+"""
+
+NO_STORE = "no-cache, no-store, must-revalidate, max-age=0"
+
+
+class CachePolicyMiddleware:
+
+    """
+    Sets Cache-Control from the first matching policy. Pages that must be
+    revalidated (no-cache) are given an ETag, and matching If-None-Match
+    requests are answered with 304 Not Modified.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.policies = [
+            (re.compile(pattern), cache_control)
+            for pattern, cache_control in getattr(settings, "CACHE_POLICIES", [])
+        ]
 
     def __call__(self, request):
         response = self.get_response(request)
-        response["Cache-Control"] = "no-cache, max-age=0, must-revalidate, no-store"
-        response["Cache-Control"] = "post-check=0, pre-check=0, false"
-        response["Pragma"] = "no-cache"
-        response["Expires"] = 0
+        is_static = request.path.startswith(settings.STATIC_URL)
+        if response.has_header("Cache-Control") and not is_static:
+            return response
+        cache_control = self.policy_for(request)
+        if cache_control is None:
+            response["Cache-Control"] = NO_STORE
+            response["Pragma"] = "no-cache"
+            response["Expires"] = "0"
+            return response
+        response["Cache-Control"] = cache_control
+        if "no-cache" in cache_control and response.status_code == 200:
+            if not response.has_header("ETag") and not response.streaming:
+                set_response_etag(response)
+            if response.has_header("ETag"):
+                return get_conditional_response(
+                    request, etag=response["ETag"], response=response
+                )
         return response
+
+    def policy_for(self, request):
+        """Returns the Cache-Control of the request's route, None if no-store."""
+        if request.method not in ("GET", "HEAD"):
+            return None
+        for pattern, cache_control in self.policies:
+            if pattern.search(request.path):
+                return cache_control
+        return None
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("basicgame", "0015_submission_vote_alter_player_votes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoundResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("round", models.PositiveSmallIntegerField()),
+                ("category", models.CharField(max_length=100, null=True)),
+                ("scores", models.JSONField()),
+                ("winner", models.JSONField()),
+                ("points", models.JSONField()),
+                ("results_html", models.TextField()),
+                ("leaderboard_html", models.TextField()),
+                ("image", models.URLField(max_length=2048, null=True)),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="basicgame.game"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="roundresult",
+            constraint=models.UniqueConstraint(
+                fields=("game", "round"), name="unique_round_result"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+def delete_duplicate_games(apps, schema_editor):
+    """Keeps only the newest game of each name, as Host.post replaces games."""
+    Game = apps.get_model("basicgame", "Game")
+    seen = set()
+    for game in Game.objects.order_by("-pk"):
+        if game.name in seen:
+            game.delete()
+        seen.add(game.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("basicgame", "0016_roundresult"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_games, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="game",
+            name="name",
+            field=models.CharField(max_length=30, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="player",
+            index=models.Index(
+                fields=["game_id", "submission"], name="player_game_submission_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="player",
+            constraint=models.UniqueConstraint(
+                fields=("game_id", "name"), name="unique_player_in_game"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.1 on 2026-10-18 13:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("basicgame", "0018_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="submission",
+            name="game",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="basicgame.game",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="submission",
+            name="player",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="round_submissions",
+                to="basicgame.player",
+            ),
+        ),
+    ]
@@ -2,15 +2,26 @@ from django.db import models
 from django.core.validators import RegexValidator
 
 
+def normalize_submission(submission: str | None) -> str | None:
+    """
+    Returns the text used to detect duplicate submissions: the submission
+    without the asterisks added to earlier duplicates.
+    """
+    if submission is None:
+        return None
+    return submission.rstrip("*")
+
+
 class Game(models.Model):
     """
     A new record is created in the Game table for each game played.
     Cycles: number of rounds to be played per player. E.g. three cycles with
     three players is 9 rounds (and 47/54 views).
     Boring: Boolean representing whether the game should be played in 'boring' mode.
+    Name: unique, as games are looked up by name on every view and connect.
     """
 
-    name = models.CharField(max_length=30)
+    name = models.CharField(max_length=30, unique=True)
     cycles = models.PositiveSmallIntegerField()
     boring = models.BooleanField()
     host = models.CharField(max_length=50)
@@ -31,6 +42,7 @@ class Player(models.Model):
                 autmatically prefixed with an underscore (e.g. '_truthfullness')
 
     Votes: scores for combinations of characters and categories are store here.
+           Also mirrored into the Vote table, which is used for scoring.
     """
 
     name = models.CharField(
@@ -45,7 +57,103 @@ class Player(models.Model):
     game_id = models.ForeignKey(Game, on_delete=models.CASCADE, null=True, blank=True)
     points = models.PositiveSmallIntegerField()
     submission = models.CharField(max_length=100, null=True)
-    votes = models.CharField(max_length=1000, null=True)
+    votes = models.TextField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game_id", "name"], name="unique_player_in_game"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["game_id", "submission"], name="player_game_submission_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Submission(models.Model):
+    """
+    A record is created for each submission (a character, or the category)
+    made in a round. Rows are written when the game state is flushed to the db.
+
+    Round: the round number within the game, starting from 1.
+    Text: the character, or the category without its underscore prefix.
+
+    Rows outlive their game and player (both are set to null on delete), so
+    that popular past submissions can be suggested (see autocomplete).
+    """
+
+    game = models.ForeignKey(Game, null=True, on_delete=models.SET_NULL)
+    round = models.PositiveSmallIntegerField()
+    player = models.ForeignKey(
+        Player,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="round_submissions",
+    )
+    text = models.CharField(max_length=100)
+    is_category = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["game", "round"])]
+
+    def __str__(self):
+        return self.text
+
+
+class Vote(models.Model):
+    """
+    A record is created for each score a player gives a character in a round.
+    Average scores are aggregated from this table.
+    """
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    round = models.PositiveSmallIntegerField()
+    voter = models.ForeignKey(
+        Player, on_delete=models.CASCADE, related_name="round_votes"
+    )
+    character = models.CharField(max_length=100)
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=["game", "round", "character"])]
+
+    def __str__(self):
+        return f"{self.character}: {self.score}"
+
+
+class RoundResult(models.Model):
+    """
+    A snapshot of a round's outcome, created once when voting closes.
+    The winner, results and leaderboard views are all served from it.
+
+    Scores: average score of each character.
+    Winner: the winner, or drawers, as returned by utils.calculate_winner.
+    Points: points earned this round by each player.
+    Image: url of the winner's image, empty if none was found and null if
+           no search has been made yet.
+    """
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    round = models.PositiveSmallIntegerField()
+    category = models.CharField(max_length=100, null=True)
+    scores = models.JSONField()
+    winner = models.JSONField()
+    points = models.JSONField()
+    results_html = models.TextField()
+    leaderboard_html = models.TextField()
+    image = models.URLField(max_length=2048, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game", "round"], name="unique_round_result"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.game} round {self.round}"
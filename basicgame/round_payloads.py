@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from basicgame import utils
+
+"""
+Per-process cache of encoded game json. The json for a view is the same
+for every player at a given progress, so it is generated once and reused
+by broadcasts and reconnects. Each game keeps only the payload of its
+current progress, which doubles as the version of the entry.
+"""
+
+
+class RoundPayloadCache:
+
+    """
+    LRU cache mapping each game id to its latest (progress, json) pair.
+    A request for any other progress regenerates and replaces the entry.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self._payloads: "OrderedDict[int, Tuple[int, str]]" = OrderedDict()
+
+    async def get(
+        self, game_id: int, progress: int, view: str, next: Optional[float] = None
+    ) -> str:
+        """
+        Returns the json for the given game, progress and view, generating
+        it with utils.generate_round_json if it is not cached. Raises
+        ValueError (and caches nothing) if the json cannot be generated.
+        """
+        cached = self._payloads.get(game_id)
+        if cached and cached[0] == progress:
+            self._payloads.move_to_end(game_id)
+            return cached[1]
+        return await self.refresh(game_id, progress, view, next)
+
+    async def refresh(
+        self, game_id: int, progress: int, view: str, next: Optional[float] = None
+    ) -> str:
+        """Generates the json for the given view and caches it."""
+        json_string: str = await utils.generate_round_json(view, game_id, next)
+        self._payloads[game_id] = (progress, json_string)
+        self._payloads.move_to_end(game_id)
+        while len(self._payloads) > self.maxsize:
+            self._payloads.popitem(last=False)
+        return json_string
+
+    def invalidate(self, game_id: int) -> None:
+        """Drops the cached json of a game."""
+        self._payloads.pop(game_id, None)
+
+
+_payloads: Optional[RoundPayloadCache] = None
+
+
+def get_round_payloads() -> RoundPayloadCache:
+    """Returns this process's round payload cache."""
+    global _payloads
+    if _payloads is None:
+        _payloads = RoundPayloadCache()
+    return _payloads
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from basicgame import utils
+from basicgame.set_interval import setBackoffAsync
+from basicgame.round_payloads import get_round_payloads
+
+"""
+Round scheduling for live games. Each game elects one owner consumer
+(see claim_owner on the game stores), and every game event is forwarded
+to the owner's RoundScheduler. The scheduler is therefore the only task
+advancing rounds, running the timed results reel and broadcasting to
+the game's channel group.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class RoundScheduler:
+
+    """
+    Drives the flow of a single game. Events are passed to handle() by the
+    owner consumer, along with the progress they were raised at so that
+    stale or duplicated events can be ignored. owner is the channel name of
+    that consumer, whose claim on the game is renewed on every tick.
+    """
+
+    latter_views = ["vote", "winner", "results", "leaderboard"]
+
+    def __init__(
+        self, game_id: int, store, channel_layer, owner: Optional[str] = None
+    ) -> None:
+        self.game_id = game_id
+        self.owner = owner
+        self.group_name = f"game_{game_id}"
+        self.store = store
+        self.channel_layer = channel_layer
+        self.wait_time: int = 6
+        # functionless interval for type checking, never gets started
+        self.broadcast: setBackoffAsync = setBackoffAsync(lambda *args: None, 1, 2, 0)
+        self.results_sequence: Optional[asyncio.Task] = None
+        self.skip_sequence: Optional[asyncio.Task] = None
+
+    async def handle(self, event: str, progress: int) -> None:
+        """
+        Handles a game event raised by any consumer of the game.
+
+        Submissions:
+            All players have submitted. Advances to the vote view if there is
+            enough data, otherwise skips the round.
+
+        Votes:
+            All players have voted. Starts the timed results reel as a
+            background asyncio task.
+
+        Category:
+            Only used in boring mode. Advances to the character view.
+
+        Force Next:
+            Sent by the host. Starts the results reel or advances to the vote
+            view if there is enough data to do so, otherwise skips the round.
+
+        Error:
+            Game data could not be processed, so the round is skipped.
+        """
+        await self.renew_ownership()
+        state = await self.store.load(self.game_id)
+        if progress != state.progress:
+            return
+        view = state.view
+        if event == "submissions":
+            if view in self.latter_views:
+                return
+            if not state.enough_submissions:
+                self.skip_round()
+                return
+            await self.advance_and_broadcast("vote")
+        elif event == "votes":
+            if view != "vote":
+                return
+            if not state.enough_votes:
+                self.skip_round()
+                return
+            self.start_results_sequence()
+        elif event == "category":
+            if view in self.latter_views or view == "character":
+                return
+            await self.advance_and_broadcast("character")
+        elif event == "force_next":
+            if view == "vote" and state.enough_votes:
+                self.start_results_sequence()
+            elif view not in self.latter_views and state.enough_submissions:
+                await self.advance_and_broadcast("vote")
+            else:
+                self.skip_round()
+        elif event == "error":
+            logger.warning("game data corrupted:")
+            logger.warning(f"players = {state.players}")
+            logger.warning(f"progress: {state.progress}")
+            logger.warning(f"category: {state.category}")
+            self.skip_round()
+
+    async def renew_ownership(self) -> None:
+        """
+        Claims the game for the owner again, which refreshes the expiry of
+        its claim (see claim_owner on the game stores). Called on every tick:
+        each event, broadcast attempt and pause of a reel, so the claim does
+        not lapse during a reel in which no player sends a message.
+        """
+        if self.owner is None:
+            return
+        owner = await self.store.claim_owner(self.game_id, self.owner)
+        if owner != self.owner:
+            logger.warning(f"game {self.game_id} is now owned by {owner}")
+
+    async def pause(self, seconds: float) -> None:
+        """Waits between the views of a reel, renewing ownership first."""
+        await self.renew_ownership()
+        await asyncio.sleep(seconds)
+
+    async def advance_and_broadcast(self, view: str) -> None:
+        """
+        Advances to the given view, writes through to the db and broadcasts.
+        On entering the vote view, images of all candidates are prefetched.
+        Nothing is done if another caller already made the transition.
+        """
+        if not await self.store.advance(self.game_id, view):
+            return
+        await self.store.flush(self.game_id)
+        if view == "vote":
+            state = await self.store.load(self.game_id)
+            utils.prefetch_images(state.character_list)
+        try:
+            await self.broadcast_data_for_all()
+        except ValueError:
+            self.skip_round()
+
+    async def broadcast_data_for_all(self, message=None, next=None) -> None:
+        """
+        Broadcasts json to all members of channel group.
+        If passed a message (e.g. skip_round), it is sent to the group once.
+        Otherwise json is generated based on the current view type, cached
+        for reconnects (see RoundPayloadCache) and sent to the whole group, then re-sent only to channels whose clients have
+        not acknowledged this progress, with exponential backoff between
+        attempts (see setBackoffAsync). The delivery is assigned to
+        self.broadcast and can be cancelled with self.broadcast.stop().
+        """
+        if getattr(self.broadcast, "has_started", False):
+            await self.broadcast.stop()
+        if message:
+            await self.channel_layer.group_send(self.group_name, message)
+            return
+        state = await self.store.load(self.game_id)
+        progress = state.progress
+        json_string: str = await get_round_payloads().refresh(
+            self.game_id, progress, state.view, next
+        )
+        message = {"type": "game_update", "json": json_string, "progress": progress}
+        sent = False
+
+        async def send_json() -> bool:
+            nonlocal sent
+            await self.renew_ownership()
+            if not sent:
+                sent = True
+                logger.info(f"game {self.game_id} broadcasted: {message}")
+                await self.channel_layer.group_send(self.group_name, message)
+                return False
+            channels = await self.store.unacked_channels(self.game_id, progress)
+            for channel in channels:
+                logger.info(f"game {self.game_id} re-sent {progress} to {channel}")
+                await self.channel_layer.send(channel, message)
+            return not channels
+
+        self.broadcast = setBackoffAsync(send_json, progress)
+        await self.broadcast.start()
+
+    def start_results_sequence(self) -> None:
+        """Starts the results reel unless it is already running."""
+        if self.results_sequence and not self.results_sequence.done():
+            return
+        self.results_sequence = asyncio.create_task(self.begin_results_sequence())
+
+    def skip_round(self) -> None:
+        """Cancels any results reel and starts the skip-round sequence once."""
+        if self.results_sequence:
+            self.results_sequence.cancel()
+        if self.skip_sequence and not self.skip_sequence.done():
+            return
+        self.skip_sequence = asyncio.create_task(self.begin_skip_round_sequence())
+
+    async def begin_results_sequence(self) -> None:
+        """
+        Coordinates timed reel of winner view, results view, and leaderboard view.
+        Sends updated json for broadcast and mutates game data as neccessary.
+        Game state is written through to the db before each broadcast.
+        The round's result is computed once, as voting closes, and every
+        view of the reel is served from it, including the points applied to
+        the players (see utils.compute_round_result).
+        Each transition is a compare-and-set: if another caller has already
+        made it, that caller runs the rest of the reel and this one stops.
+        """
+        try:
+            # View 2 - Winner shown
+            if not await self.store.advance(self.game_id, "winner"):
+                return
+            await self.store.flush(self.game_id)
+            result = await utils.compute_round_result(self.game_id)
+            pause_time = self.wait_time * 1.5
+            next_view_time = time.time() + pause_time
+            await self.broadcast_data_for_all(next=next_view_time)
+            await self.pause(pause_time)
+            # View 3 - Results shown
+            if not await self.store.advance(self.game_id, "results"):
+                return
+            await self.store.apply_points(self.game_id, result.points)
+            await self.store.flush(self.game_id, points=result.points)
+            pause_time = self.wait_time + (len(result.scores) / 2)
+            next_view_time = time.time() + pause_time
+            await self.broadcast_data_for_all(next=next_view_time)
+            await self.pause(pause_time)
+            # View 4 - Leaderboard shown
+            if not await self.store.advance(self.game_id, "leaderboard"):
+                return
+            await self.store.flush(self.game_id)
+            next_view_time = time.time() + pause_time
+            await self.broadcast_data_for_all(next=next_view_time)
+            await self.pause(pause_time)
+            # Go to next round or end
+            if not await self.store.advance(self.game_id, "submission"):
+                return
+            await self.store.reset_round(self.game_id)
+            await self.store.flush(self.game_id)
+            await self.broadcast_data_for_all()
+        except ValueError:
+            self.skip_round()
+            return
+        await self.finish_if_finished()
+
+    async def begin_skip_round_sequence(self) -> None:
+        """
+        Coordinates timed reel of skip round view and the next round.
+        Sends updated json for broadcast and mutates game data as neccessary.
+        """
+        skip_message = {"type": "skip_round"}
+        await self.broadcast_data_for_all(skip_message)
+        await self.pause(3)
+        state = await self.store.load(self.game_id)
+        next_round: Optional[int] = state.next_round()
+        if next_round is not None and not await self.store.change_progress(
+            self.game_id, next_round, expected=state.progress
+        ):
+            return
+        await self.store.reset_round(self.game_id)
+        await self.store.flush(self.game_id)
+        await self.broadcast_data_for_all()
+        await self.finish_if_finished()
+
+    async def finish_if_finished(self) -> None:
+        """
+        Deletes the game once its final view is reached, then stops
+        broadcasting after a short grace period.
+        """
+        finished = await utils.delete_game_if_finished(self.game_id)
+        if finished:
+            await self.store.discard(self.game_id)
+            get_round_payloads().invalidate(self.game_id)
+            _schedulers.pop(self.game_id, None)
+            logger.info("closing final broadcast")
+            await asyncio.sleep(5)
+            await self.broadcast.stop()
+
+
+_schedulers: Dict[int, RoundScheduler] = {}
+
+
+def get_round_scheduler(
+    game_id: int, store, channel_layer, owner: Optional[str] = None
+) -> RoundScheduler:
+    """
+    Returns this process's scheduler for the given game, creating it if
+    needed. owner is the channel name of the consumer now owning the game.
+    """
+    scheduler = _schedulers.get(game_id)
+    if scheduler is None:
+        scheduler = _schedulers[game_id] = RoundScheduler(game_id, store, channel_layer)
+    scheduler.owner = owner
+    return scheduler
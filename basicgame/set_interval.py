@@ -43,3 +43,28 @@ class setIntervalAsync:
                 break
             await self.func()
             await asyncio.sleep(self.period)
+
+
+class setBackoffAsync(setIntervalAsync):
+    """
+    Like setIntervalAsync, but the period doubles after each execution
+    (up to max_period), and the interval finishes early as soon as the
+    given function returns True.
+    """
+
+    def __init__(self, func, progress, period=1, limit=6, max_period=16):
+        super().__init__(func, progress, period, limit)
+        self.max_period = max_period
+
+    async def _run(self):
+        period = self.period
+        while True:
+            self.current_broadcasts += 1
+            if self.current_broadcasts > self.max_broadcasts:
+                self.has_started = False
+                break
+            if await self.func():
+                self.has_started = False
+                break
+            await asyncio.sleep(period)
+            period = min(period * 2, self.max_period)
@@ -0,0 +1,28 @@
+from typing import Any, Dict
+from django.conf import settings
+
+"""
+Opt-in tuning of SQLite connections (see settings.SQLITE_PRAGMAS). The
+pragmas are applied to every new connection through the connection_created
+signal, connected in BasicGameConfig.ready. Connections are kept open for
+CONN_MAX_AGE seconds when the profile is enabled, so each worker pays for
+them once rather than on every request.
+"""
+
+
+def apply_pragmas(cursor: Any, pragmas: Dict[str, Any]) -> None:
+    """Takes a db-api cursor and a dictionary of pragmas, and sets each one."""
+    for pragma, value in pragmas.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def configure_connection(sender, connection, **kwargs) -> None:
+    """
+    Receiver for connection_created. Applies settings.SQLITE_PRAGMAS to new
+    SQLite connections, and leaves other databases alone.
+    """
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
@@ -42,3 +42,11 @@ export function addExpiration(cookieString) {
   now.setTime(time);
   return cookieString + "; expires=" + now.toUTCString() + "; path=/";
 }
+
+export async function fetchHints() {
+  // the url is fingerprinted, so the browser cache serves repeat visits
+  const url = JSON.parse(document.getElementById("hints-url").textContent);
+  const response = await fetch(url);
+  if (!response.ok) throw new Error(`hints request failed: ${response.status}`);
+  return response.json();
+}
@@ -1,4 +1,4 @@
-import { refreshPage } from "./base.js";
+import { fetchHints, refreshPage } from "./base.js";
 
 refreshPage();
 
@@ -15,26 +15,31 @@ const rightSpeech = document.querySelectorAll(".right-hints");
 const leftSpeechContent = document.getElementById("speech-left");
 const rightSpeechContent = document.getElementById("speech-right");
 const hintList = JSON.parse(document.getElementById("hint-list").textContent);
-const categoryHints = JSON.parse(
-  document.getElementById("category-hints").textContent
-);
-const characterHints = JSON.parse(
-  document.getElementById("character-hints").textContent
-);
+// hints are cosmetic, so they load in the background rather than hold up
+// the page; until they arrive only the help hints are shown
+const categoryHints = [];
+const characterHints = [];
+fetchHints()
+  .then(({ categories, characters }) => {
+    categoryHints.push(...categories);
+    characterHints.push(...characters);
+  })
+  .catch((error) => console.warn("could not load hints", error));
 const philosopher = document.getElementById("philosopher");
 
 function hintsGenerator() {
   let hintCount = -1;
   let count = -1;
   function inner() {
-    if (hintCount === hintList.length - 1 || count % 2 === 0) {
+    const asks = hintCount === hintList.length - 1 || count % 2 === 0;
+    if (asks && characterHints.length && categoryHints.length) {
       count++;
       const randCharInt = Math.floor(Math.random() * characterHints.length);
-      const char = characterHints[randCharInt].slice(0, -1);
+      const char = characterHints[randCharInt];
       const randCatInt = Math.floor(Math.random() * categoryHints.length);
-      const cat = categoryHints[randCatInt].slice(0, -1);
+      const cat = categoryHints[randCatInt];
       return `How does ${char} score in the category of ${cat}?`;
-    } else hintCount++;
+    } else if (hintCount < hintList.length - 1) hintCount++;
     count++;
     return hintList[hintCount];
   }
@@ -1,16 +1,20 @@
-import { getCookie } from "./base.js";
+import { fetchHints, getCookie } from "./base.js";
 
 // game data
 
 const gameName = JSON.parse(document.getElementById("game-name").textContent);
 const playerName = getCookie(gameName)["playerName"];
 const host = JSON.parse(document.getElementById("game-host").textContent);
-const categoryHints = JSON.parse(
-  document.getElementById("category-hints").textContent
-);
-const characterHints = JSON.parse(
-  document.getElementById("character-hints").textContent
-);
+// hints are cosmetic, so they load in the background rather than hold up
+// the websocket, and the reel shows nothing until they arrive
+const categoryHints = [];
+const characterHints = [];
+fetchHints()
+  .then(({ categories, characters }) => {
+    categoryHints.push(...categories);
+    characterHints.push(...characters);
+  })
+  .catch((error) => console.warn("could not load hints", error));
 const players = JSON.parse(document.querySelector("#players").textContent);
 
 // elements
@@ -18,6 +22,7 @@ const players = JSON.parse(document.querySelector("#players").textContent);
 const submit = document.querySelector("#game-submit");
 const heading = document.getElementById("heading");
 const input = document.getElementById("game-input");
+const suggestions = document.getElementById("suggestions");
 const category = document.getElementById("category");
 const character = document.getElementById("character");
 const voteLabels = document.querySelectorAll(".vote-text, .vote-submit-text");
@@ -59,7 +64,10 @@ const gameSocket = new WebSocket(websocketAddress);
 
 let view = null;
 let sending = null;
+let sendingId = null;
+let messageCount = 0;
 let hintsReel = null;
+let suggestionKind = null;
 let currentRound = "Round 1";
 
 // utils - css
@@ -166,15 +174,16 @@ function validate(message) {
 }
 
 function hintsGenerator(list) {
-  const max = list.length - 1;
   function inner() {
-    const randInt = Math.floor(Math.random() * max);
-    return list[randInt].slice(0, -1) + "?";
+    if (!list.length) return "";
+    const randInt = Math.floor(Math.random() * (list.length - 1));
+    return list[randInt] + "?";
   }
   return inner;
 }
 
 function startHintsReel(list) {
+  suggestionKind = list === categoryHints ? "category" : "character";
   speechBubble.style.display = "block";
   speech.style.display = "flex";
   const nextHint = hintsGenerator(list);
@@ -206,18 +215,36 @@ function resetTimerWheel(timeSeconds) {
   timer.style.animation = `rotateAndFill ${duration}s linear`;
 }
 
+function setSuggestions(texts) {
+  suggestions.replaceChildren(
+    ...texts.map((text) => {
+      const option = document.createElement("option");
+      option.value = text;
+      return option;
+    })
+  );
+}
+
 // utils - broadcasting
 
 function gameSend(data) {
   gameSocket.send(JSON.stringify(data));
 }
 
+function newMessageId() {
+  messageCount++;
+  return `${playerName}-${Date.now()}-${messageCount}`;
+}
+
 function broadcastAndWait(message = "Waiting for other players...", sendData) {
   showElements([headingSmaller, forceNext]);
   centerElements();
   headingSmaller.innerHTML = message;
   if (sendData) {
+    // resent until the server acknowledges the id, duplicates are dropped
     sendData.sender = playerName;
+    sendData.id = newMessageId();
+    sendingId = sendData.id;
     gameSend(sendData);
     sending = setInterval(gameSend, 3000, sendData);
   }
@@ -293,6 +320,8 @@ function showWinnerView(
 }
 
 function showVoteView(categoryText, poll) {
+  suggestionKind = null;
+  setSuggestions([]);
   topAlignElements();
   showElements([
     heading,
@@ -366,6 +395,7 @@ function showCharacterView(categoryPicker, categoryText) {
 
 function showSubmissionView(view) {
   clearInterval(hintsReel);
+  setSuggestions([]);
   centerElements();
   normalizeCss();
   showElements([heading, input, submit, forceNext, speech, speechBubble]);
@@ -433,9 +463,22 @@ function showSubmissionView(view) {
 // websocket receiver - coordinates views
 
 gameSocket.onmessage = function (e) {
+  const data = JSON.parse(e.data);
+  if (data.suggestions !== undefined) {
+    // ignore suggestions for what the player has since typed over
+    if (suggestionKind && data.prefix === input.value) {
+      setSuggestions(data.suggestions);
+    }
+    return;
+  }
   spinner.style.display = "none";
   allElements.style.display = "block";
-  const data = JSON.parse(e.data);
+  if (data.ack !== undefined) {
+    if (data.ack === sendingId) clearInterval(sending);
+    return;
+  }
+  // acknowledge game json so the server stops re-sending it
+  if (data.progress !== undefined) gameSend({ ack: data.progress });
   if (view === data.view) return;
   if (sending) clearInterval(sending);
   resetTimerWheel(data.nextViewAt);
@@ -496,6 +539,14 @@ gameSocket.onclose = () => {
   }, 500);
 };
 
+input.addEventListener("input", () => {
+  if (!suggestionKind || input.value.trim().length < 2) {
+    setSuggestions([]);
+    return;
+  }
+  gameSend({ autocomplete: { prefix: input.value, kind: suggestionKind } });
+});
+
 input.onkeyup = function (e) {
   if (e.keyCode === 13) {
     submit.click();
@@ -1,5 +1,6 @@
 from django.test import TestCase, TransactionTestCase
 from basicgame.models import Player, Game
+from basicgame.utils import save_round_submissions, save_round_votes
 from channels.db import database_sync_to_async  # type: ignore
 import hashlib
 import json
@@ -73,6 +74,13 @@ class TripleTest(TransactionTestCase):
             votes=None,
         )
 
+    def mirror_round_inputs(self, game_id):
+        """Mirrors player fields into the Submission and Vote tables."""
+        game = Game.objects.get(pk=game_id)
+        players = list(Player.objects.filter(game_id=game))
+        save_round_submissions(game, players)
+        save_round_votes(game, players)
+
     @database_sync_to_async
     def update_submissions(self, sub1, sub2, sub3):
         self.user1.submission = sub1
@@ -81,6 +89,7 @@ class TripleTest(TransactionTestCase):
         self.user2.save()
         self.user3.submission = sub3
         self.user3.save()
+        self.mirror_round_inputs(self.test_game.pk)
 
     @database_sync_to_async
     def update_votes(self, vote1, vote2, vote3):
@@ -90,6 +99,7 @@ class TripleTest(TransactionTestCase):
         self.user2.save()
         self.user3.votes = vote3
         self.user3.save()
+        self.mirror_round_inputs(self.test_game.pk)
 
     @database_sync_to_async
     def update_points(self, p1, p2, p3):
@@ -104,11 +114,13 @@ class TripleTest(TransactionTestCase):
     def update_user1_vote(self, value):
         self.user1.votes = value
         self.user1.save()
+        self.mirror_round_inputs(self.test_game.pk)
 
     @database_sync_to_async
     def update_user1_submission(self, value):
         self.user1.submission = value
         self.user1.save()
+        self.mirror_round_inputs(self.test_game.pk)
 
     async def seed_db(self):
         await self.update_submissions("_pets", "dog", "cat")
@@ -121,7 +133,7 @@ class TripleTest(TransactionTestCase):
     @database_sync_to_async
     def seed_new_game(self):
         self.new_game = Game.objects.create(
-            name="testgame", cycles=4, boring=False, host="testuser4", progress=1
+            name="testgame2", cycles=4, boring=False, host="testuser4", progress=1
         )
         self.new_player = Player.objects.create(
             name="testuser4",
@@ -130,6 +142,7 @@ class TripleTest(TransactionTestCase):
             submission="dogs",
             votes='{"vote":{"name":"testuser112345678","voteData":{"category":"pets","characterScores":{"dog":"80","cat":"20"}}}}',
         )
+        self.mirror_round_inputs(self.new_game.pk)
 
     @database_sync_to_async
     def get_submission(self, player_name):
@@ -0,0 +1,101 @@
+import time
+from unittest import mock
+from channels.db import database_sync_to_async  # type: ignore
+from django.test import SimpleTestCase
+from basicgame.autocomplete import AutocompleteService, PrefixIndex
+from basicgame.hints import HintCorpus, get_hints
+from basicgame.models import Game, Submission
+from basicgame.tests.unit.base import TripleTest
+from basicgame.utils import delete_game_if_finished
+
+
+class TestPrefixIndex(SimpleTestCase):
+    """
+    PrefixIndex should return texts of the asked kind starting with the
+    prefix, ignoring case, the highest weight first and then alphabetically.
+    """
+
+    def setUp(self):
+        self.index = PrefixIndex(
+            [
+                ("Batman", "character", 1),
+                ("a bat", "character", 1),
+                ("batgirl", "character", 5),
+                ("BATMAN", "character", 3),
+                ("bravery", "category", 1),
+                ("Bat", "category", 1),
+            ]
+        )
+
+    def test_ordered_by_weight_then_alphabetically(self):
+        self.assertEqual(self.index.suggest("bat", "character"), ["batgirl", "BATMAN"])
+        self.assertEqual(self.index.suggest("b", "category"), ["Bat", "bravery"])
+
+    def test_ignores_case_and_whitespace(self):
+        self.assertEqual(self.index.suggest("  BATM", "character"), ["BATMAN"])
+
+    def test_kinds_are_separate(self):
+        self.assertEqual(self.index.suggest("a", "category"), [])
+        self.assertEqual(self.index.suggest("a", "character"), ["a bat"])
+
+    def test_limit_and_empty_prefix(self):
+        self.assertEqual(self.index.suggest("b", "character", limit=1), ["batgirl"])
+        self.assertEqual(self.index.suggest("", "character"), [])
+        self.assertEqual(self.index.suggest("bat", "unknown"), [])
+
+    def test_lookup_over_hints_is_fast(self):
+        service = AutocompleteService(get_hints())
+        began = time.perf_counter()
+        for _ in range(1000):
+            service.suggest("th", "character")
+        self.assertLess((time.perf_counter() - began) / 1000, 0.001)
+
+
+class TestAutocompleteService(TripleTest):
+    """
+    Texts submitted in several past rounds should be suggested ahead of
+    hints once the service refreshes, and through the autocomplete endpoint.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.service = AutocompleteService(
+            HintCorpus(("speed", "spirit"), ("a spider", "spiderman"))
+        )
+        for player in (self.user1, self.user2, self.user3):
+            Submission.objects.create(
+                game=self.test_game, round=1, player=player, text="spider pig"
+            )
+        Submission.objects.create(
+            game=self.test_game, round=1, player=self.user1, text="spidey"
+        )
+
+    def test_popular_submissions_outrank_hints(self):
+        self.assertEqual(self.service.suggest("spi", "character"), ["spiderman"])
+        self.assertTrue(self.service.stale)
+        self.service.refresh_if_stale()
+        self.assertFalse(self.service.stale)
+        # spidey was submitted only once, so is not suggested
+        self.assertEqual(
+            self.service.suggest("spi", "character"), ["spider pig", "spiderman"]
+        )
+
+    async def test_submissions_outlive_their_game(self):
+        # well past the last round, so the game has finished
+        await Game.objects.filter(pk=self.test_game.pk).aupdate(progress=1000)
+        self.assertTrue(await delete_game_if_finished(self.test_game.id))
+        self.assertEqual(await Submission.objects.filter(game=None).acount(), 4)
+        await database_sync_to_async(self.service.refresh_if_stale)()
+        self.assertEqual(
+            self.service.suggest("spi", "character"), ["spider pig", "spiderman"]
+        )
+
+    def test_endpoint(self):
+        with mock.patch("basicgame.views.get_autocomplete", return_value=self.service):
+            response = self.client.get(
+                "/autocomplete", {"q": "SPI", "kind": "character", "limit": 1}
+            )
+            self.assertEqual(response.json(), {"suggestions": ["spider pig"]})
+            self.assertEqual(response["Cache-Control"], "public, max-age=300")
+            response = self.client.get("/autocomplete", {"q": "s", "kind": "x"})
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from basicgame.middleware import NO_STORE, CachePolicyMiddleware
+from basicgame.tests.unit.base import TripleTest
+
+static = override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+
+
+class TestCachePolicyMiddleware(SimpleTestCase):
+    """
+    Hashed static files should be immutable for a year, other static files
+    and the home and join pages revalidated, and everything else no-store.
+    Views that set their own Cache-Control keep it, except for static files.
+    """
+
+    def respond(self, path, method="get", headers=None, **extra):
+        def get_response(request):
+            response = HttpResponse("content")
+            for header, value in (headers or {}).items():
+                response[header] = value
+            return response
+
+        request = getattr(RequestFactory(), method)(path, **extra)
+        return CachePolicyMiddleware(get_response)(request)
+
+    def test_hashed_static_files_are_immutable(self):
+        response = self.respond(
+            "/static/basicgame/js/play.0123456789ab.js",
+            headers={"Cache-Control": "max-age=60, public"},
+        )
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        response = self.respond("/static/basicgame/js/play.js")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+
+    def test_game_pages_are_not_stored(self):
+        for path in ["/host", "/testgame/lobby", "/testgame/play"]:
+            self.assertEqual(self.respond(path)["Cache-Control"], NO_STORE)
+        response = self.respond("/join", method="post")
+        self.assertEqual(response["Cache-Control"], NO_STORE)
+
+    def test_views_keep_their_own_policy(self):
+        response = self.respond("/images/abc", headers={"Cache-Control": "public"})
+        self.assertEqual(response["Cache-Control"], "public")
+
+    def test_revalidated_pages_answer_304(self):
+        response = self.respond("/join")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+        etag = response["ETag"]
+        response = self.respond("/join", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@static
+class TestCachePolicyPages(TripleTest):
+    """Rendered pages should carry the policy of their route."""
+
+    def test_home_page_is_revalidated(self):
+        response = self.client.get("/")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+        response = self.client.get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_host_page_is_not_stored(self):
+        response = self.client.get("/host")
+        self.assertEqual(response["Cache-Control"], NO_STORE)
+        self.assertEqual(response["Pragma"], "no-cache")
@@ -0,0 +1,116 @@
+import json
+from unittest import mock
+from channels.layers import get_channel_layer  # type: ignore
+from channels.routing import URLRouter  # type: ignore
+from channels.testing import WebsocketCommunicator  # type: ignore
+from django.test import SimpleTestCase, override_settings
+from basicgame.consumers import GameConsumer
+from basicgame.game_state import LocalGameStore
+from basicgame.routing import websocket_urlpatterns
+from basicgame.scheduler import get_round_scheduler
+from basicgame.tests.unit.base import TripleTest
+
+LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+class TestGameConsumerReceive(SimpleTestCase):
+    """
+    GameConsumer.receive should acknowledge each client message once it has
+    been handled, drop resends of handled messages, and handle the resend
+    of a message whose handling failed. Malformed acks are ignored.
+    """
+
+    def setUp(self):
+        with mock.patch("basicgame.consumers.get_game_store", LocalGameStore):
+            self.consumer = GameConsumer()
+        self.consumer.game_id = 1
+        self.consumer.channel_name = "channel1"
+        self.consumer.send = mock.AsyncMock()
+        self.consumer.handle_message = mock.AsyncMock()
+
+    def sent(self):
+        return [
+            json.loads(call.kwargs["text_data"])
+            for call in self.consumer.send.mock_calls
+        ]
+
+    async def test_resends_are_acked_but_not_handled(self):
+        message = json.dumps({"id": "testuser1-1", "force_next": "_"})
+        await self.consumer.receive(message)
+        await self.consumer.receive(message)
+        self.assertEqual(self.consumer.handle_message.await_count, 1)
+        self.assertEqual(self.sent(), [{"ack": "testuser1-1"}] * 2)
+
+    async def test_resend_is_handled_after_a_failure(self):
+        message = json.dumps({"id": "testuser1-1", "force_next": "_"})
+        self.consumer.handle_message.side_effect = [RuntimeError, None]
+        with self.assertRaises(RuntimeError):
+            await self.consumer.receive(message)
+        self.assertEqual(self.sent(), [])
+        await self.consumer.receive(message)
+        self.assertEqual(self.consumer.handle_message.await_count, 2)
+        self.assertEqual(self.sent(), [{"ack": "testuser1-1"}])
+
+    async def test_records_acks_and_ignores_malformed_ones(self):
+        for ack in [3, None, "3", "three", True, [3]]:
+            await self.consumer.receive(json.dumps({"ack": ack}))
+        self.assertEqual(await self.consumer.store.unacked_channels(1, 3), [])
+        self.assertEqual(await self.consumer.store.unacked_channels(1, 4), ["channel1"])
+        self.consumer.handle_message.assert_not_awaited()
+
+
+@override_settings(CHANNEL_LAYERS=LAYERS)
+class TestGameConsumerRound(TripleTest):
+    """
+    Over websockets, each submission should be acknowledged and recorded
+    once however often it is resent, and once every player has submitted,
+    the owner's scheduler should broadcast the vote view to all players.
+    """
+
+    async def connect(self, player):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), "/ws/testgame/play/"
+        )
+        communicator.scope["cookies"] = {"testgame": player.name}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(json.loads(await communicator.receive_from())["progress"], 1)
+        return communicator
+
+    async def submit(self, communicator, player, text):
+        message_id = f"{player.name}-1"
+        await communicator.send_to(
+            json.dumps(
+                {"submission": {"name": player.name, "text": text}, "id": message_id}
+            )
+        )
+        self.assertEqual(
+            json.loads(await communicator.receive_from()), {"ack": message_id}
+        )
+
+    async def test_submissions_are_acked_then_vote_is_broadcast(self):
+        await self.set_game_progress(1)
+        store = LocalGameStore()
+        players = [self.user1, self.user2, self.user3]
+        with mock.patch("basicgame.consumers.get_game_store", return_value=store):
+            communicators = [await self.connect(player) for player in players]
+        add_input = mock.AsyncMock(wraps=store.add_input)
+        with mock.patch.object(store, "add_input", add_input):
+            await self.submit(communicators[0], players[0], "_pets")
+            # a resend is acknowledged again but not recorded again
+            await self.submit(communicators[0], players[0], "_pets")
+            await self.submit(communicators[1], players[1], "dog")
+            await self.submit(communicators[2], players[2], "cat")
+            for communicator in communicators:
+                message = json.loads(await communicator.receive_from(timeout=3))
+                self.assertEqual((message["view"], message["progress"]), ("vote", 2))
+                await communicator.send_to(json.dumps({"ack": 2}))
+        self.assertEqual(add_input.await_count, 3)
+        state = await store.load(self.test_game.pk)
+        self.assertEqual(
+            (state.category, state.character_list), ("pets", ["dog", "cat"])
+        )
+        for communicator in communicators:
+            await communicator.disconnect()
+        scheduler = get_round_scheduler(self.test_game.pk, store, get_channel_layer())
+        await scheduler.broadcast.stop()
@@ -0,0 +1,75 @@
+import random
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from basicgame.game_names import NameAllocator
+from basicgame.tests.unit.base import TripleTest
+
+words = ["panda_button", "impala_dance", "turtle_print", "alpaca_sort"]
+
+
+class TestNameAllocator(SimpleTestCase):
+    """
+    NameAllocator should hand out each free name once until its reservation
+    expires or is released, skip names used by live games, and compound
+    names once the pool runs low.
+    """
+
+    def allocator(self, taken=(), **kwargs):
+        return NameAllocator(
+            words, is_taken=lambda name: name in taken, rng=random.Random(1), **kwargs
+        )
+
+    def test_names_are_not_handed_out_twice(self):
+        allocator = self.allocator()
+        names = [allocator.allocate() for _ in words]
+        self.assertEqual(sorted(names), sorted(words))
+
+    def test_taken_names_are_skipped(self):
+        allocator = self.allocator(taken={"panda_button", "impala_dance"})
+        names = {allocator.allocate(), allocator.allocate()}
+        self.assertEqual(names, {"turtle_print", "alpaca_sort"})
+
+    def test_compound_names_when_pool_runs_low(self):
+        allocator = self.allocator(taken=set(words))
+        name = allocator.allocate()
+        self.assertNotIn(name, words)
+        self.assertEqual(len(name.split("_")), 3)
+        self.assertIn("_".join(name.split("_")[:2]), words)
+
+    def test_gives_up_rather_than_looping_forever(self):
+        allocator = NameAllocator(["panda_button"], is_taken=lambda name: True)
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+
+    def test_empty_pool_raises(self):
+        allocator = NameAllocator(["", ""], is_taken=lambda name: False)
+        with self.assertRaises(RuntimeError):
+            allocator.allocate()
+        with self.assertRaises(RuntimeError):
+            allocator.compound_name()
+
+    def test_expired_and_released_names_are_reused(self):
+        allocator = self.allocator(reservation=0)
+        first = [allocator.allocate() for _ in words]
+        time.sleep(0.01)
+        self.assertIn(allocator.allocate(), first)
+        allocator = self.allocator()
+        names = [allocator.allocate() for _ in words]
+        allocator.release(names[0])
+        self.assertEqual(allocator.allocate(), names[0])
+
+
+class TestHostPage(TripleTest):
+    """The host page should offer a free name without scanning all games."""
+
+    @override_settings(
+        STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+    def test_host_page_offers_free_name(self):
+        allocator = NameAllocator([])
+        allocator.words = ["testgame", "panda_button"]
+        with mock.patch("basicgame.views.get_name_allocator", return_value=allocator):
+            with self.assertNumQueries(2):
+                response = self.client.get("/host")
+        self.assertEqual(response.context["game_name"], "panda_button")
@@ -0,0 +1,65 @@
+from channels.db import database_sync_to_async  # type: ignore
+from basicgame.models import Game
+from basicgame.game_registry import GameRegistry, get_game_registry
+from basicgame.utils import delete_game_if_finished
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestGameRegistry(TripleTest):
+    """
+    GameRegistry should read a game's details from the db once, share them
+    between callers, evict the least recently used game when full, and drop
+    games when they are deleted.
+    """
+
+    @database_sync_to_async
+    def create_game(self, name):
+        Game.objects.create(name=name, cycles=1, boring=True, host="", progress=0)
+
+    async def test_loads_game_details(self):
+        info = await GameRegistry().get("testgame")
+        self.assertEqual(info.game_id, self.test_game.pk)
+        self.assertEqual(info.cycles, 4)
+        self.assertFalse(info.boring)
+        self.assertEqual(len(info.players), 3)
+        self.assertEqual(info.sequence.view_at(1), "testuser112345678")
+
+    async def test_same_entry_shared_between_callers(self):
+        registry = GameRegistry()
+        info = await registry.get("testgame")
+        await self.set_game_progress(3)
+        self.assertIs(await registry.get("testgame"), info)
+        self.assertIs(registry.get_cached(self.test_game.pk), info)
+
+    async def test_refresh_reloads_entry(self):
+        registry = GameRegistry()
+        info = await registry.get("testgame")
+        self.assertIsNot(await registry.get("testgame", refresh=True), info)
+
+    async def test_least_recently_used_game_is_evicted(self):
+        registry = GameRegistry(maxsize=2)
+        await self.create_game("othergame")
+        await self.create_game("thirdgame")
+        await registry.get("testgame")
+        await registry.get("othergame")
+        await registry.get("testgame")
+        await registry.get("thirdgame")
+        self.assertEqual(list(registry._games), ["testgame", "thirdgame"])
+
+    async def test_roster_updates(self):
+        registry = GameRegistry()
+        await registry.get("testgame")
+        registry.add_player(self.test_game.pk, "testuser412345678")
+        registry.remove_player(self.test_game.pk, "testuser112345678")
+        info = registry.get_cached(self.test_game.pk)
+        self.assertEqual(
+            info.players,
+            ("testuser212345678", "testuser312345678", "testuser412345678"),
+        )
+
+    async def test_deleted_game_is_invalidated(self):
+        registry = get_game_registry()
+        await registry.get("testgame")
+        await self.set_game_progress(61)
+        self.assertTrue(await delete_game_if_finished(self.test_game.pk))
+        self.assertIsNone(registry.get_cached(self.test_game.pk))
@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+from basicgame.game_sequence import GameSequence, get_game_sequence
+
+
+class TestGameSequence(SimpleTestCase):
+    """
+    GameSequence should compute the view at any progress index, the index
+    of the next round and the total number of views from the players,
+    cycles and mode alone.
+    """
+
+    players = ("testuser1", "testuser2", "testuser3")
+
+    def test_view_at_basic(self):
+        sequence = GameSequence(self.players, 2, False)
+        self.assertEqual(sequence.view_at(0), "lobby")
+        self.assertEqual(sequence.view_at(1), "testuser1")
+        self.assertEqual(sequence.view_at(2), "vote")
+        self.assertEqual(sequence.view_at(5), "leaderboard")
+        self.assertEqual(sequence.view_at(11), "testuser3")
+        self.assertEqual(sequence.view_at(16), "testuser1")
+        self.assertEqual(sequence.view_at(31), "finish")
+
+    def test_view_at_boring(self):
+        sequence = GameSequence(self.players, 1, True)
+        self.assertEqual(sequence.view_at(1), "boring_testuser1")
+        self.assertEqual(sequence.view_at(2), "character")
+        self.assertEqual(sequence.view_at(3), "vote")
+        self.assertEqual(sequence.view_at(13), "boring_testuser3")
+        self.assertEqual(sequence.view_at(19), "finish")
+
+    def test_total_views_and_bounds(self):
+        sequence = GameSequence(self.players, 4, False)
+        self.assertEqual(sequence.total_views, 61)
+        self.assertEqual(len(sequence), 62)
+        with self.assertRaises(IndexError):
+            sequence.view_at(62)
+
+    def test_next_round_index(self):
+        sequence = GameSequence(self.players, 1, False)
+        self.assertEqual(sequence.next_round_index(0), 1)
+        self.assertEqual(sequence.next_round_index(1), 6)
+        self.assertEqual(sequence.next_round_index(5), 6)
+        self.assertEqual(sequence.next_round_index(13), 16)
+        self.assertEqual(sequence.next_round_index(16), None)
+
+    def test_next_round_index_boring(self):
+        sequence = GameSequence(self.players, 1, True)
+        self.assertEqual(sequence.next_round_index(2), 7)
+        self.assertEqual(sequence.next_round_index(14), 19)
+
+    def test_sequences_are_shared(self):
+        self.assertIs(
+            get_game_sequence(self.players, 4, False),
+            get_game_sequence(self.players, 4, False),
+        )
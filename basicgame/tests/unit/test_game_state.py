@@ -0,0 +1,392 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+from channels.db import database_sync_to_async  # type: ignore
+from basicgame.game_state import GameState, LocalGameStore, RedisGameStore
+from basicgame.models import Submission, Vote
+from basicgame.tests.unit.base import TripleTest, hash_database_async
+
+try:
+    from fakeredis import FakeAsyncRedis  # type: ignore
+except ImportError:
+    FakeAsyncRedis = None
+
+
+class TestGameState(TripleTest):
+    """
+    GameState holds a live game in memory and implements the game
+    logic on it without touching the db.
+    """
+
+    def test_loads_game_from_db(self):
+        state = GameState.from_db(self.test_game.pk)
+        self.assertEqual(state.name, "testgame")
+        self.assertEqual(state.progress, 0)
+        self.assertEqual(
+            state.players,
+            ["testuser112345678", "testuser212345678", "testuser312345678"],
+        )
+        self.assertEqual(state.view, "lobby")
+        self.assertEqual(state.sequence[1], "testuser112345678")
+
+    def test_asterisks_added_upon_duplication(self):
+        state = GameState.from_db(self.test_game.pk)
+        state.add_input("testuser212345678", "submission", "dog")
+        state.add_input("testuser312345678", "submission", "dog")
+        self.assertEqual(state.submissions["testuser312345678"], "dog*")
+        self.assertEqual(state.character_list, ["dog", "dog*"])
+
+    def test_round_index_follows_changed_and_cleared_inputs(self):
+        state = GameState.from_db(self.test_game.pk)
+        state.add_input("testuser112345678", "submission", "_pets")
+        state.add_input("testuser212345678", "submission", "dog")
+        # changing a submission stops it counting as a duplicate
+        state.add_input("testuser212345678", "submission", "cat")
+        self.assertEqual(state.submission_counts, {"_pets": 1, "cat": 1})
+        state.add_player("testuser412345678")
+        self.assertFalse(state.add_input("testuser312345678", "submission", "dog"))
+        self.assertTrue(state.add_input("testuser412345678", "submission", "dog"))
+        self.assertEqual(state.submissions["testuser412345678"], "dog*")
+        state.reset_round()
+        self.assertFalse(state.add_input("testuser312345678", "submission", "dog"))
+        self.assertEqual(state.submissions["testuser312345678"], "dog")
+
+    def test_round_index_is_rebuilt_from_loaded_inputs(self):
+        state = GameState(
+            self.test_game.pk,
+            "testgame",
+            4,
+            False,
+            1,
+            ["a", "b", "c"],
+            submissions={"a": "_pets", "b": "dog"},
+            votes={"a": "{}"},
+        )
+        self.assertEqual(state.missing, {"submission": {"c"}, "votes": {"b", "c"}})
+        self.assertTrue(state.add_input("c", "submission", "dog"))
+        self.assertEqual(state.submissions["c"], "dog*")
+
+    def test_advance_only_moves_to_next_view(self):
+        state = GameState.from_db(self.test_game.pk)
+        state.progress = 1
+        self.assertEqual(state.advance("winner"), 1)
+        self.assertEqual(state.advance("vote"), 2)
+        self.assertEqual(state.advance("vote"), 2)
+        state.progress = 5
+        self.assertEqual(state.advance("submission"), 6)
+        self.assertEqual(state.advance("submission"), 6)
+
+    def test_add_player_rebuilds_sequence(self):
+        state = GameState.from_db(self.test_game.pk)
+        state.add_player("testuser412345678")
+        self.assertIn("testuser412345678", state.sequence)
+        self.assertEqual(len(state.sequence), 4 * 5 * 4 + 2)
+
+    def test_next_round(self):
+        state = GameState.from_db(self.test_game.pk)
+        state.progress = 2
+        self.assertEqual(state.next_round(), 6)
+
+
+class GameStoreTests:
+    """
+    Behaviour shared by every game store. Subclasses provide make_store.
+    Stores mutate games without touching the db, and write through
+    to the db on flush.
+    """
+
+    @property
+    def players(self):
+        return [self.user1, self.user2, self.user3]
+
+    @database_sync_to_async
+    def count_rows(self, model):
+        return model.objects.filter(game=self.test_game).count()
+
+    async def make_store(self):
+        raise NotImplementedError
+
+    async def test_loads_game_from_db(self):
+        store = await self.make_store()
+        state = await store.load(self.test_game.pk)
+        self.assertEqual(state.name, "testgame")
+        self.assertEqual(state.progress, 0)
+        self.assertEqual(len(state.players), 3)
+        self.assertEqual(state.view, "lobby")
+
+    async def test_add_input_does_not_touch_db(self):
+        store = await self.make_store()
+        await store.load(self.test_game.pk)
+        hash1 = await hash_database_async()
+        await store.add_input(self.test_game.pk, self.user1.name, "submission", "_a")
+        hash2 = await hash_database_async()
+        self.assertEqual(hash1, hash2)
+
+    async def test_add_input_returns_true_once_all_players_submitted(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        self.assertFalse(
+            await store.add_input(game_id, self.user1.name, "submission", "_pets")
+        )
+        self.assertFalse(
+            await store.add_input(game_id, self.user2.name, "submission", "dog")
+        )
+        self.assertTrue(
+            await store.add_input(game_id, self.user3.name, "submission", "dog")
+        )
+        state = await store.load(game_id)
+        self.assertEqual(sorted(state.character_list), ["dog", "dog*"])
+        self.assertEqual(state.category, "pets")
+        self.assertTrue(state.enough_submissions)
+
+    async def test_only_exact_duplicates_get_asterisks(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.add_input(game_id, self.user1.name, "submission", "dog")
+        await store.add_input(game_id, self.user2.name, "submission", "do")
+        await store.add_input(game_id, self.user3.name, "submission", "dog")
+        state = await store.load(game_id)
+        self.assertEqual(sorted(state.character_list), ["do", "dog", "dog*"])
+
+    async def test_advance_and_change_progress(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        self.assertTrue(await store.advance(game_id, "submission"))
+        self.assertFalse(await store.advance(game_id, "submission"))
+        self.assertTrue(await store.advance(game_id, "vote"))
+        self.assertEqual((await store.load(game_id)).progress, 2)
+        await store.change_progress(game_id, 6)
+        self.assertEqual((await store.load(game_id)).view, "testuser212345678")
+
+    async def test_only_one_of_two_racing_callers_advances(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 2)
+        won = await asyncio.gather(
+            store.advance(game_id, "winner"), store.advance(game_id, "winner")
+        )
+        self.assertEqual(sorted(won), [False, True])
+        self.assertEqual((await store.load(game_id)).progress, 3)
+
+    async def test_advance_loses_to_a_transition_made_after_its_read(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 2)
+        load = store.load
+        raced = []
+
+        async def load_then_race(game_id):
+            state = await load(game_id)
+            if not raced:
+                # another caller advances between this read and its write
+                raced.append(None)
+                raced[0] = await store.advance(game_id, "winner")
+            return state
+
+        with mock.patch.object(store, "load", load_then_race):
+            self.assertFalse(await store.advance(game_id, "winner"))
+        self.assertEqual(raced, [True])
+        self.assertEqual((await store.load(game_id)).progress, 3)
+
+    async def test_racing_change_progress_from_the_same_expected_progress(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 3)
+        won = await asyncio.gather(
+            store.change_progress(game_id, 6, expected=3),
+            store.change_progress(game_id, 11, expected=3),
+        )
+        self.assertEqual(sorted(won), [False, True])
+        progress = (await store.load(game_id)).progress
+        self.assertEqual(progress, 6 if won[0] else 11)
+
+    async def test_change_progress_only_from_expected_progress(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 3)
+        self.assertFalse(await store.change_progress(game_id, 6, expected=2))
+        self.assertTrue(await store.change_progress(game_id, 6, expected=3))
+        self.assertEqual((await store.load(game_id)).progress, 6)
+
+    async def test_flush_never_moves_db_progress_back(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 3)
+        await self.set_game_progress(7)
+        await store.flush(game_id)
+        self.assertEqual(await self.get_game_progress(), 7)
+
+    async def test_add_player(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.add_player(game_id, "testuser412345678")
+        await store.add_player(game_id, "testuser412345678")
+        state = await store.load(game_id)
+        self.assertEqual(len(state.players), 4)
+        self.assertEqual(state.points["testuser412345678"], 0)
+
+    async def test_points_and_reset(self):
+        await self.seed_db()
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        scores = (await store.load(game_id)).average_scores()
+        self.assertEqual(scores, {"dog": 60, "cat": 40})
+        await store.apply_points(game_id, {self.user2.name: 1, "left": 3})
+        await store.apply_points(game_id, {self.user2.name: 2})
+        state = await store.load(game_id)
+        self.assertEqual(state.points[self.user2.name], 3)
+        self.assertEqual(state.points[self.user3.name], 0)
+        self.assertNotIn("left", state.points)
+        await store.reset_round(game_id)
+        state = await store.load(game_id)
+        self.assertFalse(state.enough_votes)
+        self.assertEqual(state.category, None)
+
+    async def test_flush_writes_through_to_db(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.add_input(game_id, self.user1.name, "submission", "_pets")
+        await store.add_input(game_id, self.user2.name, "submission", "dog")
+        await store.change_progress(game_id, 2)
+        await store.flush(game_id)
+        self.assertEqual(await self.get_game_progress(), 2)
+        self.assertEqual(await self.get_submission(self.user1.name), "_pets")
+        self.assertEqual(await self.get_submission(self.user2.name), "dog")
+        await store.reset_round(game_id)
+        await store.change_progress(game_id, 6)
+        await store.flush(game_id)
+        self.assertEqual(await self.get_submission(self.user2.name), None)
+
+    async def test_flush_writes_each_round_input_once(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        for player, submission in zip(self.players, ["_pets", "dog", "cat"]):
+            await store.add_input(game_id, player.name, "submission", submission)
+        await store.change_progress(game_id, 2)
+        await store.flush(game_id)
+        self.assertEqual(await self.count_rows(Submission), 3)
+        self.assertEqual(await self.count_rows(Vote), 0)
+        vote = '{"vote":{"voteData":{"characterScores":{"dog":"80","cat":"20"}}}}'
+        for player in self.players:
+            await store.add_input(game_id, player.name, "votes", vote)
+        await store.change_progress(game_id, 3)
+        await store.flush(game_id)
+        self.assertEqual(await self.count_rows(Vote), 6)
+        await store.change_progress(game_id, 4)
+        await store.flush(game_id, points={self.user2.name: 1})
+        await store.change_progress(game_id, 5)
+        await store.flush(game_id)
+        self.assertEqual(await self.get_points(self.user2.name), 1)
+        self.assertEqual(await self.count_rows(Submission), 3)
+        self.assertEqual(await self.count_rows(Vote), 6)
+
+    async def test_discard(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.change_progress(game_id, 3)
+        await store.discard(game_id)
+        self.assertEqual((await store.load(game_id)).progress, 0)
+
+    async def test_first_claimant_owns_game_until_released(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        self.assertEqual(await store.claim_owner(game_id, "channel1"), "channel1")
+        self.assertEqual(await store.claim_owner(game_id, "channel2"), "channel1")
+        await store.release_owner(game_id, "channel2")
+        self.assertEqual(await store.claim_owner(game_id, "channel2"), "channel1")
+        await store.release_owner(game_id, "channel1")
+        self.assertEqual(await store.claim_owner(game_id, "channel2"), "channel2")
+
+    async def test_unacked_channels(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.record_ack(game_id, "channel1", -1)
+        await store.record_ack(game_id, "channel2", 3)
+        await store.record_ack(game_id, "channel2", 2)
+        self.assertEqual(await store.unacked_channels(game_id, 3), ["channel1"])
+        await store.remove_channel(game_id, "channel1")
+        self.assertEqual(await store.unacked_channels(game_id, 3), [])
+        self.assertEqual(await store.unacked_channels(game_id, 4), ["channel2"])
+
+    async def test_mark_message_rejects_duplicates(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        self.assertTrue(await store.mark_message(game_id, "testuser1-1"))
+        self.assertFalse(await store.mark_message(game_id, "testuser1-1"))
+        self.assertTrue(await store.mark_message(game_id, "testuser1-2"))
+        await store.unmark_message(game_id, "testuser1-1")
+        self.assertTrue(await store.mark_message(game_id, "testuser1-1"))
+
+
+class TestLocalGameStore(GameStoreTests, TripleTest):
+    async def make_store(self):
+        return LocalGameStore()
+
+    async def test_same_object_shared_between_callers(self):
+        store = await self.make_store()
+        state = await store.load(self.test_game.pk)
+        self.assertIs(await store.load(self.test_game.pk), state)
+
+    async def test_only_latest_message_ids_are_kept(self):
+        store = LocalGameStore(max_message_ids=2)
+        game_id = self.test_game.pk
+        for message_id in ["testuser1-1", "testuser1-2", "testuser1-3"]:
+            self.assertTrue(await store.mark_message(game_id, message_id))
+        self.assertFalse(await store.mark_message(game_id, "testuser1-3"))
+        self.assertTrue(await store.mark_message(game_id, "testuser1-1"))
+        self.assertTrue(await store.mark_message(game_id, "testuser1-2"))
+
+
+@unittest.skipUnless(
+    os.getenv("REDIS_TEST_URL") or FakeAsyncRedis,
+    "needs REDIS_TEST_URL (a local redis-server) or fakeredis",
+)
+class TestRedisGameStore(GameStoreTests, TripleTest):
+    async def make_store(self):
+        if os.getenv("REDIS_TEST_URL"):
+            store = RedisGameStore.from_url(os.environ["REDIS_TEST_URL"])
+        else:
+            store = RedisGameStore(FakeAsyncRedis(decode_responses=True))
+        # game ids are reused between tests, so clear any leftover keys
+        await store.discard(self.test_game.pk)
+        return store
+
+    async def test_keys_recreated_after_reset_expire(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        await store.load(game_id)
+        await store.reset_round(game_id)
+        await store.add_input(game_id, self.user1.name, "votes", "{}")
+        await store.add_category(game_id, self.user1.name, "_pets")
+        keys = store.keys(game_id)
+        for key in (keys["submissions"], keys["votes"]):
+            self.assertGreater(await store.client.ttl(key), 0)
+
+    async def test_every_write_reapplies_the_ttl(self):
+        store = await self.make_store()
+        game_id = self.test_game.pk
+        keys = store.keys(game_id)
+        await store.load(game_id)
+        await store.record_ack(game_id, "channel1", 0)
+        await store.record_ack(game_id, "channel2", 0)
+        await store.mark_message(game_id, "testuser1-1")
+        await store.mark_message(game_id, "testuser1-2")
+        writes = [
+            (store.change_progress(game_id, 1), [keys["meta"]]),
+            (store.change_progress(game_id, 2, expected=1), [keys["meta"]]),
+            (store.advance(game_id, "winner"), [keys["meta"]]),
+            (store.apply_points(game_id, {self.user1.name: 1}), [keys["points"]]),
+            (
+                store.add_player(game_id, "testuser4"),
+                [keys[field] for field in ["meta", "players", "points"]],
+            ),
+            (store.remove_channel(game_id, "channel1"), [keys["acks"]]),
+            (store.unmark_message(game_id, "testuser1-1"), [keys["messages"]]),
+        ]
+        for write, written in writes:
+            for key in written:
+                await store.client.persist(key)
+            await write
+            for key in written:
+                self.assertGreater(await store.client.ttl(key), 0, key)
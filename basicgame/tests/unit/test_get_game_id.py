@@ -0,0 +1,23 @@
+from basicgame.models import Game
+from basicgame.utils import get_game_id, get_game_progress
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestGetGameId(TripleTest):
+    """
+    get_game_id should take a game name and return its primary key, and
+    get_game_progress its progress. Both raise if the game does not exist.
+    """
+
+    async def test_returns_primary_key(self):
+        self.assertEqual(await get_game_id("testgame"), self.test_game.pk)
+
+    async def test_returns_progress(self):
+        await self.set_game_progress(7)
+        self.assertEqual(await get_game_progress(self.test_game.pk), 7)
+
+    async def test_raises_for_unknown_game(self):
+        with self.assertRaises(Game.DoesNotExist):
+            await get_game_id("nogame")
+        with self.assertRaises(Game.DoesNotExist):
+            await get_game_progress(self.test_game.pk + 100)
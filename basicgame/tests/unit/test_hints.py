@@ -0,0 +1,71 @@
+import json
+import tempfile
+from pathlib import Path
+from django.test import SimpleTestCase, override_settings
+from basicgame.hints import HintCorpus, get_hints
+
+
+class TestHintCorpus(SimpleTestCase):
+    """
+    HintCorpus should hold the hints as stripped, immutable tuples, and
+    fingerprint its payload so that any change to the hints changes it.
+    """
+
+    def write_corpus(self, directory, characters):
+        Path(directory, "categories.txt").write_text("speed\nagility\n\n")
+        Path(directory, "characters.txt").write_text(characters)
+        return HintCorpus.from_directory(Path(directory))
+
+    def test_hints_are_stripped_tuples(self):
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = self.write_corpus(directory, "a cat\nthe moon")
+        self.assertEqual(corpus.categories, ("speed", "agility"))
+        self.assertEqual(corpus.characters, ("a cat", "the moon"))
+        self.assertEqual(
+            json.loads(corpus.payload),
+            {"categories": ["speed", "agility"], "characters": ["a cat", "the moon"]},
+        )
+
+    def test_version_changes_with_hints(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = self.write_corpus(directory, "a cat\n")
+            second = self.write_corpus(directory, "a dog\n")
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(len(first.version), 12)
+
+
+class TestHintsView(SimpleTestCase):
+    """
+    The hints endpoint should serve the corpus with a strong ETag and a year
+    long immutable Cache-Control, answer revalidations with 304, and send
+    requests for other versions to the current url.
+    """
+
+    def test_serves_cacheable_corpus(self):
+        corpus = get_hints()
+        url = f"/hints/{corpus.version}.json"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, corpus.payload)
+        self.assertEqual(response["ETag"], f'"{corpus.version}"')
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{corpus.version}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_old_versions_redirect(self):
+        response = self.client.get("/hints/000000000000.json")
+        self.assertRedirects(
+            response,
+            f"/hints/{get_hints().version}.json",
+            fetch_redirect_response=False,
+        )
+
+    @override_settings(
+        STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+    )
+    def test_home_page_links_hints_instead_of_inlining(self):
+        response = self.client.get("/")
+        self.assertContains(response, f"/hints/{get_hints().version}.json")
+        self.assertNotContains(response, get_hints().characters[0])
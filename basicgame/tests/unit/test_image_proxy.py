@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from PIL import Image
+from basicgame.image_proxy import ImageProxy
+
+
+def make_png(width=800, height=600, colour="red"):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), colour).save(output, format="PNG")
+    return output.getvalue()
+
+
+def mock_response(data):
+    response = mock.Mock()
+    response.raw.read.return_value = data
+    return response
+
+
+class TestImageProxy(SimpleTestCase):
+    """
+    ImageProxy should fetch a registered image once, resize it to a
+    thumbnail stored under the hash of its content, serve unknown keys
+    nothing, and evict least recently used thumbnails over its size limit
+    together with their refs. Nothing it keeps per key should outlive it.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.proxy = ImageProxy(self.directory.name, size=100)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fetches_and_resizes_once(self):
+        key = self.proxy.register("https://images.test/dog.png")
+        with mock.patch(
+            "basicgame.image_proxy.requests.get", return_value=mock_response(make_png())
+        ) as get:
+            digest, data = self.proxy.get(key)
+            self.assertEqual(self.proxy.get(key), (digest, data))
+        self.assertEqual(get.call_count, 1)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (100, 75))
+
+    def test_unregistered_keys_are_not_fetched(self):
+        with mock.patch("basicgame.image_proxy.requests.get") as get:
+            self.assertIsNone(self.proxy.get("a" * 64))
+            self.assertIsNone(self.proxy.get("../../etc/passwd"))
+        get.assert_not_called()
+
+    def test_invalid_images_are_not_cached(self):
+        key = self.proxy.register("https://images.test/broken.png")
+        with mock.patch(
+            "basicgame.image_proxy.requests.get", return_value=mock_response(b"html")
+        ):
+            self.assertIsNone(self.proxy.get(key))
+
+    def test_least_recently_used_thumbnails_are_evicted(self):
+        keys = [
+            self.proxy.register(f"https://images.test/{colour}.png")
+            for colour in ["red", "green"]
+        ]
+        digests = []
+        for key, colour in zip(keys, ["red", "green"]):
+            with mock.patch(
+                "basicgame.image_proxy.requests.get",
+                return_value=mock_response(make_png(colour=colour)),
+            ):
+                digest, data = self.proxy.get(key)
+                digests.append(digest)
+        os.utime(self.proxy.directory / "blobs" / digests[0], (1, 1))
+        self.proxy.max_bytes = len(data)
+        self.proxy.evict()
+        blobs = list((self.proxy.directory / "blobs").iterdir())
+        self.assertEqual([blob.name for blob in blobs], [digest])
+        refs = sorted(ref.name for ref in (self.proxy.directory / "refs").iterdir())
+        self.assertEqual(refs, [f"{keys[1]}.ref", f"{keys[1]}.url"])
+        self.assertIsNone(self.proxy.get(keys[0]))
+
+    def test_unfetched_registrations_are_evicted_when_old(self):
+        stale = self.proxy.register("https://images.test/stale.png")
+        fresh = self.proxy.register("https://images.test/fresh.png")
+        os.utime(self.proxy.directory / "refs" / f"{stale}.url", (1, 1))
+        self.proxy.evict()
+        refs = [ref.name for ref in (self.proxy.directory / "refs").iterdir()]
+        self.assertEqual(refs, [f"{fresh}.url"])
+
+    def test_locks_are_dropped_once_released(self):
+        key = self.proxy.register("https://images.test/dog.png")
+        with mock.patch(
+            "basicgame.image_proxy.requests.get", return_value=mock_response(b"html")
+        ):
+            self.proxy.get(key)
+        self.assertEqual(self.proxy._locks, {})
+
+    async def test_registers_off_the_event_loop(self):
+        url = "https://images.test/dog.png"
+        self.assertEqual(await self.proxy.aregister(url), self.proxy.register(url))
+
+
+class TestImageView(SimpleTestCase):
+    """
+    The image endpoint should serve thumbnails with a strong ETag, answer
+    matching revalidations with 304 and unknown keys with 404.
+    """
+
+    def test_serves_thumbnail_with_etag(self):
+        proxy = mock.Mock()
+        proxy.get.return_value = ("abc123", b"jpeg bytes")
+        with mock.patch("basicgame.views.get_image_proxy", return_value=proxy):
+            response = self.client.get("/images/" + "a" * 64)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["ETag"], '"abc123"')
+            self.assertEqual(response["Content-Type"], "image/jpeg")
+            self.assertEqual(response.content, b"jpeg bytes")
+            response = self.client.get(
+                "/images/" + "a" * 64, HTTP_IF_NONE_MATCH='"abc123"'
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+
+    def test_unknown_key_is_not_found(self):
+        proxy = mock.Mock()
+        proxy.get.return_value = None
+        with mock.patch("basicgame.views.get_image_proxy", return_value=proxy):
+            self.assertEqual(self.client.get("/images/unknown").status_code, 404)
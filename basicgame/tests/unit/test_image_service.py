@@ -0,0 +1,158 @@
+import asyncio
+import time
+from django.test import SimpleTestCase
+from basicgame.images import (
+    CircuitBreaker,
+    DailyQuota,
+    ImageProvider,
+    ImageService,
+    OfflineImageProvider,
+)
+
+
+class CountingProvider(ImageProvider):
+    """Provider that counts searches, optionally sleeping or failing."""
+
+    def __init__(self, delay=0.0, error=False):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    def search(self, query):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError("quota exceeded")
+        return f"https://images.test/{query}.png"
+
+
+class TestImageService(SimpleTestCase):
+    """
+    ImageService should resolve queries through its provider off the event
+    loop, merge concurrent lookups, cache results and never raise.
+    """
+
+    def test_offline_provider_returns_placeholder(self):
+        url = OfflineImageProvider().search("dog face")
+        self.assertTrue(url.startswith("data:image/svg+xml,"))
+        self.assertIn("dog%20face", url)
+
+    def test_provider_without_search_cannot_be_created(self):
+        class IncompleteProvider(ImageProvider):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteProvider()
+
+    async def test_results_are_cached(self):
+        provider = CountingProvider()
+        service = ImageService(provider)
+        self.assertEqual(await service.resolve("dog"), "https://images.test/dog.png")
+        self.assertEqual(await service.resolve("dog"), "https://images.test/dog.png")
+        self.assertEqual(provider.calls, 1)
+
+    async def test_concurrent_lookups_share_one_search(self):
+        provider = CountingProvider(delay=0.05)
+        service = ImageService(provider)
+        urls = await asyncio.gather(*(service.resolve("cat") for _ in range(5)))
+        self.assertEqual(set(urls), {"https://images.test/cat.png"})
+        self.assertEqual(provider.calls, 1)
+
+    async def test_slow_search_times_out(self):
+        service = ImageService(CountingProvider(delay=0.2), timeout=0.01)
+        started = time.monotonic()
+        self.assertIsNone(await service.resolve("dog"))
+        self.assertLess(time.monotonic() - started, 0.15)
+
+    async def test_failures_return_none_and_are_cached_briefly(self):
+        provider = CountingProvider(error=True)
+        service = ImageService(provider, failure_ttl=60)
+        self.assertIsNone(await service.resolve("dog"))
+        self.assertIsNone(await service.resolve("dog"))
+        self.assertEqual(provider.calls, 1)
+
+    async def test_expired_results_are_searched_again(self):
+        provider = CountingProvider()
+        service = ImageService(provider, ttl=0)
+        await service.resolve("dog")
+        await service.resolve("dog")
+        self.assertEqual(provider.calls, 2)
+
+    async def test_least_recently_used_query_is_evicted(self):
+        service = ImageService(CountingProvider(), maxsize=2)
+        for query in ["dog", "cat", "dog", "owl"]:
+            await service.resolve(query)
+        self.assertEqual(list(service._cache), ["dog", "owl"])
+
+    async def test_prefetched_queries_are_not_searched_again(self):
+        provider = CountingProvider(delay=0.01)
+        service = ImageService(provider)
+        service.prefetch(["dog", "cat", "dog"])
+        self.assertEqual(await service.resolve("dog"), "https://images.test/dog.png")
+        await asyncio.gather(*service._prefetches)
+        await service.resolve("cat")
+        self.assertEqual(provider.calls, 2)
+
+    async def test_prefetch_can_be_disabled(self):
+        provider = CountingProvider()
+        service = ImageService(provider, prefetch=False)
+        service.prefetch(["dog"])
+        await asyncio.sleep(0.01)
+        self.assertEqual(provider.calls, 0)
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    """
+    The image service should stop calling a failing provider once its
+    circuit trips, try again after the reset timeout, and stop calling
+    once the daily quota is used, returning None immediately instead.
+    """
+
+    async def test_circuit_trips_after_failures(self):
+        provider = CountingProvider(error=True)
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, reset_timeout=60)
+        service = ImageService(provider, breaker=breaker)
+        for query in ["a", "b", "c", "d"]:
+            self.assertIsNone(await service.resolve(query))
+        self.assertEqual(provider.calls, 2)
+        stats = service.stats()
+        self.assertEqual(stats["trips"], 1)
+        self.assertEqual(stats["short_circuits"], 2)
+        self.assertEqual(stats["failures"], 2)
+        self.assertTrue(stats["circuit_open"])
+
+    async def test_trial_call_closes_circuit(self):
+        provider = CountingProvider(error=True)
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0)
+        service = ImageService(provider, breaker=breaker)
+        await service.resolve("a")
+        self.assertEqual(breaker.state, "open")
+        provider.error = False
+        self.assertEqual(await service.resolve("b"), "https://images.test/b.png")
+        self.assertEqual(breaker.state, "closed")
+
+    async def test_failed_trial_reopens_circuit(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0)
+        service = ImageService(CountingProvider(error=True), breaker=breaker)
+        await service.resolve("a")
+        await service.resolve("b")
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.trips, 2)
+
+    async def test_quota_stops_searches(self):
+        provider = CountingProvider()
+        service = ImageService(provider, quota=DailyQuota(2))
+        for query in ["a", "b", "c"]:
+            await service.resolve(query)
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual(service.stats()["over_quota"], 1)
+        self.assertEqual(service.stats()["quota_used"], 2)
+
+    async def test_metrics_count_hits_and_misses(self):
+        service = ImageService(CountingProvider())
+        await service.resolve("a")
+        await service.resolve("a")
+        stats = service.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["searches"], 1)
+        self.assertGreaterEqual(stats["mean_latency"], 0)
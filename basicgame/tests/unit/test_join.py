@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from basicgame.models import Game, Player
+from basicgame.tests.unit.base import TripleTest
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class TestJoin(TripleTest):
+    """
+    Join should add players to games in the lobby, reject taken nicknames
+    and started games, let players rejoin a started game they are in, and
+    make the same number of queries however many players are in the db.
+    """
+
+    def join(self, player_name, game_name="testgame"):
+        return self.client.post(
+            "/join", {"player-name": player_name, "game-name": game_name}
+        )
+
+    def test_joins_game_in_lobby(self):
+        response = self.join("newplayer12345678")
+        self.assertRedirects(response, "/testgame/lobby", fetch_redirect_response=False)
+        player = Player.objects.get(name="newplayer12345678")
+        self.assertEqual(player.game_id, self.test_game)
+
+    def test_moves_existing_player_to_game(self):
+        other = Game.objects.create(
+            name="othergame", cycles=1, boring=False, host="x", progress=0
+        )
+        self.user1.points = 3
+        self.user1.save()
+        self.join("testuser112345678", "othergame")
+        player = Player.objects.get(name="testuser112345678")
+        self.assertEqual((player.game_id, player.points), (other, 0))
+
+    def test_rejects_taken_nickname(self):
+        response = self.join("testuser1abcdefgh")
+        self.assertEqual(response.context["error"], "Nickname already taken!")
+        response = self.join("testuserabcdefgh")
+        self.assertRedirects(response, "/testgame/lobby", fetch_redirect_response=False)
+        # nicknames that are a prefix of, or extend, a taken one are free
+        for player_name in ["testuse12345678", "testuser12abcdefgh"]:
+            response = self.join(player_name)
+            self.assertRedirects(
+                response, "/testgame/lobby", fetch_redirect_response=False
+            )
+
+    def test_started_game(self):
+        self.test_game.progress = 3
+        self.test_game.save()
+        response = self.join("testuser212345678")
+        self.assertRedirects(response, "/testgame/play", fetch_redirect_response=False)
+        response = self.join("latecomer12345678")
+        self.assertEqual(response.context["error"], "Game already started!")
+
+    def test_unknown_game_and_empty_nickname(self):
+        response = self.join("someone12345678", "nogame")
+        self.assertEqual(response.context["error"], "Game does not exist!")
+        response = self.join("12345678")
+        self.assertEqual(response.context["error"], "Longer nickname please...")
+
+    def test_queries_do_not_grow_with_players(self):
+        self.join("first12345678")
+        before = self.statements("second12345678")
+        filler = Game.objects.create(
+            name="filler", cycles=1, boring=False, host="x", progress=0
+        )
+        Player.objects.bulk_create(
+            Player(name=f"filler{i}abcdefgh", game_id=filler, points=0)
+            for i in range(500)
+        )
+        after = self.statements("third12345678")
+        self.assertEqual(before, ["SELECT", "SELECT", "INSERT"])
+        self.assertEqual(after, before)
+
+    def statements(self, player_name):
+        """Joins, returns the statements made other than transaction control."""
+        with CaptureQueriesContext(connection) as context:
+            self.join(player_name)
+        return [
+            query["sql"].split()[0]
+            for query in context.captured_queries
+            if query["sql"].split()[0] not in ("BEGIN", "COMMIT")
+        ]
@@ -0,0 +1,87 @@
+import json
+from unittest import skipUnless
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from basicgame import utils
+from basicgame.game_names import game_exists
+from basicgame.game_registry import get_game_registry
+from basicgame.game_state import GameState
+from basicgame.models import Game, Player
+from basicgame.views import Join
+
+PLAYERS = ["testuser112345678", "testuser212345678", "testuser312345678"]
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are checked on SQLite")
+class TestQueryPlans(TransactionTestCase):
+    """
+    Every query made on the hot path (joining, connecting, each round
+    boundary and the round json) should be answered from an index. The
+    queries are recorded while the real code runs a round, then fails if the
+    query plan of any of them falls back to scanning a whole table.
+    """
+
+    def setUp(self):
+        self.game = Game.objects.create(
+            name="testgame", cycles=1, boring=False, host=PLAYERS[0], progress=0
+        )
+        Player.objects.create(name=PLAYERS[0], game_id=self.game, points=0)
+
+    def join(self, player_name):
+        request = RequestFactory().post(
+            "/join", {"player-name": player_name, "game-name": "testgame"}
+        )
+        return Join.as_view()(request)
+
+    def play_round(self):
+        """Joins two players, then plays a round as the scheduler does."""
+        game_id = self.game.pk
+        game_exists("testgame")
+        for player_name in PLAYERS[1:]:
+            self.join(player_name)
+        async_to_sync(get_game_registry().get)("testgame", refresh=True)
+        async_to_sync(utils.ensure_player_in_game_db)(PLAYERS[1], game_id)
+        async_to_sync(utils.produce_player_list_html)(game_id)
+        async_to_sync(utils.change_game_progress)(game_id, 1)
+        self.join(PLAYERS[1])
+        state = GameState.from_db(game_id)
+        for player_name, submission in zip(PLAYERS, ["_pets", "dog", "cat"]):
+            state.add_input(player_name, "submission", submission)
+        state.advance("vote")
+        state.write_through()
+        async_to_sync(utils.generate_round_json)("vote", game_id)
+        vote = {"vote": {"voteData": {"characterScores": {"dog": 60, "cat": 40}}}}
+        for player_name in PLAYERS:
+            state.add_input(player_name, "votes", json.dumps(vote))
+        state.advance("winner")
+        state.write_through()
+        result = async_to_sync(utils.compute_round_result)(game_id)
+        state.advance("results")
+        state.write_through(result.points)
+        async_to_sync(utils.generate_round_json)("results", game_id)
+        state.advance("leaderboard")
+        state.write_through()
+        state.reset_round()
+        state.advance("submission")
+        state.write_through()
+        async_to_sync(utils.generate_round_json)(state.view, game_id)
+        async_to_sync(utils.delete_game_if_finished)(game_id)
+
+    def test_hot_path_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as context:
+            self.play_round()
+        queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(("SELECT", "UPDATE", "DELETE"))
+        ]
+        self.assertGreater(len(queries), 20)
+        for sql in queries:
+            with self.subTest(query=sql):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plan = [row[-1] for row in cursor.fetchall()]
+                scans = [line for line in plan if line.startswith("SCAN ")]
+                self.assertEqual(scans, [], "\n".join(plan))
@@ -0,0 +1,50 @@
+import json
+from unittest import mock
+from basicgame.round_payloads import RoundPayloadCache
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestRoundPayloadCache(TripleTest):
+    """
+    RoundPayloadCache should generate the json of a game's view once per
+    progress, serve it from memory afterwards, and regenerate it when the
+    progress changes or the game is invalidated.
+    """
+
+    async def test_json_generated_once_per_progress(self):
+        cache = RoundPayloadCache()
+        game_id = self.test_game.pk
+        with mock.patch(
+            "basicgame.utils.generate_round_json", return_value='{"view": "lobby"}'
+        ) as generate:
+            first = await cache.get(game_id, 0, "lobby")
+            second = await cache.get(game_id, 0, "lobby")
+        self.assertEqual(generate.call_count, 1)
+        self.assertIs(first, second)
+
+    async def test_progress_change_regenerates_json(self):
+        cache = RoundPayloadCache()
+        game_id = self.test_game.pk
+        await cache.get(game_id, 0, "lobby")
+        await self.set_game_progress(1)
+        payload = json.loads(await cache.get(game_id, 1, "testuser112345678"))
+        self.assertEqual(payload["progress"], 1)
+        self.assertEqual(payload["round"], "Round 1 of 12")
+
+    async def test_invalidate(self):
+        cache = RoundPayloadCache()
+        game_id = self.test_game.pk
+        await cache.get(game_id, 0, "lobby")
+        cache.invalidate(game_id)
+        with mock.patch(
+            "basicgame.utils.generate_round_json", return_value="{}"
+        ) as generate:
+            await cache.get(game_id, 0, "lobby")
+        self.assertEqual(generate.call_count, 1)
+
+    async def test_errors_are_not_cached(self):
+        cache = RoundPayloadCache()
+        with mock.patch("basicgame.utils.generate_round_json", side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                await cache.get(self.test_game.pk, 3, "winner")
+        self.assertNotIn(self.test_game.pk, cache._payloads)
@@ -0,0 +1,55 @@
+import json
+from unittest import mock
+from django.test import override_settings
+from basicgame.utils import compute_round_result, generate_round_json
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestRoundResult(TripleTest):
+    """
+    compute_round_result should take a game id once voting closes, and save
+    a snapshot of the round's scores, winner, results table, points earned
+    and leaderboard. The winner, results and leaderboard views are then
+    served from the snapshot without recomputing it.
+    """
+
+    async def test_should_snapshot_scores_winner_and_points(self):
+        await self.seed_db()
+        result = await compute_round_result(self.test_game.pk)
+        self.assertEqual(result.scores, {"dog": 60, "cat": 40})
+        self.assertEqual(result.winner["name"], "testuser2")
+        self.assertEqual(result.winner["character"], "dog")
+        self.assertEqual(result.points, {"testuser212345678": 1})
+        self.assertEqual(result.category, "pets")
+
+    async def test_leaderboard_includes_points_earned_this_round(self):
+        await self.seed_db()
+        await self.update_points(2, 0, 3)
+        result = await compute_round_result(self.test_game.pk)
+        self.assertEqual(
+            result.leaderboard_html,
+            "<tr><th>player</th><th>points</th></tr>"
+            "<tr><td>testuser3</td><td>3</td></tr>"
+            "<tr><td>testuser1</td><td>2</td></tr>"
+            "<tr><td>testuser2</td><td>1</td></tr>",
+        )
+
+    async def test_views_are_served_from_snapshot(self):
+        await self.seed_db()
+        await compute_round_result(self.test_game.pk)
+        await self.update_votes(None, None, None)
+        results = json.loads(await generate_round_json("results", self.test_game.pk))
+        self.assertIn("<td>dog</td><td>60</td>", results["resultsHtmlTable"])
+
+    @override_settings(IMAGE_CACHE=None)
+    async def test_image_is_searched_once(self):
+        await self.seed_db()
+        await compute_round_result(self.test_game.pk)
+        with mock.patch(
+            "basicgame.utils.find_image", return_value="https://img/dog.png"
+        ) as find_image:
+            first = json.loads(await generate_round_json("winner", self.test_game.pk))
+            second = json.loads(await generate_round_json("winner", self.test_game.pk))
+        self.assertEqual(find_image.call_count, 1)
+        self.assertEqual(first["image"], "https://img/dog.png")
+        self.assertEqual(second, first)
@@ -0,0 +1,141 @@
+import asyncio
+from unittest import mock
+from channels.layers import InMemoryChannelLayer  # type: ignore
+from basicgame.game_state import LocalGameStore
+from basicgame.scheduler import RoundScheduler
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestRoundScheduler(TripleTest):
+    """
+    The scheduler is the only task advancing a game. It should act on
+    events raised at the current progress, ignore stale ones, and send
+    one broadcast per state change to the game's channel group.
+    """
+
+    async def make_scheduler(self, progress=1):
+        self.store = LocalGameStore()
+        await self.store.change_progress(self.test_game.pk, progress)
+        self.layer = InMemoryChannelLayer()
+        self.channel = await self.layer.new_channel()
+        await self.layer.group_add(f"game_{self.test_game.pk}", self.channel)
+        self.scheduler = RoundScheduler(self.test_game.pk, self.store, self.layer)
+        return self.scheduler
+
+    async def stop(self):
+        await self.scheduler.broadcast.stop()
+        for task in [self.scheduler.results_sequence, self.scheduler.skip_sequence]:
+            if task:
+                task.cancel()
+
+    async def submit_all(self):
+        game_id = self.test_game.pk
+        await self.store.add_input(game_id, self.user1.name, "submission", "_pets")
+        await self.store.add_input(game_id, self.user2.name, "submission", "dog")
+        await self.store.add_input(game_id, self.user3.name, "submission", "cat")
+
+    async def test_advances_to_vote_and_broadcasts_once_submitted(self):
+        scheduler = await self.make_scheduler()
+        await self.submit_all()
+        await scheduler.handle("submissions", 1)
+        self.assertEqual((await self.store.load(self.test_game.pk)).view, "vote")
+        self.assertEqual(await self.get_game_progress(), 2)
+        message = await self.layer.receive(self.channel)
+        self.assertEqual(message["type"], "game_update")
+        self.assertEqual(message["progress"], 2)
+        await self.stop()
+
+    async def test_resends_only_to_channels_that_have_not_acked(self):
+        scheduler = await self.make_scheduler()
+        other_channel = await self.layer.new_channel()
+        await self.layer.group_add(f"game_{self.test_game.pk}", other_channel)
+        await self.store.record_ack(self.test_game.pk, self.channel, -1)
+        await self.store.record_ack(self.test_game.pk, other_channel, -1)
+        await self.submit_all()
+        await scheduler.handle("submissions", 1)
+        await self.layer.receive(self.channel)
+        await self.layer.receive(other_channel)
+        await self.store.record_ack(self.test_game.pk, self.channel, 2)
+        resent = await asyncio.wait_for(self.layer.receive(other_channel), 2)
+        self.assertEqual(resent["progress"], 2)
+        await self.store.record_ack(self.test_game.pk, other_channel, 2)
+        await asyncio.sleep(2.1)
+        self.assertFalse(scheduler.broadcast.has_started)
+        await self.stop()
+
+    async def test_prefetches_candidate_images_on_entering_vote(self):
+        scheduler = await self.make_scheduler()
+        await self.submit_all()
+        with mock.patch("basicgame.utils.prefetch_images") as prefetch:
+            await scheduler.handle("submissions", 1)
+        prefetch.assert_called_once_with(["dog", "cat"])
+        await self.stop()
+
+    async def test_ignores_stale_events(self):
+        scheduler = await self.make_scheduler()
+        await self.submit_all()
+        await scheduler.handle("submissions", 1)
+        await scheduler.handle("submissions", 1)
+        self.assertEqual(await self.get_game_progress(), 2)
+        await self.stop()
+
+    async def test_skips_round_without_enough_submissions(self):
+        scheduler = await self.make_scheduler()
+        await scheduler.handle("force_next", 1)
+        message = await self.layer.receive(self.channel)
+        self.assertEqual(message["type"], "skip_round")
+        await self.stop()
+
+    async def test_votes_start_a_single_results_sequence(self):
+        scheduler = await self.make_scheduler(progress=2)
+        await self.submit_all()
+        await self.seed_db()
+        await self.store.discard(self.test_game.pk)
+        await self.store.change_progress(self.test_game.pk, 2)
+        with mock.patch("basicgame.utils.find_image", return_value=None):
+            await scheduler.handle("votes", 2)
+            task = scheduler.results_sequence
+            await scheduler.handle("force_next", 2)
+            self.assertIs(scheduler.results_sequence, task)
+            message = await self.layer.receive(self.channel)
+        self.assertEqual(message["progress"], 3)
+        self.assertEqual((await self.store.load(self.test_game.pk)).view, "winner")
+        await self.stop()
+        await asyncio.sleep(0)
+
+    async def test_results_sequence_applies_snapshot_points_once(self):
+        scheduler = await self.make_scheduler(progress=2)
+        scheduler.wait_time = 0
+        await self.seed_db()
+        await self.store.discard(self.test_game.pk)
+        await self.store.change_progress(self.test_game.pk, 2)
+        with mock.patch("basicgame.utils.find_image", return_value=None):
+            await scheduler.handle("votes", 2)
+            await scheduler.results_sequence
+        state = await self.store.load(self.test_game.pk)
+        self.assertEqual(state.view, "testuser212345678")
+        self.assertEqual(state.points[self.user2.name], 1)
+        self.assertEqual(await self.get_points(self.user2.name), 1)
+        self.assertEqual(await self.get_points(self.user3.name), 0)
+        await self.stop()
+
+    async def test_renews_ownership_on_every_tick(self):
+        scheduler = await self.make_scheduler(progress=2)
+        scheduler.wait_time = 0
+        scheduler.owner = "owner1"
+        await self.seed_db()
+        await self.store.discard(self.test_game.pk)
+        await self.store.change_progress(self.test_game.pk, 2)
+        await self.store.claim_owner(self.test_game.pk, "owner1")
+        claim_owner = mock.AsyncMock(wraps=self.store.claim_owner)
+        with mock.patch.object(self.store, "claim_owner", claim_owner):
+            with mock.patch("basicgame.utils.find_image", return_value=None):
+                await scheduler.handle("votes", 2)
+                await scheduler.results_sequence
+        # the event, three pauses and at least one broadcast per view
+        self.assertGreaterEqual(claim_owner.await_count, 7)
+        claim_owner.assert_awaited_with(self.test_game.pk, "owner1")
+        self.assertEqual(
+            await self.store.claim_owner(self.test_game.pk, "owner2"), "owner1"
+        )
+        await self.stop()
@@ -0,0 +1,48 @@
+from channels.db import database_sync_to_async  # type: ignore
+from basicgame.models import Game, Player, Submission, Vote
+from basicgame.utils import save_round_submissions, save_round_votes
+from basicgame.tests.unit.base import TripleTest
+
+
+class TestSaveRoundInputs(TripleTest):
+    """
+    Functions should take a game and its players, and mirror the players'
+    submissions and votes for the current round into the Submission and
+    Vote tables, replacing rows already saved for that round.
+    """
+
+    @database_sync_to_async
+    def get_rows(self, model, **filters):
+        return list(model.objects.filter(game=self.test_game, **filters))
+
+    @database_sync_to_async
+    def save_inputs(self):
+        game = Game.objects.get(pk=self.test_game.pk)
+        players = list(Player.objects.filter(game_id=game))
+        save_round_submissions(game, players)
+        save_round_votes(game, players)
+
+    async def test_should_save_category_without_prefix(self):
+        await self.seed_db()
+        categories = await self.get_rows(Submission, is_category=True)
+        self.assertEqual([row.text for row in categories], ["pets"])
+        characters = await self.get_rows(Submission, is_category=False)
+        self.assertEqual(sorted(row.text for row in characters), ["cat", "dog"])
+
+    async def test_should_save_one_vote_per_character_score(self):
+        await self.seed_db()
+        votes = await self.get_rows(Vote, character="dog")
+        self.assertEqual(sorted(vote.score for vote in votes), [40.0, 60.0, 80.0])
+
+    async def test_should_replace_rows_of_current_round_only(self):
+        await self.seed_db()
+        await self.set_game_progress(6)
+        await self.save_inputs()
+        await self.save_inputs()
+        self.assertEqual(len(await self.get_rows(Vote, round=2)), 6)
+        self.assertEqual(len(await self.get_rows(Vote, round=0)), 6)
+
+    async def test_should_skip_malformed_votes(self):
+        await self.seed_db()
+        await self.update_user1_vote('{"vote": "garbled"}')
+        self.assertEqual(len(await self.get_rows(Vote)), 4)
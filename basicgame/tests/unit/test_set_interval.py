@@ -1,4 +1,4 @@
-from basicgame.set_interval import setIntervalAsync
+from basicgame.set_interval import setIntervalAsync, setBackoffAsync
 from basicgame.tests.unit.base import TripleTest
 import asyncio
 
@@ -102,3 +102,50 @@ class TestSetIntervalAsync(TripleTest):
         self.assertEqual(counter["count"], 2)
         self.assertEqual(counter2["count"], 2)
         await test_interval.stop()
+
+
+class TestSetBackoffAsync(TripleTest):
+    """
+    Instances of class should execute a function with an exponentially
+    growing period, until it returns True or the limit is reached.
+    """
+
+    async def test_period_doubles_after_each_execution(self):
+        times = []
+
+        async def testfunc():
+            times.append(asyncio.get_running_loop().time())
+            return False
+
+        test_backoff = setBackoffAsync(testfunc, 0, 0.02, 3)
+        await test_backoff.start()
+        await asyncio.sleep(0.2)
+        self.assertEqual(len(times), 3)
+        self.assertGreater(times[2] - times[1], times[1] - times[0])
+        self.assertFalse(test_backoff.has_started)
+
+    async def test_finishes_once_function_returns_true(self):
+        counter = {"count": 0}
+
+        async def testfunc():
+            counter["count"] += 1
+            return counter["count"] == 2
+
+        test_backoff = setBackoffAsync(testfunc, 0, 0.001)
+        await test_backoff.start()
+        await asyncio.sleep(0.05)
+        self.assertEqual(counter["count"], 2)
+        self.assertFalse(test_backoff.has_started)
+
+    async def test_period_is_capped(self):
+        counter = {"count": 0}
+
+        async def testfunc():
+            counter["count"] += 1
+            return False
+
+        test_backoff = setBackoffAsync(testfunc, 0, 0.001, 10, max_period=0.002)
+        await test_backoff.start()
+        await asyncio.sleep(0.1)
+        await test_backoff.stop()
+        self.assertEqual(counter["count"], 10)
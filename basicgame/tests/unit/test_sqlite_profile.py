@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from basicgame.sqlite import apply_pragmas, configure_connection
+
+
+class TestSqliteProfile(SimpleTestCase):
+    """
+    The SQLite profile should set its pragmas on each new SQLite connection,
+    and do nothing when it is disabled or the database is not SQLite.
+    """
+
+    def test_pragmas_are_applied(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, "test.sqlite3"))
+            cursor = db.cursor()
+            apply_pragmas(
+                cursor,
+                {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+            )
+            self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone(), ("wal",))
+            self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone(), (1,))
+            self.assertEqual(cursor.execute("PRAGMA busy_timeout").fetchone(), (5000,))
+            db.close()
+
+    @override_settings(SQLITE_PRAGMAS={"busy_timeout": 5000})
+    def test_only_sqlite_connections_are_configured(self):
+        connection = mock.MagicMock(vendor="postgresql")
+        configure_connection(None, connection)
+        connection.cursor.assert_not_called()
+        connection.vendor = "sqlite"
+        configure_connection(None, connection)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with("PRAGMA busy_timeout = 5000")
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_disabled_profile_changes_nothing(self):
+        connection = mock.MagicMock(vendor="sqlite")
+        configure_connection(None, connection)
+        connection.cursor.assert_not_called()
@@ -2,6 +2,8 @@ from basicgame.utils import update_player_points
 from basicgame.tests.unit.base import TripleTest, hash_database_async
 from basicgame.models import Player, Game
 from channels.db import database_sync_to_async  # type: ignore
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 
 class TestUpdatePlayerPoints(TripleTest):
@@ -70,6 +72,20 @@ class TestUpdatePlayerPoints(TripleTest):
         await update_player_points(scores, self.test_game.pk)
         self.assertEqual(scores, scores_copy)
 
+    async def test_updates_all_points_with_one_statement(self):
+        await self.seed_large_db()
+        scores = {"cat": 70, "dog": 90, "hamster": 50, "rat": 20}
+        queries = await self.count_queries(scores, self.large_game.pk)
+        updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertLessEqual(len(queries), 4)
+
+    @database_sync_to_async
+    def count_queries(self, scores, game_id):
+        with CaptureQueriesContext(connection) as context:
+            update_player_points.func(scores, game_id)
+        return context.captured_queries
+
     @database_sync_to_async
     def seed_large_db(self):
         self.large_game = Game.objects.create(
@@ -8,5 +8,9 @@ urlpatterns = [
     path("<str:game_name>/lobby", views.lobby, name="lobby"),
     path("host", views.Host.as_view(), name="host"),
     path("error", views.error, name="error"),
+    path("hints/<str:version>.json", views.hints, name="hints"),
+    path("autocomplete", views.autocomplete, name="autocomplete"),
+    path("images/metrics", views.image_metrics, name="image_metrics"),
+    path("images/<str:key>", views.image, name="image"),
     path("<str:game_name>/play", views.Play.as_view(), name="play"),
 ]
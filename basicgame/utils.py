@@ -1,15 +1,24 @@
-import json, os, math, logging
+import json, math, logging
 from dotenv import load_dotenv
 from operator import itemgetter
 from typing import List, Dict, Tuple, Optional, Generator
 from channels.db import database_sync_to_async  # type: ignore
-from google_images_search import GoogleImagesSearch  # type: ignore
-from basicgame.models import Game, Player
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, Q, Value, When
+from django.urls import reverse
+from basicgame.models import Game, Player, RoundResult, Submission, Vote
+from basicgame.game_sequence import GameSequence
+from basicgame.game_registry import get_game_registry
+from basicgame.images import get_image_service
+from basicgame.image_proxy import get_image_proxy
 
 """
 Selection of utility functions handling game logic. All functions 
 can be considered pure aside from their interaction with the 
 game database.
+Helpers read on every message use Django's async queryset methods
+directly; the rest are wrapped with database_sync_to_async.
 """
 
 load_dotenv()
@@ -28,10 +37,9 @@ def produce_player_list_html(game_id: int) -> str:
     return "<span style=font-weight:300>players:\n</span>" + "\n".join(nickname_list)
 
 
-@database_sync_to_async
-def get_game_id(game_name: str) -> int:
+async def get_game_id(game_name: str) -> int:
     """Converts game_name (e.g. panda_button) into its db primary key"""
-    return Game.objects.get(name=game_name).pk
+    return await Game.objects.filter(name=game_name).values_list("pk", flat=True).aget()
 
 
 def get_player_name_from_cookie(scope: dict, game_name: str) -> Optional[str]:
@@ -70,19 +78,20 @@ def get_players(game_name: str) -> List[str]:
     return [player.name for player in player_query_set]
 
 
-@database_sync_to_async
-def get_game_progress(game_id: int) -> Optional[int]:
+async def get_game_progress(game_id: int) -> Optional[int]:
     """Retrieves game progress"""
-    return Game.objects.get(pk=game_id).progress
+    return (
+        await Game.objects.filter(pk=game_id).values_list("progress", flat=True).aget()
+    )
 
 
-@database_sync_to_async
 def reset_submissions_and_votes(game_id: int) -> None:
-    """Sets submissions and votes of all players in particular game to None."""
-    for player in Player.objects.filter(game_id=game_id):
-        player.submission = None
-        player.votes = None
-        player.save()
+    """
+    Sets submissions and votes of all players in particular game to None,
+    with a single UPDATE. Called when the game state is written through at
+    the start of a round (see GameState.write_through).
+    """
+    Player.objects.filter(game_id=game_id).update(submission=None, votes=None)
 
 
 @database_sync_to_async
@@ -91,40 +100,22 @@ def remove_player_from_db(player_name: str) -> None:
     Player.objects.filter(name=player_name).delete()
 
 
+def build_game_sequence(players: List[str], cycles: int, boring: bool) -> List[str]:
+    """
+    Takes a list of player names, the number of cycles and the game mode,
+    and outputs a list of stages representing the game's structure
+    (see GameSequence). Does not touch the db.
+    """
+    return GameSequence(tuple(players), cycles, boring).to_list()
+
+
 def generate_game_sequence(game_name: str) -> List[str]:
     """
     Takes a game name, and outputs a list of stages representing the game's structure.
     """
-    game_sequence = ["lobby"]
     game = Game.objects.get(name=game_name)
     players: List[str] = get_players(game_name)
-    total_views: int
-    if game.boring:
-        total_views = game.cycles * 6 * len(players) + 1
-        while True:
-            for player in players:
-                game_sequence.extend(
-                    [
-                        f"boring_{player}",
-                        "character",
-                        "vote",
-                        "winner",
-                        "results",
-                        "leaderboard",
-                    ]
-                )
-            if len(game_sequence) >= total_views:
-                game_sequence = game_sequence[:total_views]
-                game_sequence.append("finish")
-                return game_sequence
-    total_views = game.cycles * 5 * len(players) + 1
-    while True:
-        for player in players:
-            game_sequence.extend([player, "vote", "winner", "results", "leaderboard"])
-        if len(game_sequence) >= total_views:
-            game_sequence = game_sequence[:total_views]
-            game_sequence.append("finish")
-            return game_sequence
+    return build_game_sequence(players, game.cycles, game.boring)
 
 
 @database_sync_to_async
@@ -133,45 +124,19 @@ def generate_game_sequence_async(game_name: str) -> List[str]:
     return generate_game_sequence(game_name)
 
 
-@database_sync_to_async
-def collected_and_added_all_input_data(
-    player_name: str, field: str, data: str, game_id: int
-) -> bool:
-    """
-    Takes a players name, the database field to be populated, data, and the game_id.
-    Function populates database field with data, adding * to duplicates, and then
-    checks to see how many other players in the game are yet to submit. Once all
-    players have submitted data, the function returns True.
-    """
-    if field == "submission":
-        for player in Player.objects.filter(game_id=game_id):
-            if player.submission:
-                if player.name == player_name:
-                    continue
-                elif player.submission.startswith(data):
-                    data += "*"
-    player = Player.objects.get(name=player_name)
-    setattr(player, field, data)
-    player.save()
-    for player in Player.objects.filter(game_id=game_id):
-        if getattr(player, field) == None:
-            return False
-    return True
-
-
-@database_sync_to_async
-def get_category(game_id: int) -> Optional[str]:
+async def get_category(game_id: int) -> Optional[str]:
     """
     Finds and returns the category amongst players' 'submission' fields.
     Categories are prefixed by an underscore (e.g. '_speed').
     Category is returned without underscore.
     """
-    players = Player.objects.filter(game_id=game_id)
-    for player in players:
-        if player.submission:
-            if player.submission.startswith("_"):
-                return player.submission[1:]
-    return None
+    category = await (
+        Player.objects.filter(game_id=game_id, submission__startswith="_")
+        .order_by("pk")
+        .values_list("submission", flat=True)
+        .afirst()
+    )
+    return category[1:] if category else None
 
 
 @database_sync_to_async
@@ -185,26 +150,21 @@ def create_character_list(game_id: int) -> List[str | None]:
     ]
 
 
-@database_sync_to_async
-def create_average_score_dict(game_id: int) -> Dict[str, int]:
+def average_scores_from_votes(votes_list: List[str]) -> Dict[str, int]:
     """
-    Takes game_id, and extracts scores from all relevant players for each
-    character. Computes an average and rounds to int. Returns a dictionary
-    of characters and integer scores.
+    Takes a list of raw vote messages (one per player that voted), and
+    computes the average score of each character, rounded to int.
+    Returns a dictionary of characters and integer scores.
     """
-    players = Player.objects.filter(game_id=game_id)
-    players_voted = [player for player in players if player.votes]
     float_scores: Dict[str, float] = {}
-    for player in players_voted:
-        if not player.votes:
-            continue
-        votes: dict = json.loads(player.votes)
+    for raw_votes in votes_list:
+        votes: dict = json.loads(raw_votes)
         vote_data: List[tuple] = votes["vote"]["voteData"]["characterScores"].items()
         character: str
         score: int
         for character, score in vote_data:
             float_scores[character] = float_scores.get(character, 0) + (
-                float(score) / len(players_voted)
+                float(score) / len(votes_list)
             )
     scores: Dict[str, int] = {}
     for character, float_score in float_scores.items():
@@ -212,6 +172,91 @@ def create_average_score_dict(game_id: int) -> Dict[str, int]:
     return scores
 
 
+def round_number(progress: int, boring: bool) -> int:
+    """Takes game progress and mode, returns the current round number."""
+    views_per_round = 6 if boring else 5
+    return math.floor((progress - 1) / views_per_round) + 1
+
+
+def save_round_submissions(game: Game, players: List[Player]) -> None:
+    """
+    Takes a game and its players, and mirrors the players' submissions for
+    the current round into the Submission table, replacing any rows already
+    saved for this round.
+    """
+    current_round = round_number(game.progress, game.boring)
+    Submission.objects.filter(game=game, round=current_round).delete()
+    submissions: List[Submission] = []
+    for player in players:
+        if player.submission:
+            is_category = player.submission.startswith("_")
+            submissions.append(
+                Submission(
+                    game=game,
+                    round=current_round,
+                    player=player,
+                    text=player.submission[1:] if is_category else player.submission,
+                    is_category=is_category,
+                )
+            )
+    Submission.objects.bulk_create(submissions)
+
+
+def save_round_votes(game: Game, players: List[Player]) -> None:
+    """
+    Takes a game and its players, and mirrors the players' votes for the
+    current round into the Vote table, replacing any rows already saved
+    for this round. Malformed votes are skipped.
+    """
+    current_round = round_number(game.progress, game.boring)
+    Vote.objects.filter(game=game, round=current_round).delete()
+    votes: List[Vote] = []
+    for player in players:
+        if player.votes:
+            try:
+                vote_data = json.loads(player.votes)["vote"]["voteData"]
+                character_scores = vote_data["characterScores"].items()
+                votes.extend(
+                    Vote(
+                        game=game,
+                        round=current_round,
+                        voter=player,
+                        character=character,
+                        score=float(score),
+                    )
+                    for character, score in character_scores
+                )
+            except (ValueError, KeyError, TypeError, AttributeError):
+                logger.warning(f"skipping malformed votes from {player.name}")
+    Vote.objects.bulk_create(votes)
+
+
+def average_scores_for_round(game_id: int, current_round: int) -> Dict[str, int]:
+    """
+    Takes game_id and a round number, and averages the scores given to each
+    character with a single GROUP BY query on the Vote table. Rounds averages
+    to int. Returns a dictionary of characters and integer scores, ordered
+    from highest to lowest.
+    """
+    averages = (
+        Vote.objects.filter(game_id=game_id, round=current_round)
+        .values("character")
+        .annotate(average=Avg("score"))
+        .order_by("-average")
+    )
+    return {row["character"]: round(row["average"]) for row in averages}
+
+
+@database_sync_to_async
+def create_average_score_dict(game_id: int) -> Dict[str, int]:
+    """
+    Takes game_id, and averages the scores given to each character in the
+    current round (see average_scores_for_round).
+    """
+    game = Game.objects.get(pk=game_id)
+    return average_scores_for_round(game_id, round_number(game.progress, game.boring))
+
+
 @database_sync_to_async
 def convert_character_to_player(game_id: int, character: str) -> Optional[str]:
     """
@@ -225,24 +270,46 @@ def convert_character_to_player(game_id: int, character: str) -> Optional[str]:
     return None
 
 
-async def calculate_winner(scores: Dict[str, int], game_id: int) -> Dict:
+def submitters_by_character(players: List[Player]) -> Dict[str, str]:
     """
-    Takes dictionary of scores and game_id.
-    Should find the highest-scoring character, and check for a draw.
+    Takes a list of players, returns a dictionary of each submission and
+    the display name (without cookie suffix) of the player who submitted it.
+    """
+    submitters: Dict[str, str] = {}
+    for player in players:
+        if player.submission:
+            submitters.setdefault(player.submission, player.name[:-8])
+    return submitters
+
+
+def category_from_players(players: List[Player]) -> Optional[str]:
+    """Takes a list of players, returns the category without underscore."""
+    for player in players:
+        if player.submission and player.submission.startswith("_"):
+            return player.submission[1:]
+    return None
+
+
+def winner_from_scores(
+    scores: Dict[str, int], category: Optional[str], submitters: Dict[str, str]
+) -> Dict:
+    """
+    Takes dictionary of scores, the category and a dictionary of characters
+    and their submitters (see submitters_by_character).
+    Finds the highest-scoring character, and checks for a draw.
     Returns a dictionary of information containing the winner\drawers,
     draw status, the winning character and score if available, and category.
     """
     winner: Tuple[str, int] = max(scores.items(), key=itemgetter(1))
-    category: str = await get_category(game_id)
     drawed_characters_list = [
         character for (character, score) in scores.items() if score == winner[1]
     ]
     if len(drawed_characters_list) > 1:
-        draw_name_list: List[str] = []
-        for character in drawed_characters_list:
-            draw_name_list.append(await convert_character_to_player(game_id, character))
+        draw_name_list: List[Optional[str]] = [
+            submitters.get(character) for character in drawed_characters_list
+        ]
         return {"is_draw": True, "drawers_list": draw_name_list}
-    name = await convert_character_to_player(game_id, winner[0])
+    name = submitters.get(winner[0])
     return {
         "is_draw": False,
         "drawers_list": None,
@@ -253,6 +320,19 @@ async def calculate_winner(scores: Dict[str, int], game_id: int) -> Dict:
     }
 
 
+@database_sync_to_async
+def calculate_winner(scores: Dict[str, int], game_id: int) -> Dict:
+    """
+    Takes dictionary of scores and game_id.
+    Reads the game's players once, then finds the winner or drawers
+    (see winner_from_scores).
+    """
+    players = list(Player.objects.filter(game_id=game_id))
+    return winner_from_scores(
+        scores, category_from_players(players), submitters_by_character(players)
+    )
+
+
 def points_generator(num_of_players: int) -> Generator[int, None, None]:
     """
     Takes integer representing the number of players in the game.
@@ -281,41 +361,73 @@ def points_generator(num_of_players: int) -> Generator[int, None, None]:
         yield 1
 
 
-@database_sync_to_async
-def update_player_points(scores: Dict[str, int], game_id: int) -> None:
+def allocate_points(scores: Dict[str, int], num_of_players: int) -> Dict[str, int]:
     """
-    Takes scores dictionary and game_id.
+    Takes scores dictionary and the number of players in the game.
     Creates an ordered list of characters and scores from highest to lowest,
-    and iterates through this list. On each charater, the function retreives
-    the matching player from the db, and increases their points as determined
-    by the generator. If there are two or more matching scores in a row
-    (i.e, a draw), then these subsequent players recieve the same amount of
-    points as the first player and the generator is not called.
+    and allocates points to each character as determined by the generator.
+    If there are two or more matching scores in a row (i.e, a draw), then
+    these subsequent characters recieve the same amount of points as the
+    first and the generator is not called.
+    Returns a dictionary of characters and the points they have earned.
     """
     results: List[Tuple[str, int]] = list(scores.items())
     results.sort(key=lambda x: x[1], reverse=True)
-    players = Player.objects.filter(game_id=game_id)
-    num_of_players = len(players)
     points: Generator[int, None, None] = points_generator(num_of_players)
+    allocated: Dict[str, int] = {}
     previous_score = None
     previous_points = 0
     for character, score in results:
-        player = players.get(submission=character)
         if score == previous_score:
-            player.points += previous_points
-            player.save()
+            allocated[character] = previous_points
         else:
             try:
-                player.points += next(points)
-                player.save()
+                allocated[character] = next(points)
             except StopIteration:
                 break
         previous_score = score
-        previous_points = player.points
+        previous_points = allocated[character]
+    return allocated
 
 
 @database_sync_to_async
-def create_results_html_table(scores: Dict[str, int], category: str) -> str:
+def update_player_points(scores: Dict[str, int], game_id: int) -> None:
+    """
+    Takes scores dictionary and game_id.
+    Allocates points to each character (see allocate_points), then
+    adds them to the players who submitted them (see add_player_points).
+    """
+    players = list(Player.objects.filter(game_id=game_id).only("name", "submission"))
+    allocated = allocate_points(scores, len(players))
+    submitters = {player.submission: player.name for player in players}
+    add_player_points(
+        game_id,
+        {
+            submitters[character]: points
+            for character, points in allocated.items()
+            if character in submitters
+        },
+    )
+
+
+def add_player_points(game_id: int, points: Dict[str, int]) -> None:
+    """
+    Takes game_id and a dictionary of player names and the points they
+    earned, and increases the players' points with a single UPDATE
+    (an F() increment per player).
+    """
+    if not points:
+        return
+    Player.objects.filter(game_id=game_id, name__in=points).update(
+        points=F("points")
+        + Case(
+            *[When(name=name, then=Value(earned)) for name, earned in points.items()],
+            default=Value(0),
+        )
+    )
+
+
+def results_html_table(scores: Dict[str, int], category: Optional[str]) -> str:
     """
     Takes a dictionary of scores and a category.
     Orders scores in descending order and returns a string representing
@@ -329,6 +441,25 @@ def create_results_html_table(scores: Dict[str, int], category: str) -> str:
     return html
 
 
+@database_sync_to_async
+def create_results_html_table(scores: Dict[str, int], category: str) -> str:
+    """Async wrapper of results_html_table, kept for callers outside a round."""
+    return results_html_table(scores, category)
+
+
+def leaderboard_html_table(player_points_list: List[Tuple[str, int]]) -> str:
+    """
+    Takes a list of player names and their points.
+    Returns this list, sorted by points, as a string representing an HTML
+    table. Saves extra js on the front end.
+    """
+    player_points_list = sorted(player_points_list, key=lambda x: x[1], reverse=True)
+    html = "<tr><th>player</th><th>points</th></tr>"
+    for player, points in player_points_list:
+        html += f"<tr><td>{player[:-8]}</td><td>{points}</td></tr>"
+    return html
+
+
 @database_sync_to_async
 def create_leaderboard_html_table(game_id: int) -> str:
     """
@@ -338,70 +469,102 @@ def create_leaderboard_html_table(game_id: int) -> str:
     Saves extra js on the front end.
     """
     players = Player.objects.filter(game_id=game_id)
-    player_points_list: List[Tuple[str, int]] = [
-        (player.name, player.points) for player in players
-    ]
-    player_points_list.sort(key=lambda x: x[1], reverse=True)
-    html = "<tr><th>player</th><th>points</th></tr>"
-    for player, points in player_points_list:
-        html += f"<tr><td>{player[:-8]}</td><td>{points}</td></tr>"
-    return html
+    return leaderboard_html_table([(player.name, player.points) for player in players])
 
 
 @database_sync_to_async
-def enough_submissions(game_id: int) -> bool:
+def compute_round_result(game_id: int) -> RoundResult:
     """
-    Takes game_id. Iterates through players in game seeing
-    if either the category is present and at least one character.
-    Returns True if there is enough data to continue the round,
-    returns False if the round can't be continued.
+    Takes game id. Called once when voting closes, after votes are flushed.
+    Reads the game's players and aggregates the round's votes, then works out
+    the scores, winner, results table, points earned and the leaderboard as
+    it will stand once those points are applied. Saves and returns this as
+    the round's RoundResult, replacing any previous snapshot of the round.
     """
-    players = Player.objects.filter(game_id=game_id)
-    category_present = False
-    character_present = False
+    game = Game.objects.get(pk=game_id)
+    current_round = round_number(game.progress, game.boring)
+    players = list(Player.objects.filter(game_id=game_id))
+    scores = average_scores_for_round(game_id, current_round)
+    category = category_from_players(players)
+    submitters: Dict[str, str] = {}
     for player in players:
         if player.submission:
-            if player.submission.startswith("_"):
-                category_present = True
-            else:
-                character_present = True
-    return category_present and character_present
+            submitters.setdefault(player.submission, player.name)
+    points: Dict[str, int] = {}
+    for character, earned in allocate_points(scores, len(players)).items():
+        if character in submitters:
+            points[submitters[character]] = earned
+    result, _ = RoundResult.objects.update_or_create(
+        game=game,
+        round=current_round,
+        defaults={
+            "category": category,
+            "scores": scores,
+            "winner": winner_from_scores(
+                scores, category, submitters_by_character(players)
+            ),
+            "points": points,
+            "results_html": results_html_table(scores, category),
+            "leaderboard_html": leaderboard_html_table(
+                [
+                    (player.name, player.points + points.get(player.name, 0))
+                    for player in players
+                ]
+            ),
+            "image": None,
+        },
+    )
+    return result
 
 
 @database_sync_to_async
-def enough_votes(game_id: int) -> bool:
+def get_round_result(game_id: int) -> Optional[RoundResult]:
+    """Returns the snapshot of the game's current round, if it has one."""
+    game = Game.objects.get(pk=game_id)
+    return RoundResult.objects.filter(
+        game_id=game_id, round=round_number(game.progress, game.boring)
+    ).first()
+
+
+async def load_round_result(game_id: int) -> RoundResult:
     """
-    Takes game_id. Iterates through players in game to see if
-    any votes have been submitted. Returns false if none found.
+    Returns the snapshot of the game's current round, computing it if voting
+    closed without one being taken (e.g. a game restored after a restart).
     """
-    players = Player.objects.filter(game_id=game_id)
-    for player in players:
-        if player.votes:
-            return True
-    return False
+    result = await get_round_result(game_id)
+    if result is None:
+        result = await compute_round_result(game_id)
+    return result
 
 
 @database_sync_to_async
-def advance_progress(game_id, view, game_sequence) -> Optional[int]:
+def save_round_image(result: RoundResult, image: Optional[str]) -> None:
+    """Stores the winner's image url on the snapshot, empty if none was found."""
+    result.image = image or ""
+    result.save(update_fields=["image"])
+
+
+async def enough_submissions(game_id: int) -> bool:
     """
-    Increments game progress to index of given view in game sequence.
-    If this view is already reached, or if the view is not next in line,
-    nothing changes. Helps prevent the round being incremented twice when
-    network is slow.
+    Takes game_id. Counts, in one query, whether the category and at least
+    one character are present amongst the players' submissions.
+    Returns True if there is enough data to continue the round,
+    returns False if the round can't be continued.
     """
-    game = Game.objects.get(pk=game_id)
-    current_progress = game.progress
-    if view == "submission":
-        latter_views = ["character", "vote", "winner", "results", "leaderboard"]
-        if not game_sequence[current_progress + 1] in latter_views:
-            game.progress += 1
-            game.save()
-            return game.progress
-    elif view == game_sequence[current_progress + 1]:
-        game.progress += 1
-        game.save()
-        return game.progress
-    return current_progress
+    categories = Q(submission__startswith="_")
+    counts = await Player.objects.filter(game_id=game_id, submission__gt="").aaggregate(
+        categories=Count("pk", filter=categories),
+        characters=Count("pk", filter=~categories),
+    )
+    return counts["categories"] > 0 and counts["characters"] > 0
+
+
+async def enough_votes(game_id: int) -> bool:
+    """
+    Takes game_id. Checks with a single EXISTS query whether any
+    player in the game has submitted votes.
+    """
+    return await Player.objects.filter(game_id=game_id, votes__gt="").aexists()
 
 
 @database_sync_to_async
@@ -425,11 +588,17 @@ def get_total_game_views(game_id: int) -> int:
     Returns total number of stages as an integer.
     Does not include the 'finish' view.
     """
-    num_of_players = len(Player.objects.filter(game_id=game_id))
-    game = Game.objects.get(pk=game_id)
-    if game.boring:
-        return 1 + game.cycles * num_of_players * 6
-    return 1 + game.cycles * num_of_players * 5
+    game = Game.objects.annotate(num_of_players=Count("player")).get(pk=game_id)
+    return total_game_views(game)
+
+
+def total_game_views(game: Game) -> int:
+    """
+    Takes a game annotated with num_of_players (see get_total_game_views),
+    returns the total number of stages, not including the 'finish' view.
+    """
+    views_per_round = 6 if game.boring else 5
+    return 1 + game.cycles * game.num_of_players * views_per_round
 
 
 async def next_round(game_id: int, game_sequence: List[str]) -> Optional[int]:
@@ -453,14 +622,18 @@ async def next_round(game_id: int, game_sequence: List[str]) -> Optional[int]:
 def delete_game_if_finished(game_id: int) -> bool:
     """
     If the game has finished, the related Game and Player db
-    records are deleted.
-    """
-    game = Game.objects.get(id=game_id)
-    if game.progress >= get_total_game_views(game_id):
+    records are deleted in one transaction, and the game is dropped
+    from the game registry. The game and its player count are read
+    with a single query.
+    """
+    game = Game.objects.annotate(num_of_players=Count("player")).get(id=game_id)
+    if game.progress < total_game_views(game):
+        return False
+    with transaction.atomic():
         Player.objects.filter(game_id=game_id).delete()
         game.delete()
-        return True
-    return False
+    get_game_registry().invalidate(game_id=game_id)
+    return True
 
 
 @database_sync_to_async
@@ -502,33 +675,44 @@ def get_category_submitter(game_id) -> Optional[str]:
     return None
 
 
-def find_image(winner) -> Optional[str]:
+async def find_image(winner) -> Optional[str]:
     """
-    Uses GoogleImagesApi to find an image online for the winner.
-    Returns the url as a string.
+    Takes the winner dictionary (see calculate_winner), and finds an image
+    online for the winning character through the image service, which runs
+    the search off the event loop and caches results.
+    Returns the url as a string, or None for draws and failed searches.
     """
     if winner["is_draw"]:
         return None
-    search_params = {
-        "q": f"{winner['character']} face",
-        "num": 1,
-        "safe": "active",
-        "imgSize": "medium",
-    }
+    return await get_image_service().resolve(image_query(winner["character"]))
 
-    gis = GoogleImagesSearch(os.getenv("GCS_CX"), os.getenv("GCS_DEVELOPER_KEY"))
 
-    try:
-        gis.search(
-            search_params=search_params,
-        )
-        for image in gis.results():
-            return image.url
-    # if we use up API image allowance for a day
-    # an error will presumably be thrown
-    except Exception as err:
-        logger.warning(err, "image search may have failed - check api quota")
-    return None
+async def proxied_image_url(url: Optional[str]) -> Optional[str]:
+    """
+    Takes an image url, registers it with the image proxy and returns the
+    local url of its thumbnail. Urls that are not http(s) (e.g. offline
+    placeholders) are returned unchanged, as is everything when the proxy
+    is not configured (settings.IMAGE_CACHE).
+    """
+    if not url or not url.startswith(("http://", "https://")):
+        return url
+    if not getattr(settings, "IMAGE_CACHE", None):
+        return url
+    key = await get_image_proxy().aregister(url)
+    return reverse("basicgame:image", args=[key])
+
+
+def image_query(character: str) -> str:
+    """Takes a character, returns the image search query for it."""
+    return f"{character} face"
+
+
+def prefetch_images(characters: List[str]) -> None:
+    """
+    Takes the characters in the poll, and starts searching for their images
+    in the background, so the winner's image is ready when voting closes.
+    """
+    get_image_service().prefetch(image_query(character) for character in characters)
 
 
 @database_sync_to_async
@@ -538,11 +722,7 @@ def generate_progress_string(game_id) -> str:
     """
     game = Game.objects.get(pk=game_id)
     players = Player.objects.filter(game_id=game.pk)
-    if game.boring:
-        current_round = math.floor((game.progress - 1) / 6) + 1
-        total_rounds = game.cycles * len(players)
-        return f"Round {current_round} of {total_rounds}"
-    current_round = math.floor((game.progress - 1) / 5) + 1
+    current_round = round_number(game.progress, game.boring)
     total_rounds = game.cycles * len(players)
     return f"Round {current_round} of {total_rounds}"
 
@@ -550,7 +730,8 @@ def generate_progress_string(game_id) -> str:
 async def generate_round_json(round_type, game_id, next=None) -> str:
     """
     Generates a json string for each round of the game.
-    Does not update the game or player database.
+    Winner, results and leaderboard views are read from the round's
+    RoundResult snapshot. Does not update the game or player database.
     """
     if round_type == "character":
         return json.dumps(
@@ -572,34 +753,35 @@ async def generate_round_json(round_type, game_id, next=None) -> str:
         )
 
     if round_type == "winner":
-        scores: Dict[str, int] = await create_average_score_dict(game_id)
-        winner = await calculate_winner(scores, game_id)
+        result = await load_round_result(game_id)
+        if result.image is None:
+            await save_round_image(result, await find_image(result.winner))
         return json.dumps(
             {
                 "progress": await get_game_progress(game_id),
                 "view": "winner",
-                "winner": winner,
-                "image": find_image(winner),
+                "winner": result.winner,
+                "image": await proxied_image_url(result.image),
                 "nextViewAt": next,
             }
         )
     elif round_type == "results":
-        scores = await create_average_score_dict(game_id)
-        category: str = await get_category(game_id)
+        result = await load_round_result(game_id)
         return json.dumps(
             {
                 "progress": await get_game_progress(game_id),
                 "view": "results",
-                "resultsHtmlTable": await create_results_html_table(scores, category),
+                "resultsHtmlTable": result.results_html,
                 "nextViewAt": next,
             }
         )
     elif round_type == "leaderboard":
+        result = await load_round_result(game_id)
         return json.dumps(
             {
                 "progress": await get_game_progress(game_id),
                 "view": "leaderboard",
-                "leaderboardHtmlTable": await create_leaderboard_html_table(game_id),
+                "leaderboardHtmlTable": result.leaderboard_html,
                 "nextViewAt": next,
             }
         )
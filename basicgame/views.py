@@ -1,10 +1,17 @@
-import random
-from typing import List
+from django.db.models.functions import Length
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.views import View
-from django.http import HttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse
 from basicgame.models import Player, Game
 from basicgame.utils import get_players
+from basicgame.autocomplete import KINDS, get_autocomplete
+from basicgame.game_registry import get_game_registry
+from basicgame.game_names import get_name_allocator
+from basicgame.hints import get_hints
+from basicgame.image_proxy import get_image_proxy
+from basicgame.images import get_image_service
 
 
 def home(request):
@@ -18,16 +25,34 @@ def home(request):
         "Please start the game already",
         "My improvisation skills are unwavering",
     ]
-    category_hints = open("basicgame/resources/categories.txt").readlines()
-    character_hints = open("basicgame/resources/characters.txt").readlines()
-    ctx = {
-        "hint_list": hint_list,
-        "category_hints": category_hints,
-        "character_hints": character_hints,
-    }
+    ctx = {"hint_list": hint_list, "hints_url": hints_url()}
     return render(request, "basicgame/home.html", ctx)
 
 
+def hints_url() -> str:
+    """Returns the fingerprinted url of the current hint corpus."""
+    return reverse("basicgame:hints", args=[get_hints().version])
+
+
+def hints(request, version: str) -> HttpResponse:
+    """
+    Serves the category and character hints as JSON (see HintCorpus).
+    The url carries the corpus fingerprint, so responses never change and
+    are cached for a year. Urls of older versions redirect to the current.
+    """
+    corpus = get_hints()
+    if version != corpus.version:
+        return redirect(hints_url())
+    etag = f'"{corpus.version}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(corpus.payload, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 class Join(View):
     """
     Page that allows users to join a game via its name. JS drops
@@ -55,11 +80,14 @@ class Join(View):
             possible destination. Cookies are remembered by join.js so it is possible
             to rejoin a live game if the user navigates away by mistake.
         (4) Validates game hasn't already started.
-        (5) Validates nickname hasn't already been taken.
-        (6) Validates nickname is not an empty string.
-        (7) Gets or creates the new player.
-        (8) Directs to the lobby if game hasn't started.
-        (9) Otherwise displays an error.
+        (5) Validates nickname is not an empty string.
+        (6) Validates nickname hasn't already been taken in this game.
+        (7) Upserts the player, moving them to this game if they already exist.
+        (8) Directs to the lobby.
+        Each check is a single query searching an index: the game's name,
+        the (game_id, name) pair, or for the nickname the range of names in
+        the game starting with it. So joining costs the same however many
+        players are in the db or the game.
         """
         player_name: str = request.POST["player-name"]
         player_nickname: str = player_name[:-8]
@@ -69,42 +97,39 @@ class Join(View):
         except Game.DoesNotExist:
             ctx = {"error": "Game does not exist!"}
             return render(request, self.template_name, ctx)
-        player_names: List[str] = [
-            player.name for player in Player.objects.filter(game_id=game.pk)
-        ]
-        player_nicknames = [player[:-8] for player in player_names]
-        if player_name in player_names and game.progress:
-            return redirect(f"{game.name}/play")
-        elif game.progress:
+        if game.progress:
+            if Player.objects.filter(game_id=game, name=player_name).exists():
+                return redirect(f"{game.name}/play")
             ctx = {"error": "Game already started!"}
             return render(request, self.template_name, ctx)
-        elif player_nickname in player_nicknames:
-            ctx = {"error": "Nickname already taken!"}
-            return render(request, self.template_name, ctx)
-        elif len(player_nickname) <= 0:
+        if len(player_nickname) <= 0:
             ctx = {"error": "Longer nickname please..."}
             return render(request, self.template_name, ctx)
-        else:
-            all_player_names = [player.name for player in Player.objects.all()]
-            if player_name in all_player_names:
-                player = Player.objects.get(name=player_name)
-                player.game_id = game
-                player.submission = None
-                player.votes = None
-                player.points = 0
-            else:
-                player = Player(
-                    name=player_name,
-                    game_id=game,
-                    submission=None,
-                    votes=None,
-                    points=0,
-                )
-        player.save()
-        if not game.progress:
-            return redirect(f"{game.name}/lobby")
-        ctx = {"error": "Joining failed, please return to main menu and try again."}
-        return render(request, self.template_name, ctx)
+        # names are the nickname plus 8 characters. The range bounds the
+        # search of the (game_id, name) index to names that start with the
+        # nickname (all are ascii), which the length then narrows to it.
+        nickname_taken = (
+            Player.objects.filter(
+                game_id=game,
+                name__gte=player_nickname,
+                name__lt=player_nickname + "\x7f",
+                name__startswith=player_nickname,
+            )
+            .alias(name_length=Length("name"))
+            .filter(name_length=len(player_nickname) + 8)
+            .exists()
+        )
+        if nickname_taken:
+            ctx = {"error": "Nickname already taken!"}
+            return render(request, self.template_name, ctx)
+        # a single INSERT ... ON CONFLICT DO UPDATE
+        Player.objects.bulk_create(
+            [Player(name=player_name, game_id=game, points=0)],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["game_id", "points", "submission", "votes"],
+        )
+        return redirect(f"{game.name}/lobby")
 
 
 class Host(View):
@@ -119,25 +144,12 @@ class Host(View):
     def get(self, request) -> HttpResponse:
         """
         Called on a get request to the host page:
-        (1) Generates a random game name based on word-ids.txt
-        (2) Checks this game name is not in use.
-        (3) Adds some anti-caching headers
-        (4) Returns host page showing game name.
+        (1) Allocates a free game name (see NameAllocator)
+        (2) Returns host page showing game name, which is never cached
+            (see CachePolicyMiddleware).
         """
-        while True:
-            n = random.randint(1, 10000)
-            fhand = open("basicgame/resources/word-ids.txt")
-            word_ids = fhand.readlines()
-            word_id = word_ids[n].strip()
-            game_names = [game.name for game in Game.objects.all()]
-            if not word_id in game_names:
-                ctx = {"game_name": word_id}
-                break
-        response = render(request, "basicgame/host.html", ctx)
-        response["Cache-Control"] = "no-cache, no-store, must-revalidate"  # HTTP 1.1.
-        response["Pragma"] = "no-cache"  # HTTP 1.0.
-        response["Expires"] = "0"  # Proxies.
-        return response
+        ctx = {"game_name": get_name_allocator().allocate()}
+        return render(request, "basicgame/host.html", ctx)
 
     def post(self, request, *args, **kwargs):
         """
@@ -154,6 +166,7 @@ class Host(View):
         cycles = 1 if cycles < 1 else cycles
         if Game.objects.filter(name=game_name):
             Game.objects.get(name=game_name).delete()
+            get_game_registry().invalidate(game_name=game_name)
         new_game = Game(
             name=game_name,
             cycles=cycles,
@@ -162,6 +175,7 @@ class Host(View):
             progress=0,
         )
         new_game.save()
+        get_name_allocator().release(game_name)
         return redirect(f"{game_name}/lobby")
 
 
@@ -194,22 +208,66 @@ class Play(View):
     def get(self, request, game_name):
         """
         Called on a GET request to the game page.
-        Adds game information such as game sequence and players
-        to the page for use by js.
+        Adds game information such as game sequence and players, and
+        the url of the hints, to the page for use by js.
         Game should survive refresh.
         """
-        category_hints = open("basicgame/resources/categories.txt").readlines()
-        character_hints = open("basicgame/resources/characters.txt").readlines()
         host = Game.objects.get(name=game_name).host
         ctx = {
             "players": get_players(game_name),
             "game_name": game_name,
             "host": host,
-            "category_hints": category_hints,
-            "character_hints": character_hints,
+            "hints_url": hints_url(),
         }
         return render(request, "basicgame/play.html", ctx)
 
 
+def image(request, key: str) -> HttpResponse:
+    """
+    Serves the thumbnail of a registered winner image (see ImageProxy).
+    Thumbnails never change for a key, so they carry a strong ETag and
+    revalidation requests are answered with 304 Not Modified.
+    """
+    thumbnail = get_image_proxy().get(key)
+    if thumbnail is None:
+        return HttpResponseNotFound()
+    digest, data = thumbnail
+    etag = f'"{digest}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(data, content_type="image/jpeg")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+def autocomplete(request) -> JsonResponse:
+    """
+    Suggests categories or characters starting with a prefix (see
+    AutocompleteService). Query parameters: q (the prefix), kind
+    ('category' or 'character', default character) and limit (at most 20).
+    """
+    kind = request.GET.get("kind", "character")
+    if kind not in KINDS:
+        return JsonResponse({"error": f"kind must be one of {KINDS}"}, status=400)
+    try:
+        limit = min(int(request.GET.get("limit", 8)), 20)
+    except ValueError:
+        limit = 8
+    service = get_autocomplete()
+    service.refresh_if_stale()
+    suggestions = service.suggest(request.GET.get("q", "")[:100], kind, limit)
+    response = JsonResponse({"suggestions": suggestions})
+    response["Cache-Control"] = "public, max-age=300"
+    return response
+
+
+@staff_member_required
+def image_metrics(request) -> JsonResponse:
+    """Shows this worker's image service metrics to staff (see ImageService)."""
+    return JsonResponse(get_image_service().stats())
+
+
 def error(request):
     return HttpResponse("error")
@@ -108,8 +108,58 @@ else:
         },
     }
 
+# Live game state shared by game consumers. "local" keeps games in process
+# memory, "redis" shares them between daphne workers behind the load balancer.
+
+if dev_mode:
+    GAME_STATE_STORE = {"BACKEND": "local"}
+elif use_render:
+    GAME_STATE_STORE = {"BACKEND": "redis", "LOCATION": os.getenv("RENDER_REDIS_URL")}
+elif dockerised:
+    GAME_STATE_STORE = {"BACKEND": "redis", "LOCATION": "redis://mr_cache:6379/1"}
+else:
+    GAME_STATE_STORE = {
+        "BACKEND": "redis",
+        "LOCATION": f"redis://{ENV_VARS['REDIS_HOSTNAME']}:{ENV_VARS['REDIS_PORT']}/1",
+    }
+
+# Image search for the winner view. "google" needs GCS_CX and GCS_DEVELOPER_KEY
+# (falls back to "offline" without them), "offline" serves placeholders without
+# network access (tests, benchmarks). With "PREFETCH", images of every candidate
+# are searched when voting starts, so the winner's image is ready in time.
+# "DAILY_QUOTA" caps searches per worker per day (google's free tier is 100).
+
+IMAGE_PROVIDER = {
+    "BACKEND": "google",
+    "TIMEOUT": 3.0,
+    "PREFETCH": True,
+    "DAILY_QUOTA": 100,
+}
+
+# Winner images are served from this server as thumbnails of SIZE px, cached on
+# disk under LOCATION. Least recently used thumbnails are evicted over MAX_BYTES.
+
+IMAGE_CACHE = {
+    "LOCATION": BASE_DIR / "image_cache",
+    "MAX_BYTES": 50 * 1024 * 1024,
+    "SIZE": 300,
+}
+
+# HTTP caching by route (see basicgame.middleware). The first pattern matching a
+# GET path sets Cache-Control: hashed static files never change, and the home
+# and join pages are revalidated with an ETag. Anything else is no-store, as the
+# host, lobby and play pages carry live game state. Views that set their own
+# Cache-Control (images, hints) keep it.
+
+CACHE_POLICIES = [
+    (r"^/static/.+\.[0-9a-f]{12}\.\w+$", "public, max-age=31536000, immutable"),
+    (r"^/static/", "public, no-cache"),
+    (r"^/(join)?$", "public, no-cache"),
+]
+
 if use_render and not DEBUG:
     MIDDLEWARE = [
+        "basicgame.middleware.CachePolicyMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "whitenoise.middleware.WhiteNoiseMiddleware", # add whitenoise 
         "django.contrib.sessions.middleware.SessionMiddleware",
@@ -117,17 +167,16 @@ if use_render and not DEBUG:
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
-        "basicgame.middleware.NoCachingMiddleware",
     ]
 else:
     MIDDLEWARE = [
+        "basicgame.middleware.CachePolicyMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "django.contrib.sessions.middleware.SessionMiddleware",
         "django.middleware.common.CommonMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
-        "basicgame.middleware.NoCachingMiddleware",
     ]
 
 ROOT_URLCONF = "trumps.urls"
@@ -182,6 +231,21 @@ if not dev_mode:
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Opt-in SQLite profile, enabled with SQLITE_TUNING=1. WAL lets readers carry on
+# while a game writes, NORMAL sync is safe under WAL, and the busy timeout (ms)
+# makes concurrent writers wait rather than fail with "database is locked".
+# Applied to each new connection (see basicgame.sqlite), and connections are
+# kept open for CONN_MAX_AGE seconds. Compare with `manage.py benchmark_sqlite`.
+
+if os.getenv("SQLITE_TUNING", "0") == "1":
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 128 * 1024 * 1024,
+    }
+else:
+    SQLITE_PRAGMAS = {}
 
 if dockerised and use_postgres_with_docker:
     DATABASES = {
@@ -202,6 +266,8 @@ elif dev_mode or (dockerised and use_sqlite_with_docker) or use_render:
             "TEST": {
                 "NAME": BASE_DIR / "db.sqlite3",
             },
+            "CONN_MAX_AGE": 600 if SQLITE_PRAGMAS else 0,
+            "CONN_HEALTH_CHECKS": bool(SQLITE_PRAGMAS),
         }
     }
 else: